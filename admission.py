@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Per-tenant fair queuing in front of the agent team
+
+Every chat request takes a slot in a FairQueue before its agents run. At
+most max_concurrency requests run at once, and each tenant at most
+tenant_concurrency of them. Waiting requests are served by weighted fair
+queuing (start-time fair queuing). A request's tag is where its tenant's
+previous request left off, plus its cost (prompt plus answer tokens)
+divided by the tenant's weight. The lowest tag goes first. A tenant
+sending long prompts in a tight loop therefore falls behind the others
+instead of in front of them.
+
+Requests that could not be served in time are refused at once with a
+Rejected (HTTP 429) that carries the queue position and a Retry-After
+estimate, rather than holding a worker thread until gunicorn's timeout.
+This happens when the tenant already has tenant_queue requests waiting,
+the queue holds max_queue, or the estimated wait is over max_wait.
+
+Slots can be taken from threads (acquire) or from the event loop
+(aacquire); release() hands them on.
+"""
+import time
+import asyncio
+import itertools
+import threading
+
+CHARS_PER_TOKEN = 4
+# Idle tenants still ahead of virtual time keep their place until this many are tracked
+MAX_IDLE_TENANTS = 1024
+
+
+def request_cost(prompt, output_tokens=500):
+    """Tokens a request is expected to use: its prompt plus a full answer"""
+    return len(prompt) // CHARS_PER_TOKEN + 1 + output_tokens
+
+
+def parse_weights(text):
+    """'gold=4,free=0.5' -> {'gold': 4.0, 'free': 0.5}"""
+    weights = {}
+    for item in (text or '').split(','):
+        tenant, _, weight = item.partition('=')
+        if tenant.strip() and weight.strip():
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+class Rejected(Exception):
+    """A request turned away by admission control (HTTP 429)"""
+
+    def __init__(self, reason, retry_after, position=None, depth=0):
+        super().__init__(f'Request rejected by admission control: {reason}')
+        self.reason = reason
+        self.retry_after = retry_after
+        self.position = position
+        self.depth = depth
+
+
+class Ticket:
+    """One request's place in the queue, then its slot until released"""
+
+    def __init__(self, tenant, cost, tag, sequence):
+        self.tenant = tenant
+        self.cost = cost
+        self.tag = tag
+        self.sequence = sequence
+        self.enqueued = time.perf_counter()
+        self.granted_at = None
+        self.released = False
+        self.event = threading.Event()
+        self.loop = None
+        self.future = None
+
+    @property
+    def granted(self):
+        return self.granted_at is not None
+
+    @property
+    def wait_seconds(self):
+        return (self.granted_at or time.perf_counter()) - self.enqueued
+
+    def _grant(self):
+        self.granted_at = time.perf_counter()
+        self.event.set()
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(True))
+
+
+class _Tenant:
+    def __init__(self, weight):
+        self.weight = weight
+        self.running = 0
+        self.waiting = []
+        self.finish_tag = 0.0
+
+
+class FairQueue:
+    """Weighted fair queuing with per-tenant concurrency caps and queue-depth limits
+
+    Args:
+        max_concurrency: Requests running at once across all tenants
+        tenant_concurrency: Requests running at once per tenant
+        tenant_queue: Requests a tenant may have waiting before new ones are refused
+        max_queue: Requests waiting across all tenants before new ones are refused
+        max_wait: Longest a request may wait (or be expected to) before it is refused, in seconds
+        weights: {tenant: weight}; others get default_weight
+        default_weight: Share weight of tenants not in weights
+        service_seconds: Assumed run time of a request until some have been measured
+    """
+
+    def __init__(self, max_concurrency=8, tenant_concurrency=2, tenant_queue=2, max_queue=64, max_wait=30.0,
+                 weights=None, default_weight=1.0, service_seconds=5.0):
+        self.max_concurrency = max_concurrency
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_queue = tenant_queue
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self.service_seconds = service_seconds
+        self.virtual_time = 0.0
+        self.running = 0
+        self.waiting = 0
+        self._tenants = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._counts = {'admitted': 0, 'queued': 0, 'timeouts': 0}
+        self._rejected = {}
+        self._wait_total = 0.0
+
+    def _tenant(self, name):
+        tenant = self._tenants.get(name)
+        if tenant is None:
+            if len(self._tenants) >= MAX_IDLE_TENANTS:
+                for idle in list(self._tenants):
+                    self._forget_if_idle(idle)
+            tenant = self._tenants[name] = _Tenant(self.weights.get(name, self.default_weight))
+        return tenant
+
+    def _forget_if_idle(self, name):
+        tenant = self._tenants.get(name)
+        if tenant is not None and not tenant.running and not tenant.waiting and tenant.finish_tag <= self.virtual_time:
+            del self._tenants[name]
+
+    def _position(self, tag):
+        """1-based place a request with this tag has among everyone waiting"""
+        return 1 + sum(1 for tenant in self._tenants.values() for ticket in tenant.waiting if ticket.tag <= tag)
+
+    def _estimated_wait(self, position):
+        return position * self.service_seconds / self.max_concurrency
+
+    def _reject(self, reason, position):
+        self._rejected[reason] = self._rejected.get(reason, 0) + 1
+        retry_after = max(1, int(self._estimated_wait(position)) + 1)
+        return Rejected(reason, retry_after, position, self.waiting)
+
+    def _dispatch(self):
+        """Grant free slots to the lowest-tagged waiting requests of tenants under their cap"""
+        while self.running < self.max_concurrency:
+            heads = [tenant for tenant in self._tenants.values()
+                     if tenant.waiting and tenant.running < self.tenant_concurrency]
+            if not heads:
+                return
+            tenant = min(heads, key=lambda tenant: (tenant.waiting[0].tag, tenant.waiting[0].sequence))
+            ticket = tenant.waiting.pop(0)
+            tenant.running += 1
+            self.running += 1
+            self.waiting -= 1
+            self.virtual_time = max(self.virtual_time, ticket.tag)
+            self._counts['admitted'] += 1
+            ticket._grant()
+            self._wait_total += ticket.wait_seconds
+
+    def enqueue(self, tenant_name, cost, loop=None):
+        """Queue a request (granting it right away when a slot is free); raises Rejected"""
+        with self._lock:
+            tenant = self._tenant(tenant_name)
+            tag = max(self.virtual_time, tenant.finish_tag)
+            busy = self.running >= self.max_concurrency or tenant.running >= self.tenant_concurrency
+            if busy:
+                position = self._position(tag)
+                if len(tenant.waiting) >= self.tenant_queue:
+                    raise self._reject('tenant_queue_full', position)
+                if self.waiting >= self.max_queue:
+                    raise self._reject('queue_full', position)
+                if self._estimated_wait(position) > self.max_wait:
+                    raise self._reject('wait_too_long', position)
+                self._counts['queued'] += 1
+            tenant.finish_tag = tag + cost / tenant.weight
+            ticket = Ticket(tenant_name, cost, tag, next(self._sequence))
+            if loop is not None:
+                ticket.loop, ticket.future = loop, loop.create_future()
+            tenant.waiting.append(ticket)
+            self.waiting += 1
+            self._dispatch()
+            return ticket
+
+    def _give_up(self, ticket):
+        """Take a request that waited too long out of the queue; False if it was granted meanwhile"""
+        with self._lock:
+            if ticket.granted:
+                return False
+            tenant = self._tenants.get(ticket.tenant)
+            if tenant is not None and ticket in tenant.waiting:
+                tenant.waiting.remove(ticket)
+                self.waiting -= 1
+            self._counts['timeouts'] += 1
+            self._rejected['timeout'] = self._rejected.get('timeout', 0) + 1
+            ticket.released = True
+            self._forget_if_idle(ticket.tenant)
+            return True
+
+    def acquire(self, tenant, cost):
+        """Wait (on this thread) for a slot; the granted Ticket, or Rejected"""
+        ticket = self.enqueue(tenant, cost)
+        if not ticket.event.wait(self.max_wait) and self._give_up(ticket):
+            raise Rejected('timeout', max(1, int(self.service_seconds)), None, self.waiting)
+        return ticket
+
+    async def aacquire(self, tenant, cost):
+        """acquire() for the event loop"""
+        ticket = self.enqueue(tenant, cost, asyncio.get_running_loop())
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), self.max_wait)
+        except asyncio.TimeoutError:
+            if self._give_up(ticket):
+                raise Rejected('timeout', max(1, int(self.service_seconds)), None, self.waiting)
+        except asyncio.CancelledError:
+            if not self._give_up(ticket):
+                self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket):
+        """Free a granted slot for the next request; later calls are ignored"""
+        if ticket is None:
+            return
+        with self._lock:
+            if ticket.released or not ticket.granted:
+                return
+            ticket.released = True
+            seconds = time.perf_counter() - ticket.granted_at
+            self.service_seconds += 0.1 * (seconds - self.service_seconds)
+            tenant = self._tenants[ticket.tenant]
+            tenant.running -= 1
+            self.running -= 1
+            self._dispatch()
+            self._forget_if_idle(ticket.tenant)
+
+    def stats(self):
+        with self._lock:
+            admitted = self._counts['admitted']
+            return {
+                'running': self.running,
+                'waiting': self.waiting,
+                'max_concurrency': self.max_concurrency,
+                'tenant_concurrency': self.tenant_concurrency,
+                **self._counts,
+                'rejected': dict(self._rejected),
+                'mean_wait_seconds': round(self._wait_total / admitted, 4) if admitted else 0.0,
+                'service_seconds': round(self.service_seconds, 3),
+                'tenants': {
+                    name: {'running': tenant.running, 'waiting': len(tenant.waiting), 'weight': tenant.weight}
+                    for name, tenant in self._tenants.items()
+                },
+            }
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Latency of a light tenant while a heavy tenant floods the agents
+
+One heavy tenant sends long prompts from many clients in a tight loop. One
+light tenant sends short prompts with a pause between them. Both share the
+same number of agent slots, the way gunicorn threads are shared. Each
+request holds its slot for a time proportional to its tokens (prompt plus
+answer, at --tokens-per-second). The run is made twice:
+
+  fifo  slots handed out in arrival order (gunicorn's thread pool)
+  fair  FairQueue: weighted fair queuing, per-tenant caps, fast 429s
+
+The report shows the light tenant's latency percentiles, how much work each
+tenant got through, and the heavy tenant's 429s.
+
+    python admission_benchmark.py --seconds 10 --heavy-clients 16 --slots 8
+"""
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from admission import FairQueue, Rejected, request_cost
+from hedging import percentile
+
+HEAVY_PROMPT = 'Summarise this design document in detail. ' * 200
+LIGHT_PROMPT = 'What is our on-call rotation this week?'
+
+
+class FifoSlots:
+    """Arrival-order slots with no tenant awareness"""
+
+    def __init__(self, slots):
+        self._slots = asyncio.Semaphore(slots)
+
+    async def aacquire(self, tenant, cost):
+        await self._slots.acquire()
+        return self
+
+    def release(self, ticket):
+        self._slots.release()
+
+
+async def client(gate, tenant, prompt, until, pause, args, record):
+    while time.perf_counter() < until:
+        cost = request_cost(prompt, args.output_tokens)
+        started = time.perf_counter()
+        try:
+            ticket = await gate.aacquire(tenant, cost)
+        except Rejected as e:
+            record['rejected'] += 1
+            await asyncio.sleep(min(e.retry_after, args.retry_cap))
+            continue
+        try:
+            await asyncio.sleep(cost / args.tokens_per_second)
+        finally:
+            gate.release(ticket)
+        record['latencies'].append(time.perf_counter() - started)
+        await asyncio.sleep(pause)
+
+
+async def run_mode(mode, args):
+    if mode == 'fair':
+        gate = FairQueue(max_concurrency=args.slots, tenant_concurrency=args.tenant_slots,
+                         tenant_queue=args.tenant_queue, max_wait=args.max_wait)
+    else:
+        gate = FifoSlots(args.slots)
+    heavy = {'latencies': [], 'rejected': 0}
+    light = {'latencies': [], 'rejected': 0}
+    until = time.perf_counter() + args.seconds
+    await asyncio.gather(
+        *(client(gate, 'heavy', HEAVY_PROMPT, until, 0, args, heavy) for _ in range(args.heavy_clients)),
+        client(gate, 'light', LIGHT_PROMPT, until, args.light_pause, args, light),
+    )
+    latencies = light['latencies']
+    return {
+        'mode': mode,
+        'light_requests': len(latencies),
+        'light_p50_s': round(statistics.median(latencies), 3) if latencies else None,
+        'light_p95_s': round(percentile(latencies, 95), 3) if latencies else None,
+        'light_max_s': round(max(latencies), 3) if latencies else None,
+        'heavy_requests': len(heavy['latencies']),
+        'heavy_rejected': heavy['rejected'],
+        'light_rejected': light['rejected'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Light-tenant latency under a heavy tenant, FIFO vs fair queuing')
+    parser.add_argument('--seconds', type=float, default=10.0, help='Length of each run')
+    parser.add_argument('--slots', type=int, default=8, help='Requests served at once')
+    parser.add_argument('--tenant-slots', type=int, default=2, help='Fair mode: requests at once per tenant')
+    parser.add_argument('--tenant-queue', type=int, default=2, help='Fair mode: requests a tenant may have waiting')
+    parser.add_argument('--max-wait', type=float, default=30.0, help='Fair mode: longest expected wait before a 429')
+    parser.add_argument('--heavy-clients', type=int, default=16, help='Heavy tenant clients in a tight loop')
+    parser.add_argument('--light-pause', type=float, default=0.2, help='Light tenant seconds between requests')
+    parser.add_argument('--output-tokens', type=int, default=200, help='Answer tokens per request')
+    parser.add_argument('--tokens-per-second', type=float, default=4000.0, help='Simulated service rate per slot')
+    parser.add_argument('--retry-cap', type=float, default=1.0, help='Most seconds a rejected client waits to retry')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = [asyncio.run(run_mode(mode, args)) for mode in ('fifo', 'fair')]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<6}{'light n':>9}{'p50 s':>8}{'p95 s':>8}{'max s':>8}{'heavy n':>9}{'heavy 429':>11}")
+    for row in results:
+        print(f"{row['mode']:<6}{row['light_requests']:>9}{row['light_p50_s']:>8}{row['light_p95_s']:>8}"
+              f"{row['light_max_s']:>8}{row['heavy_requests']:>9}{row['heavy_rejected']:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Session-scoped agent pool with LRU, TTL and memory-cap eviction, and a
+stateless variant that keeps conversations in a session store
+"""
+import os
+import time
+import uuid
+import asyncio
+import weakref
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from session_store import load_conversation, save_conversation
+
+# A request waiting for a session's lease polls the store, backing off to LEASE_POLL_MAX_SECONDS
+LEASE_POLL_SECONDS = 0.02
+LEASE_POLL_MAX_SECONDS = 0.5
+
+
+class _PoolEntry:
+    def __init__(self, team):
+        self.team = team
+        self.last_used = time.monotonic()
+        self.memory_bytes = 0
+
+
+class AgentPool:
+    """Keeps one agent team per conversation and evicts idle or excess ones
+
+    Args:
+        factory: Callable returning a fresh team for a new session
+        max_sessions: Maximum number of teams kept alive at once
+        ttl_seconds: Idle time after which a session's team is dropped
+        max_memory_bytes: Cap on the summed conversation-history size, or None
+        version: Optional callable returning the current agent graph version; a team
+            built for another version is rebuilt on its next checkout, keeping its history
+    """
+
+    def __init__(self, factory, max_sessions=200, ttl_seconds=1800, max_memory_bytes=None, version=None):
+        self._factory = factory
+        self._version = version
+        self.upgrades = 0
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+        self.evictions = 0
+
+    def get(self, session_id):
+        """Return the session's team, creating it on first use"""
+        team = self._lookup(session_id)
+        return team if team is not None else self._insert(session_id, self._factory())
+
+    async def aget(self, session_id):
+        """Async variant of get; a new team is built in a thread, off the event loop"""
+        team = self._lookup(session_id)
+        return team if team is not None else self._insert(session_id, await asyncio.to_thread(self._factory))
+
+    def _lookup(self, session_id):
+        with self._lock:
+            self._evict_expired()
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(session_id)
+            entry.last_used = time.monotonic()
+            return entry.team
+
+    def _insert(self, session_id, team):
+        """Add a team built outside the lock; when another request added one first, that one wins"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                entry = _PoolEntry(team)
+                self._entries[session_id] = entry
+                self._evict_excess()
+            else:
+                self._entries.move_to_end(session_id)
+            entry.last_used = time.monotonic()
+            return entry.team
+
+    @contextmanager
+    def checkout(self, session_id):
+        """Hold the session's team exclusively for the duration of one request"""
+        while True:
+            team = self.get(session_id)
+            with team.lock:
+                if not self._replaced(session_id, team):
+                    serving = self._upgraded(team)
+                    try:
+                        yield serving
+                    finally:
+                        self._publish(session_id, team, serving)
+                        self._record_usage(session_id, serving)
+                    return
+
+    @asynccontextmanager
+    async def acheckout(self, session_id):
+        """Async variant of checkout for the ASGI app"""
+        while True:
+            team = await self.aget(session_id)
+            async with team.async_lock:
+                if not self._replaced(session_id, team):
+                    serving = await asyncio.to_thread(self._upgraded, team) if self._stale(team) else team
+                    try:
+                        yield serving
+                    finally:
+                        self._publish(session_id, team, serving)
+                        # Sizing the history serializes it, so it runs off the event loop
+                        await asyncio.to_thread(self._record_usage, session_id, serving)
+                    return
+
+    def _stale(self, team):
+        """Whether the team was built for an earlier agent graph"""
+        return self._version is not None and getattr(team, 'version', None) != self._version()
+
+    def _upgraded(self, team):
+        """The team, or a copy of its conversation on a team built for the current graph"""
+        if not self._stale(team):
+            return team
+        fresh = self._factory()
+        fresh.adopt(team)
+        return fresh
+
+    def _replaced(self, session_id, team):
+        """Whether the session moved to another team while this one's lock was awaited"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry is not None and entry.team is not team
+
+    def _publish(self, session_id, team, serving):
+        """Make an upgraded team the session's, while the old one's lock is still held.
+
+        Requests that were waiting on the old team's lock then see _replaced()
+        and move over, so the two teams never serve the session at once.
+        """
+        if serving is team:
+            return
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.team is team:
+                entry.team = serving
+                self.upgrades += 1
+
+    def has_history(self, session_id):
+        """Whether the session's conversation has earlier turns"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+        return entry is not None and entry.team.has_history()
+
+    def discard(self, session_id):
+        """Forget a session's team, e.g. when the user resets the conversation"""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is not None:
+                self._memory_bytes -= entry.memory_bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._entries),
+                'memory_bytes': self._memory_bytes,
+                'evictions': self.evictions,
+                'upgrades': self.upgrades,
+            }
+
+    def _record_usage(self, session_id, team):
+        memory_bytes = team.memory_bytes()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry.team is not team:
+                return
+            self._memory_bytes += memory_bytes - entry.memory_bytes
+            entry.memory_bytes = memory_bytes
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(session_id)
+            self._evict_excess()
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.last_used > cutoff:
+                break
+            self._pop_oldest()
+
+    def _evict_excess(self):
+        while len(self._entries) > self.max_sessions:
+            self._pop_oldest()
+        while (self.max_memory_bytes is not None and len(self._entries) > 1
+               and self._memory_bytes > self.max_memory_bytes):
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        _, entry = self._entries.popitem(last=False)
+        self._memory_bytes -= entry.memory_bytes
+        self.evictions += 1
+
+
+class StoreBackedAgentPool:
+    """Rebuilds each request's team from conversation state kept in a session store
+
+    Nothing about a conversation outlives the request in the worker, so with
+    a shared store (RedisSessionStore) any worker or replica can serve any
+    session. A lease in the store keeps concurrent requests for one session
+    from overwriting each other's turns, across processes as well. A
+    background thread renews the leases this worker holds every third of
+    lease_seconds, so a turn may run longer than the lease.
+
+    Args:
+        factory: Callable returning a fresh team
+        store: Session store holding the conversation snapshots
+        ttl_seconds: Idle time after which a conversation is forgotten
+        lease_seconds: How long the lease of a crashed worker outlives it
+    """
+
+    def __init__(self, factory, store, ttl_seconds=1800, lease_seconds=120):
+        self._factory = factory
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.loads = 0
+        self.restored = 0
+        self.saves = 0
+        self.state_bytes = 0
+        self.store_seconds = 0.0
+        self.lease_waits = 0
+        self.lease_renewals = 0
+        self._lock = threading.Lock()
+        # session id -> token of the leases this worker holds
+        self._held = {}
+        self._renewer = None
+
+    def _try_lease(self, session_id, token):
+        if not self.store.add(f'lease:{session_id}', token, self.lease_seconds):
+            return False
+        with self._lock:
+            self._held[session_id] = token
+            if self._renewer is None:
+                self._renewer = _start_lease_renewer(self)
+        return True
+
+    def _release(self, session_id, token):
+        with self._lock:
+            if self._held.get(session_id) == token:
+                del self._held[session_id]
+        if self.store.get(f'lease:{session_id}') == token:
+            self.store.delete(f'lease:{session_id}')
+
+    def renew_leases(self):
+        """Extend every lease this worker still holds; returns how many were renewed"""
+        with self._lock:
+            held = list(self._held.items())
+        renewed = 0
+        for session_id, token in held:
+            if self.store.get(f'lease:{session_id}') == token:
+                self.store.touch(f'lease:{session_id}', self.lease_seconds)
+                renewed += 1
+        with self._lock:
+            self.lease_renewals += renewed
+        return renewed
+
+    def _load(self, session_id):
+        started = time.perf_counter()
+        team = self._factory()
+        restored = load_conversation(self.store, session_id, team)
+        with self._lock:
+            self.loads += 1
+            self.restored += restored
+            self.store_seconds += time.perf_counter() - started
+        return team
+
+    def _save(self, session_id, team):
+        started = time.perf_counter()
+        size = save_conversation(self.store, session_id, team, self.ttl_seconds)
+        with self._lock:
+            self.saves += 1
+            self.state_bytes += size
+            self.store_seconds += time.perf_counter() - started
+
+    def _lease_token(self):
+        return f'{os.getpid()}:{uuid.uuid4().hex}'.encode('ascii')
+
+    @contextmanager
+    def checkout(self, session_id):
+        """Load the session's team, hold its lease for the request, then save it back"""
+        token = self._lease_token()
+        if not self._try_lease(session_id, token):
+            with self._lock:
+                self.lease_waits += 1
+            delay = LEASE_POLL_SECONDS
+            while not self._try_lease(session_id, token):
+                time.sleep(delay)
+                delay = min(delay * 2, LEASE_POLL_MAX_SECONDS)
+        try:
+            team = self._load(session_id)
+            try:
+                yield team
+            finally:
+                self._save(session_id, team)
+        finally:
+            self._release(session_id, token)
+
+    @asynccontextmanager
+    async def acheckout(self, session_id):
+        """Async variant of checkout for the ASGI app (store I/O runs in a thread)"""
+        token = self._lease_token()
+        if not await asyncio.to_thread(self._try_lease, session_id, token):
+            with self._lock:
+                self.lease_waits += 1
+            delay = LEASE_POLL_SECONDS
+            while not await asyncio.to_thread(self._try_lease, session_id, token):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LEASE_POLL_MAX_SECONDS)
+        try:
+            team = await asyncio.to_thread(self._load, session_id)
+            try:
+                yield team
+            finally:
+                await asyncio.to_thread(self._save, session_id, team)
+        finally:
+            await asyncio.to_thread(self._release, session_id, token)
+
+    def has_history(self, session_id):
+        """Whether the session has a saved conversation (even an empty one counts)"""
+        return self.store.get(f'conversation:{session_id}') is not None
+
+    def discard(self, session_id):
+        """Forget a session's conversation, e.g. when the user resets it"""
+        self.store.delete(f'conversation:{session_id}')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': 'stateless',
+                'loads': self.loads,
+                'restored': self.restored,
+                'saves': self.saves,
+                'mean_state_bytes': round(self.state_bytes / self.saves) if self.saves else 0,
+                'mean_store_ms': round(self.store_seconds / (self.loads + self.saves) * 1000, 2) if self.loads + self.saves else 0.0,
+                'lease_waits': self.lease_waits,
+                'lease_renewals': self.lease_renewals,
+            }
+
+
+def _start_lease_renewer(pool):
+    # Holds only a weak reference so a discarded pool (and its thread) can go away
+    pool_ref = weakref.ref(pool)
+    interval = pool.lease_seconds / 3
+
+    def renew():
+        while True:
+            time.sleep(interval)
+            pool = pool_ref()
+            if pool is None:
+                return
+            try:
+                pool.renew_leases()
+            except Exception:
+                # The store is unreachable for now; the next round tries again
+                pass
+            del pool
+
+    thread = threading.Thread(target=renew, name='session-lease-renewal', daemon=True)
+    thread.start()
+    return thread
@@ -1,22 +1,13 @@
-import os
 from dotenv import load_dotenv
 from strands import Agent, tool
-from strands.models.litellm import LiteLLMModel
+from model_factory import create_groq_model
+from tool_executor import ToolConcurrencyLimit
 
 # Load environment variables
 load_dotenv()
 
 # Configure Groq model via LiteLLM
-groq_model = LiteLLMModel(
-    model_id="groq/llama-3.1-70b-versatile",
-    client_args={
-        "api_key": os.getenv("GROQ_API_KEY"),
-    },
-    params={
-        "temperature": 0.7,
-        "max_tokens": 1000,
-    }
-)
+groq_model = create_groq_model(model_id="groq/llama-3.1-70b-versatile", temperature=0.7, max_tokens=1000)
 
 @tool
 def research_analyst(query: str) -> str:
@@ -87,7 +78,9 @@ coordinator_agent = Agent(
     When a user request comes in, analyze it and delegate to the appropriate specialist agent.
     For complex requests involving multiple domains, coordinate between multiple agents.""",
     tools=[research_agent, planning_agent, developer_agent],
-    name="Team Coordinator"
+    name="Team Coordinator",
+    # Specialists asked for in the same turn work at the same time, 4 at most
+    hooks=[ToolConcurrencyLimit()]
 )
 
 def main():
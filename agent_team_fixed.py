@@ -1,23 +1,12 @@
-import os
 from dotenv import load_dotenv
 from strands import Agent, tool
-from strands.models.litellm import LiteLLMModel
+from model_factory import create_groq_model
 
 # Load environment variables
 load_dotenv()
 
-# Configure Groq model via LiteLLM (non-streaming)
-groq_model = LiteLLMModel(
-    model_id="groq/llama-3.1-70b-versatile",
-    client_args={
-        "api_key": os.getenv("GROQ_API_KEY"),
-    },
-    params={
-        "temperature": 0.7,
-        "max_tokens": 1000,
-        "stream": False,  # Disable streaming to avoid the error
-    }
-)
+# Configure Groq model via LiteLLM
+groq_model = create_groq_model(model_id="groq/llama-3.1-70b-versatile", temperature=0.7, max_tokens=1000)
 
 @tool
 def research_analyst(query: str) -> str:
@@ -3,104 +3,481 @@
 Strands Agent Team Web Application for Railway Deployment
 """
 import os
+import queue
+import hmac
+import hashlib
 import asyncio
+import time
+import uuid
+import threading
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, session
-from flask_session import Session
+from flask import Flask, Response, render_template, request, jsonify, session
 from dotenv import load_dotenv
-from strands import Agent, tool
-from strands.models.litellm import LiteLLMModel
+from admission import FairQueue, Rejected, parse_weights, request_cost
+from agent_pool import AgentPool, StoreBackedAgentPool
+from batch_runner import BatchRunner, RequestPacer, parse_batch_body
+from fanout import ParallelFanOut, TaskDecomposer
+from metrics import NULL_TRACE, AgentMetricsHooks, MetricsRegistry, RequestTrace, bind_trace, queued_seconds
+from model_factory import background_loop, create_groq_model, default_model_id, run_sync, shared_scheduler
+from response_cache import MemoryCacheBackend, RedisCacheBackend, ResponseCache, SemanticIndex
+from router import DEFAULT_EXAMPLES, FastPathRouter, RouteDecision, TfidfClassifier
+from scheduler import PRIORITY_BATCH, Overloaded, is_rate_limited
+from serialization import agent_usage, chat_payload, encode, json_text, reply_text, total_usage, usage_snapshot
+from session_store import MemorySessionStore, RedisSessionStore, StoreSessionInterface
+from singleflight import SingleFlight
+from speculation import SpecialistPredictor, SpeculationController, SpeculationHooks
+from team_config import DEFAULT_PATH, TeamConfig, TeamConfigError
+from tool_cache import tool_cache_stats
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'strands-agent-team-secret-key')
-app.config['SESSION_TYPE'] = 'filesystem'
-Session(app)
-
-# Configure Groq model
-groq_model = LiteLLMModel(
-    model_id=os.getenv('GROQ_MODEL', 'groq/llama-3.1-8b-instant'),
-    client_args={
-        "api_key": os.getenv("GROQ_API_KEY"),
-    },
-    params={
-        "temperature": float(os.getenv('TEMPERATURE', '0.7')),
-        "max_tokens": int(os.getenv('MAX_TOKENS', '500')),
-    }
-)
-
-# Define tools
-@tool
-def research_topic(topic: str) -> str:
-    """Research a given topic and provide key insights.
-    
-    Args:
-        topic: The topic to research
-        
-    Returns:
-        Key insights about the topic including trends, applications, and future outlook
-    """
-    return f"Research on {topic}: This field is experiencing rapid growth with significant innovations. Key areas include recent technological advances, practical applications across industries, and promising future developments. Current trends show increasing adoption and integration into various sectors."
-
-@tool
-def plan_project(project_description: str) -> str:
-    """Create a structured plan for any project.
-    
-    Args:
-        project_description: Brief description of the project to plan
-        
-    Returns:
-        Step-by-step project plan with timeline and key milestones
+
+# Sessions live in a shared store (the cookie only carries a signed id), see session_store.py
+if os.getenv('SESSION_BACKEND', 'memory') == 'redis':
+    session_store = RedisSessionStore(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+else:
+    session_store = MemorySessionStore(int(os.getenv('SESSION_CLEANUP_INTERVAL', '60')))
+app.session_interface = StoreSessionInterface(session_store, int(os.getenv('SESSION_TTL_SECONDS', '86400')))
+
+# Configure Groq model (all agents share one pooled HTTP client, see model_factory.py).
+# strands and LiteLLM take seconds to import, so the models and agents are
+# built on first use (or by the warm-up thread below); /health answers
+# before that and /ready once it is done
+temperature = float(os.getenv('TEMPERATURE', '0.7'))
+max_tokens = int(os.getenv('MAX_TOKENS', '500'))
+CASCADE_ENABLED = os.getenv('CASCADE_ENABLED', 'false').lower() == 'true'
+MODEL_IDS = [default_model_id()] + ([os.getenv('LARGE_MODEL', 'groq/llama-3.3-70b-versatile')] if CASCADE_ENABLED else [])
+HEDGED_REQUESTS = os.getenv('HEDGED_REQUESTS', 'false').lower() == 'true'
+
+# Names, prompts and tools of the agent team are declared in team.toml (see
+# team_config.py) and reloaded when it changes, without a restart
+team_config = TeamConfig(os.getenv('TEAM_CONFIG', DEFAULT_PATH))
+
+def model_settings(spec=None):
+    """(model id, temperature, max tokens): the team spec's [model] table, else the environment"""
+    model = (spec or team_config.spec).model
+    return (model.get('id', MODEL_IDS[0]), float(model.get('temperature', temperature)),
+            int(model.get('max_tokens', max_tokens)))
+
+class LLMStack:
+    """The shared Groq model and, with CASCADE_ENABLED, a small -> large
+    cascade per agent role via <ROLE>_MODEL_TIER (cascade | small | large).
+    With HEDGED_REQUESTS each Groq model hedges its slow calls (hedging.py)"""
+
+    def __init__(self, model_id, temperature, max_tokens):
+        from cascade import CascadeModel, CascadeStats
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        from strands.tools.executors import ConcurrentToolExecutor
+        from tool_executor import ToolConcurrencyLimit
+        # Tool calls from one model turn run concurrently, TOOL_CONCURRENCY at a time
+        self.tool_executor = ConcurrentToolExecutor()
+        self.tool_limit = ToolConcurrencyLimit(int(os.getenv('TOOL_CONCURRENCY', '4')))
+        self.hedge_stats = None
+        if HEDGED_REQUESTS:
+            from hedging import HedgeBudget, HedgeStats
+            self.hedge_stats = HedgeStats(metrics_registry)
+            self.hedge_budget = HedgeBudget(float(os.getenv('HEDGE_MAX_EXTRA', '0.05')))
+        self.groq_model = self.hedged(create_groq_model(model_id, temperature, max_tokens),
+                                      os.getenv('HEDGE_MODEL'))
+        self.cascade_stats = None
+        self.team_models = {}
+        if CASCADE_ENABLED:
+            large_model = self.hedged(create_groq_model(MODEL_IDS[1], temperature, max_tokens))
+            self.cascade_stats = CascadeStats(model_id, MODEL_IDS[1])
+            self.team_models = {
+                role: CascadeModel(
+                    self.groq_model, large_model, self.cascade_stats, role=role,
+                    mode=os.getenv(f'{role}_MODEL_TIER', 'cascade').lower(),
+                    complexity_threshold=float(os.getenv('CASCADE_COMPLEXITY_THRESHOLD', '3')),
+                    min_answer_chars=int(os.getenv('CASCADE_MIN_ANSWER_CHARS', '40'))
+                )
+                for role in ('COORDINATOR', 'RESEARCH', 'PLANNING', 'DEVELOPER', 'SYNTHESIS')
+            }
+
+    def hedged(self, model, hedge_model_id=None):
+        """The model, hedging to itself or to hedge_model_id when HEDGED_REQUESTS is on"""
+        if self.hedge_stats is None:
+            return model
+        from hedging import HedgedModel
+        return HedgedModel(
+            model, self.hedge_stats, self.hedge_budget,
+            hedge=create_groq_model(hedge_model_id, self.temperature, self.max_tokens) if hedge_model_id else None,
+            quantile=float(os.getenv('HEDGE_PERCENTILE', '95')),
+            min_delay=float(os.getenv('HEDGE_MIN_DELAY', '0.2')),
+            max_delay=float(os.getenv('HEDGE_MAX_DELAY', '10')),
+            initial_delay=float(os.getenv('HEDGE_INITIAL_DELAY', '2')),
+            scheduler=llm_scheduler
+        )
+
+_llm_stack = None
+_llm_stack_lock = threading.Lock()
+llm_warm = {'ready': False, 'seconds': None, 'error': None}
+
+def llm_stack(spec=None, publish=True):
+    """The LLMStack for a team spec's model settings (the current spec by default), built on first use
+
+    With publish=False a stack for other settings is built but not shared, so
+    compiling a candidate team.toml leaves the live stack and its stats alone.
     """
-    return f"Project Plan for '{project_description}':\nPhase 1: Requirements & Research\nPhase 2: Design & Architecture\nPhase 3: Development & Implementation\nPhase 4: Testing & Quality Assurance\nPhase 5: Deployment & Launch\nPhase 6: Monitoring & Maintenance\n\nEach phase includes specific deliverables and success criteria."
-
-@tool
-def analyze_code(code_snippet: str) -> str:
-    """Analyze code for quality, best practices, and improvements.
-    
-    Args:
-        code_snippet: The code to analyze
-        
-    Returns:
-        Code analysis with suggestions for improvement
+    global _llm_stack
+    settings = model_settings(spec)
+    current = _llm_stack
+    if not publish and (current is None or current[0] != settings):
+        return LLMStack(*settings)
+    if current is None or current[0] != settings:
+        with _llm_stack_lock:
+            if _llm_stack is None or _llm_stack[0] != settings:
+                _llm_stack = (settings, LLMStack(*settings))
+            current = _llm_stack
+    return current[1]
+
+def warm_up():
+    """Import and build the LLM stack and one agent team (which marks the app ready)"""
+    started = time.perf_counter()
+    try:
+        make_team()
+    except Exception as e:
+        llm_warm['error'] = str(e)
+        app.logger.exception('LLM stack warm-up failed')
+        return
+    llm_warm.update(error=None, seconds=round(time.perf_counter() - started, 3))
+
+def cascade_report():
+    """Small/large traffic share and savings, or {'enabled': False}"""
+    if not CASCADE_ENABLED:
+        return {'enabled': False}
+    return llm_stack().cascade_stats.stats()
+
+def hedging_report():
+    """Hedge rate and first-output latency with and without hedging, or {'enabled': False}"""
+    if not HEDGED_REQUESTS:
+        return {'enabled': False}
+    return llm_stack().hedge_stats.stats()
+
+# Per-request spans and Prometheus metrics (served on /metrics)
+metrics_registry = MetricsRegistry() if os.getenv('METRICS_ENABLED', 'true').lower() == 'true' else None
+RESPONSE_TIMINGS = os.getenv('RESPONSE_TIMINGS', 'false').lower() == 'true'
+
+def start_trace(endpoint, request_start=None):
+    """Trace for one request, or a no-op one when metrics are disabled"""
+    if metrics_registry is None:
+        return NULL_TRACE
+    return RequestTrace(metrics_registry, endpoint, queued_seconds(request_start))
+
+def wants_timings(header=None, query=None):
+    """Whether to attach the timing breakdown to the response (needs metrics enabled)"""
+    return metrics_registry is not None and (RESPONSE_TIMINGS or header == '1' or query == '1')
+
+SPECULATIVE_EXECUTION = os.getenv('SPECULATIVE_EXECUTION', 'false').lower() == 'true'
+
+def team_hooks():
+    """Hook providers for a new team (metrics spans and speculation when enabled)"""
+    hooks = [AgentMetricsHooks(metrics_registry)] if metrics_registry is not None else []
+    if SPECULATIVE_EXECUTION:
+        hooks.append(SpeculationHooks())
+    return hooks
+
+# Every LLM call is queued against the Groq rate limits; None when SCHEDULER_ENABLED=false
+llm_scheduler = shared_scheduler()
+
+def admit(priority=0):
+    """Turn the request away (Overloaded) when queued LLM work can't be served in time"""
+    if llm_scheduler is not None:
+        llm_scheduler.admit(priority)
+
+def retry_after_seconds():
+    """Retry-After for a request refused for lack of LLM capacity"""
+    wait = llm_scheduler.estimated_wait() if llm_scheduler is not None else 0
+    return max(1, int(wait) + 1) if wait < float('inf') else 60
+
+# Token-budgeted history per agent role (COORDINATOR_HISTORY_MAX_TOKENS etc.)
+def history_manager(role):
+    """Conversation manager keeping one team member's resent history under budget"""
+    if os.getenv('HISTORY_MANAGEMENT', 'true').lower() != 'true':
+        return None
+    from history import TokenBudgetConversationManager
+    return TokenBudgetConversationManager(
+        max_tokens=int(os.getenv(f'{role}_HISTORY_MAX_TOKENS', os.getenv('HISTORY_MAX_TOKENS', '3000'))),
+        keep_tool_results=int(os.getenv('HISTORY_KEEP_TOOL_RESULTS', '4')),
+        summary_model=llm_stack().groq_model if os.getenv('HISTORY_SUMMARIZE', 'true').lower() == 'true' else None,
+        # Append-only between compactions keeps the prompt cacheable (0: trim every turn)
+        compact_to=float(os.getenv('HISTORY_COMPACT_TO', '0.6')) or None
+    )
+
+# Each conversation gets its own agent team; idle ones are evicted. With
+# STATELESS_WORKERS the team is rebuilt per request from the session store,
+# so any worker or replica (SESSION_BACKEND=redis) can serve any session
+def make_team(conversation_manager=history_manager, spec=None, trial=False):
+    """A new agent team; a trial team (a candidate team.toml) changes no shared state"""
+    from team import AgentTeam
+    spec = spec or team_config.spec
+    stack = llm_stack(spec, publish=not trial)
+    # Each member gets its role's cascade when enabled, else the shared Groq model
+    team = AgentTeam(lambda role: stack.team_models.get(role, stack.groq_model), conversation_manager,
+                     hooks=team_hooks(), tool_executor=stack.tool_executor, spec=spec,
+                     tool_limit=stack.tool_limit)
+    if not trial:
+        llm_warm['ready'] = True
+    return team
+
+# A new team.toml is compiled into a trial team before it replaces the running
+# one; the first team built after the swap publishes its model settings
+team_config.compile = lambda spec: make_team(conversation_manager=None, spec=spec, trial=True)
+if os.getenv('TEAM_CONFIG_WATCH', 'true').lower() == 'true':
+    team_config.watch(float(os.getenv('TEAM_CONFIG_POLL_SECONDS', '2')))
+
+if os.getenv('STATELESS_WORKERS', 'false').lower() == 'true':
+    agent_pool = StoreBackedAgentPool(
+        make_team, session_store,
+        ttl_seconds=int(os.getenv('AGENT_POOL_TTL_SECONDS', '1800'))
+    )
+else:
+    agent_pool = AgentPool(
+        make_team,
+        max_sessions=int(os.getenv('AGENT_POOL_MAX_SESSIONS', '200')),
+        ttl_seconds=int(os.getenv('AGENT_POOL_TTL_SECONDS', '1800')),
+        max_memory_bytes=int(float(os.getenv('AGENT_POOL_MAX_MEMORY_MB', '256')) * 1024 * 1024),
+        version=lambda: team_config.spec.version
+    )
+
+# Build the LLM stack in the background so neither /health nor the first chat waits for it
+if os.getenv('WARMUP_ON_START', 'true').lower() == 'true':
+    threading.Thread(target=warm_up, name='llm-warm-up', daemon=True).start()
+
+# Pre-router that skips the coordinator hop for clearly-classified requests
+router = None
+if os.getenv('FAST_PATH_ROUTER', 'true').lower() == 'true':
+    router = FastPathRouter(
+        classifier=TfidfClassifier(DEFAULT_EXAMPLES) if os.getenv('ROUTER_CLASSIFIER', 'true').lower() == 'true' else None,
+        min_share=float(os.getenv('ROUTER_MIN_CONFIDENCE', '0.75'))
+    )
+
+# Multi-domain requests run their specialists concurrently instead of through the coordinator
+decomposer = None
+if os.getenv('PARALLEL_FANOUT', 'true').lower() == 'true':
+    decomposer = TaskDecomposer(router or FastPathRouter())
+
+# Start the likeliest specialist alongside the coordinator when the router isn't sure
+speculation = None
+if SPECULATIVE_EXECUTION:
+    speculation = SpeculationController(
+        SpecialistPredictor(
+            router or FastPathRouter(classifier=TfidfClassifier(DEFAULT_EXAMPLES)),
+            min_confidence=float(os.getenv('SPECULATION_MIN_CONFIDENCE', '0.3')),
+            max_agents=int(os.getenv('SPECULATION_MAX_AGENTS', '1'))
+        ),
+        tokens_per_minute=int(os.getenv('SPECULATION_TOKENS_PER_MINUTE', '20000'))
+    )
+
+def select_agent(team, user_message):
+    """Pick a specialist on a confident fast-path match, a parallel fan-out for
+    multi-domain requests, otherwise the coordinator (with speculation when enabled)"""
+    subtasks = decomposer.decompose(user_message) if decomposer else []
+    if subtasks:
+        return ParallelFanOut(team, subtasks), RouteDecision(method='fanout')
+    decision = router.route(user_message) if router else RouteDecision()
+    if decision.fast_path:
+        return getattr(team, decision.agent), decision
+    speculative = speculation.speculate(team, user_message) if speculation else None
+    return speculative or team.coordinator_agent, decision
+
+def route_event(agent, decision):
+    """SSE 'route' frame announcing a fast path or fan-out, or None for the coordinator"""
+    if decision.fast_path:
+        return sse_event('route', {**decision.to_dict(), 'agent': agent.name})
+    if isinstance(agent, ParallelFanOut):
+        return sse_event('route', {
+            **decision.to_dict(),
+            'agent': ' + '.join(task['agent'] for task in agent.describe()),
+            'subtasks': agent.describe(),
+        })
+    return None
+
+# Bulk JSONL processing; one pacer keeps all batches in the process under BATCH_REQUESTS_PER_MINUTE
+BATCH_MAX_PROMPTS = int(os.getenv('BATCH_MAX_PROMPTS', '1000'))
+batch_pacer = RequestPacer(float(os.getenv('BATCH_REQUESTS_PER_MINUTE', '0')))
+
+def make_batch_runner(concurrency=None, requests_per_minute=None, max_attempts=None, tenant='batch'):
+    """BatchRunner on fresh teams with the app's routing (defaults from BATCH_* settings)
+
+    Each prompt waits for the tenant's fair share of the agents, like a chat request.
     """
-    return f"Code Analysis:\n✓ Syntax appears correct\n✓ Follows basic structure\n💡 Suggestions: Add error handling, improve documentation, consider edge cases, add unit tests for reliability."
-
-# Create agents
-research_agent = Agent(
-    model=groq_model,
-    system_prompt="You are a Research Analyst specializing in technology and business topics. Use the research_topic tool to provide comprehensive, well-structured insights on any subject.",
-    tools=[research_topic],
-    name="Research Analyst"
-)
-
-planning_agent = Agent(
-    model=groq_model,
-    system_prompt="You are a Project Planner with expertise in breaking down complex projects into manageable phases. Use the plan_project tool to create detailed, actionable project plans.",
-    tools=[plan_project],
-    name="Project Planner"
-)
-
-developer_agent = Agent(
-    model=groq_model,
-    system_prompt="You are a Senior Software Engineer focused on code quality and best practices. Use the analyze_code tool to provide thorough code reviews and improvement suggestions.",
-    tools=[analyze_code],
-    name="Senior Developer"
-)
-
-coordinator_agent = Agent(
-    model=groq_model,
-    system_prompt="""You are a Team Coordinator managing three specialists:
-    • Research Analyst - For research, analysis, and information gathering
-    • Project Planner - For project planning, task breakdown, and roadmapping  
-    • Senior Developer - For code analysis, review, and technical guidance
-    
-    Analyze each request and delegate to the most appropriate specialist. For research tasks, use Research Analyst. For planning tasks, use Project Planner. For code-related tasks, use Senior Developer. Provide concise, actionable responses.""",
-    tools=[research_agent, planning_agent, developer_agent],
-    name="Team Coordinator"
-)
+    async def admit_prompt(prompt):
+        return await fair_queue.aacquire(tenant, request_cost(prompt, model_settings()[2]))
+
+    return BatchRunner(
+        lambda: make_team(conversation_manager=None),
+        select=select_agent,
+        concurrency=concurrency or int(os.getenv('BATCH_CONCURRENCY', '4')),
+        pacer=batch_pacer if requests_per_minute is None else RequestPacer(requests_per_minute),
+        max_attempts=max_attempts or int(os.getenv('BATCH_MAX_ATTEMPTS', '3')),
+        admit=admit_prompt if fair_queue is not None else None,
+        release=release_turn
+    )
+
+def cache_identity(spec):
+    """(model ids, temperature, graph version) the response cache keys answers under"""
+    model_id, cache_temperature, _ = model_settings(spec)
+    return '+'.join([model_id] + MODEL_IDS[1:]), cache_temperature, spec.version
+
+# Cache for repeated prompts, in front of the whole agent pipeline
+response_cache = None
+if os.getenv('RESPONSE_CACHE', 'true').lower() == 'true':
+    if os.getenv('RESPONSE_CACHE_BACKEND', 'memory') == 'redis':
+        cache_backend = RedisCacheBackend(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    else:
+        cache_backend = MemoryCacheBackend(int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '1000')))
+    semantic_threshold = float(os.getenv('RESPONSE_CACHE_SEMANTIC_THRESHOLD', '0'))
+    response_cache = ResponseCache(
+        cache_backend,
+        *cache_identity(team_config.spec),
+        ttl_seconds=int(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '3600')),
+        semantic_index=SemanticIndex(semantic_threshold) if semantic_threshold > 0 else None
+    )
+    # Answers of an earlier team definition are not served after a reload
+    team_config.on_change(lambda spec: response_cache.rekey(*cache_identity(spec)))
+
+# Very short prompts ("yes", "go on") depend on the conversation, so never cache them
+CACHE_MIN_WORDS = int(os.getenv('RESPONSE_CACHE_MIN_WORDS', '3'))
+
+# Only the first turn of a conversation is cached or served from the cache: a
+# later answer was written with that session's history, which other users must
+# not see and which makes it the wrong answer for anyone else
+def cached_reply(user_message, session_id):
+    """Cached response entry for the opening prompt of a conversation, or None"""
+    if response_cache is None or len(user_message.split()) < CACHE_MIN_WORDS:
+        return None
+    if agent_pool.has_history(session_id):
+        return None
+    return response_cache.get(user_message)
+
+def store_reply(user_message, agent, fresh, text=None):
+    """Cache the answer the agent just gave (text, when already known) if fresh: its run had no history"""
+    if response_cache is not None and fresh and len(user_message.split()) >= CACHE_MIN_WORDS:
+        response_cache.put(user_message, reply_text(agent) if text is None else text, agent.name)
+
+# Concurrent identical prompts share one agent run; SINGLEFLIGHT_SCOPE decides
+# who may share (tenant via TENANT_HEADER, session, or global). Across sessions
+# only opening turns are shared, as with the response cache
+singleflight = None
+if os.getenv('SINGLEFLIGHT', 'true').lower() == 'true':
+    singleflight = SingleFlight(os.getenv('SINGLEFLIGHT_SCOPE', 'tenant'))
+SINGLEFLIGHT_WAIT_SECONDS = float(os.getenv('SINGLEFLIGHT_WAIT_SECONDS', '300'))
+TENANT_HEADER = os.getenv('TENANT_HEADER', 'X-Tenant-ID')
+
+def tenant_id(headers, session_id=None):
+    """Tenant a request belongs to: TENANT_HEADER, else its API key (hashed), else its session"""
+    tenant = headers.get(TENANT_HEADER)
+    if tenant:
+        return tenant
+    authorization = headers.get('Authorization', '')
+    api_key = headers.get('X-API-Key') or (authorization[7:] if authorization.startswith('Bearer ') else '')
+    if api_key:
+        return 'key-' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+    return f'session-{session_id}' if session_id else 'anonymous'
+
+# Agent runs are queued fairly across tenants, with per-tenant caps; requests
+# that could not be served in time get a fast 429 (see admission.py)
+fair_queue = None
+if os.getenv('ADMISSION_CONTROL', 'true').lower() == 'true':
+    fair_queue = FairQueue(
+        max_concurrency=int(os.getenv('ADMISSION_MAX_CONCURRENCY', '8')),
+        tenant_concurrency=int(os.getenv('TENANT_MAX_CONCURRENCY', '2')),
+        tenant_queue=int(os.getenv('TENANT_MAX_QUEUE', '2')),
+        max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '64')),
+        max_wait=float(os.getenv('ADMISSION_MAX_WAIT_SECONDS', '30')),
+        weights=parse_weights(os.getenv('TENANT_WEIGHTS', ''))
+    )
+
+def wait_for_turn(tenant, user_message, trace):
+    """Wait for this tenant's fair share of the agents; the Ticket to release, or None when disabled"""
+    if fair_queue is None:
+        return None
+    ticket = fair_queue.acquire(tenant, request_cost(user_message, model_settings()[2]))
+    trace.add('admission', ticket.enqueued, ticket.wait_seconds)
+    return ticket
+
+async def await_turn(tenant, user_message, trace):
+    """wait_for_turn() for the event loop"""
+    if fair_queue is None:
+        return None
+    ticket = await fair_queue.aacquire(tenant, request_cost(user_message, model_settings()[2]))
+    trace.add('admission', ticket.enqueued, ticket.wait_seconds)
+    return ticket
+
+def release_turn(ticket):
+    if fair_queue is not None:
+        fair_queue.release(ticket)
+
+def rejected_response(e):
+    """429 with the queue position and when to retry"""
+    response = jsonify({
+        'error': 'Too many requests are queued for you, please retry shortly',
+        'reason': e.reason,
+        'retry_after': e.retry_after,
+        'queue_position': e.position,
+        'queue_depth': e.depth
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def join_flight(user_message, tenant, session_id):
+    """(flight, leading) for a standalone prompt, or (None, True) when it is not shared"""
+    if singleflight is None or len(user_message.split()) < CACHE_MIN_WORDS:
+        return None, True
+    if singleflight.scope != 'session' and agent_pool.has_history(session_id):
+        return None, True
+    return singleflight.join(singleflight.key(user_message, tenant, session_id))
+
+def withhold_flight(flight):
+    """Abandon a led flight whose run turned out to have history, so its followers run their own"""
+    if flight is not None and singleflight.scope != 'session':
+        land_flight(flight)
+
+def land_flight(flight, agent=None, error=None, text=None):
+    """Hand a led flight's reply (or error) to its followers; with neither, abandon it"""
+    if flight is None:
+        return
+    result = None
+    if agent is not None:
+        result = {'response': reply_text(agent) if text is None else text, 'agent': agent.name}
+    singleflight.finish(flight, result, error)
+
+def shared_reply(result):
+    """A landed flight's reply shaped like a response cache entry"""
+    return dict(result, match='in-flight') if result else None
+
+def shared_follower_reply(flight):
+    """The reply of a flight a streaming follower relayed (raises the leader's error)"""
+    shared = shared_reply(flight.outcome()) if flight.done else None
+    if shared is None:
+        raise RuntimeError('The identical request this one joined did not finish')
+    return shared
+
+def share_frame(flight, frame):
+    """Pass an SSE frame the leader sends on to its streaming followers"""
+    return flight.publish(frame) if flight is not None else frame
+
+def agent_profiles():
+    """Agent descriptions served to the web interface, from the current team.toml"""
+    return team_config.spec.profiles
+
+def get_session_id():
+    """Stable identifier for the current browser conversation"""
+    if 'agent_session_id' not in session:
+        session['agent_session_id'] = uuid.uuid4().hex
+    return session['agent_session_id']
+
+def read_message():
+    """The request's stripped "message", or '' when the body is not a JSON object with one"""
+    data = request.get_json(silent=True)
+    message = data.get('message') if isinstance(data, dict) else None
+    return message.strip() if isinstance(message, str) else ''
 
 @app.route('/')
 def index():
@@ -116,56 +493,431 @@ def health():
         'version': '1.0.0'
     })
 
+@app.route('/ready')
+def ready():
+    """Readiness: 200 once the models and agents are loaded, 503 while warming up"""
+    if not llm_warm['ready']:
+        return jsonify({'status': 'failed' if llm_warm['error'] else 'warming', 'error': llm_warm['error']}), 503
+    return jsonify({'status': 'ready', 'warm_up_seconds': llm_warm['seconds']})
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Handle chat requests"""
+    trace = start_trace('chat', request.headers.get('X-Request-Start'))
+    status = '500'
+    flight = ticket = None
     try:
-        data = request.get_json()
-        user_message = data.get('message', '').strip()
-        
+        user_message = read_message()
+
         if not user_message:
+            status = '400'
             return jsonify({'error': 'Message is required'}), 400
         
-        # Process with agent
-        response = coordinator_agent(user_message)
-        
-        return jsonify({
-            'response': response,
-            'timestamp': datetime.utcnow().isoformat()
-        })
-        
+        session_id = get_session_id()
+        with trace.span('cache'):
+            cached = cached_reply(user_message, session_id)
+        tenant = tenant_id(request.headers, session_id)
+        if not cached:
+            flight, leading = join_flight(user_message, tenant, session_id)
+            if not leading:
+                # An identical request is already running: wait for its answer
+                followed, flight = flight, None
+                with trace.span('coalesced'):
+                    cached = shared_reply(followed.wait(SINGLEFLIGHT_WAIT_SECONDS))
+        if not cached:
+            ticket = wait_for_turn(tenant, user_message, trace)
+            admit()
+
+        # Process with this session's agent team
+        waiting_since = time.perf_counter()
+        with agent_pool.checkout(session_id) as team:
+            trace.add('session_wait', waiting_since, time.perf_counter() - waiting_since)
+            if cached:
+                team.remember_turn(user_message, cached['response'])
+            else:
+                fresh = not team.has_history()
+                if not fresh:
+                    withhold_flight(flight)
+                with trace.span('routing'):
+                    agent, decision = select_agent(team, user_message)
+                bind_trace(team, trace)
+                saved_before = team.tokens_saved()
+                usage_before = usage_snapshot(team.agents)
+                with trace.span('agent', agent=agent.name):
+                    response = run_sync(agent.invoke_async(user_message))
+                team.record_fast_path_turn(user_message, agent)
+                tokens_saved = team.tokens_saved() - saved_before
+                agents = agent_usage(usage_before, team.agents)
+        if cached:
+            text, agent_name, usage = cached['response'], cached['agent'], {'cache_match': cached['match']}
+        else:
+            text, agent_name = reply_text(response), agent.name
+            usage = {'agents': agents, 'tokens_saved': tokens_saved}
+            store_reply(user_message, agent, fresh, text)
+            land_flight(flight, agent, text=text)
+
+        timings = None
+        if wants_timings(request.headers.get('X-Timings'), request.args.get('timings')):
+            timings = trace.breakdown()
+        payload = chat_payload(text, agent_name, cached=bool(cached), timings=timings, **usage)
+        status = '200'
+        with trace.span('serialization'):
+            return encoded_response(payload)
+
+    except Rejected as e:
+        status = '429'
+        land_flight(flight, error=e)
+        return rejected_response(e)
+    except Overloaded as e:
+        status = '503'
+        land_flight(flight, error=e)
+        return capacity_response(e.retry_after)
     except Exception as e:
+        land_flight(flight, error=e)
+        if is_rate_limited(e):
+            status = '503'
+            return capacity_response(retry_after_seconds())
         return jsonify({
             'error': f'Processing error: {str(e)}'
         }), 500
+    finally:
+        release_turn(ticket)
+        land_flight(flight)
+        trace.finish(status)
+
+def encoded_response(payload):
+    """JSON (or MessagePack, when the client asks for it) response for a payload"""
+    body, content_type = encode(payload, request.headers.get('Accept'))
+    response = Response(body, content_type=content_type)
+    response.vary.add('Accept')
+    return response
+
+def capacity_response(retry_after):
+    """503 telling the client when the LLM budget should have room again"""
+    response = jsonify({
+        'error': 'The agents are at capacity, please retry shortly',
+        'retry_after': retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def sse_event(event, payload):
+    """Format a single Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json_text(payload)}\n\n"
+
+def cached_reply_frames(cached):
+    """SSE frames replaying a cached response"""
+    yield sse_event('token', {'text': cached['response']})
+    yield sse_event('done', {
+        'response': cached['response'],
+        'cached': True,
+        'cache_match': cached['match'],
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+def iterate_async(source, abandon):
+    """Consume an async iterator on the shared background loop and yield its items synchronously
+
+    abandon(future) is called when the consumer stops early (client disconnected).
+    """
+    # Unbounded so a slow client never blocks the loop every request shares
+    events = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for event in source:
+                events.put(event)
+        except Exception as e:
+            events.put(e)
+        finally:
+            events.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), background_loop())
+    finished = False
+    try:
+        while True:
+            event = events.get()
+            if event is done:
+                finished = True
+                break
+            if isinstance(event, Exception):
+                raise event
+            yield event
+    finally:
+        # Client went away before the work finished: stop spending tokens on it
+        if not finished:
+            abandon(future)
+            while events.get() is not done:
+                pass
+
+def iterate_agent_stream(agent, prompt):
+    """Run agent.stream_async on the shared background loop and yield its events synchronously"""
+    return iterate_async(agent.stream_async(prompt), lambda future: agent.cancel())
+
+def agent_event_to_sse(event, coordinator_name, seen_tools):
+    """Translate one Strands stream event into a token / tool / done SSE frame, or None"""
+    agent_name = None
+    if 'tool_stream_event' in event:
+        # Events from a specialist running as the coordinator's tool
+        stream_event = event['tool_stream_event']
+        agent_name = stream_event.get('tool_use', {}).get('name')
+        event = stream_event.get('data')
+        if not isinstance(event, dict):
+            return None
+
+    if 'data' in event and isinstance(event['data'], str):
+        payload = {'text': event['data']}
+        if agent_name:
+            payload['agent'] = agent_name
+        return sse_event('token', payload)
+    if 'current_tool_use' in event:
+        tool_use = event['current_tool_use']
+        tool_use_id = tool_use.get('toolUseId')
+        if tool_use_id and tool_use_id not in seen_tools:
+            seen_tools.add(tool_use_id)
+            return sse_event('tool', {
+                'name': tool_use.get('name'),
+                'agent': agent_name or coordinator_name,
+            })
+    elif 'result' in event and agent_name is None:
+        return sse_event('done', {
+            'response': reply_text(event['result']),
+            'timestamp': datetime.utcnow().isoformat()
+        })
+    return None
+
+def agent_events_to_sse(events, coordinator_name):
+    """Translate a stream of Strands events into SSE frames"""
+    seen_tools = set()
+    for event in events:
+        frame = agent_event_to_sse(event, coordinator_name, seen_tools)
+        if frame:
+            yield frame
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Handle chat requests, streaming tokens and tool calls as Server-Sent Events"""
+    user_message = read_message()
+
+    if not user_message:
+        return jsonify({'error': 'Message is required'}), 400
+
+    session_id = get_session_id()
+    trace = start_trace('chat_stream', request.headers.get('X-Request-Start'))
+    timings = wants_timings(request.headers.get('X-Timings'), request.args.get('timings'))
+    with trace.span('cache'):
+        cached = cached_reply(user_message, session_id)
+    tenant = tenant_id(request.headers, session_id)
+    flight, leading = (None, True) if cached else join_flight(user_message, tenant, session_id)
+    followed = ticket = None
+    if not leading:
+        followed, flight = flight, None
+    elif not cached:
+        try:
+            ticket = wait_for_turn(tenant, user_message, trace)
+            admit()
+        except Rejected as e:
+            land_flight(flight, error=e)
+            trace.finish('429')
+            return rejected_response(e)
+        except Overloaded as e:
+            release_turn(ticket)
+            land_flight(flight, error=e)
+            trace.finish('503')
+            return capacity_response(e.retry_after)
+
+    def generate():
+        status = 'cancelled'
+        try:
+            if followed is not None:
+                # An identical request is already running: relay its frames and answer
+                with trace.span('coalesced'):
+                    yield from followed.follow(SINGLEFLIGHT_WAIT_SECONDS)
+                shared = shared_follower_reply(followed)
+                if not followed.streamed:
+                    yield from cached_reply_frames(shared)
+                with agent_pool.checkout(session_id) as team:
+                    team.remember_turn(user_message, shared['response'])
+                status = '200'
+                return
+
+            waiting_since = time.perf_counter()
+            with agent_pool.checkout(session_id) as team:
+                trace.add('session_wait', waiting_since, time.perf_counter() - waiting_since)
+                if cached:
+                    team.remember_turn(user_message, cached['response'])
+                    yield from cached_reply_frames(cached)
+                    status = '200'
+                    return
+
+                fresh = not team.has_history()
+                if not fresh:
+                    withhold_flight(flight)
+                with trace.span('routing'):
+                    agent, decision = select_agent(team, user_message)
+                frame = route_event(agent, decision)
+                if frame:
+                    yield share_frame(flight, frame)
+                bind_trace(team, trace)
+                saved_before = team.tokens_saved()
+                usage_before = usage_snapshot(team.agents)
+                with trace.span('agent', agent=agent.name):
+                    for frame in agent_events_to_sse(iterate_agent_stream(agent, user_message), agent.name):
+                        yield share_frame(flight, frame)
+                team.record_fast_path_turn(user_message, agent)
+                agents = agent_usage(usage_before, team.agents)
+                tokens_saved = team.tokens_saved() - saved_before
+                usage = {'agents': agents, 'usage': total_usage(agents, tokens_saved), 'tokens_saved': tokens_saved}
+                if timings:
+                    usage['timings'] = trace.breakdown()
+                yield sse_event('usage', usage)
+            store_reply(user_message, agent, fresh)
+            land_flight(flight, agent)
+            status = '200'
+        except Rejected as e:
+            # The request this one was following was turned away
+            status = '429'
+            yield sse_event('error', {'error': str(e), 'reason': e.reason, 'retry_after': e.retry_after})
+        except Exception as e:
+            land_flight(flight, error=e)
+            if is_rate_limited(e):
+                status = '503'
+                yield sse_event('error', {
+                    'error': 'The agents are at capacity, please retry shortly',
+                    'retry_after': retry_after_seconds()
+                })
+            else:
+                status = '500'
+                yield sse_event('error', {'error': f'Processing error: {str(e)}'})
+        finally:
+            release_turn(ticket)
+            land_flight(flight)
+            trace.finish(status)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # A client that hangs up before the stream starts never runs generate()
+    response.call_on_close(lambda: release_turn(ticket))
+    return response
+
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """Run JSONL prompts (or {"prompts": [...]}) and stream JSONL results as they complete"""
+    try:
+        jobs = parse_batch_body(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not jobs:
+        return jsonify({'error': 'No prompts in request'}), 400
+    if len(jobs) > BATCH_MAX_PROMPTS:
+        return jsonify({'error': f'At most {BATCH_MAX_PROMPTS} prompts per batch'}), 413
+    try:
+        admit(PRIORITY_BATCH)
+    except Overloaded as e:
+        return capacity_response(e.retry_after)
+
+    runner = make_batch_runner(tenant=tenant_id(request.headers, get_session_id()))
+
+    def generate():
+        for result in iterate_async(runner.run(jobs), lambda future: future.cancel()):
+            yield json_text(result) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics"""
+    if metrics_registry is None:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/agents')
 def get_agents():
     """Get information about available agents"""
-    return jsonify({
-        'agents': [
-            {
-                'name': 'Research Analyst',
-                'description': 'Research and analysis on any topic',
-                'specialties': ['Technology research', 'Market analysis', 'Trend identification']
-            },
-            {
-                'name': 'Project Planner',
-                'description': 'Strategic project planning and task breakdown',
-                'specialties': ['Project roadmapping', 'Task decomposition', 'Timeline planning']
-            },
-            {
-                'name': 'Senior Developer',
-                'description': 'Code analysis and technical guidance',
-                'specialties': ['Code review', 'Best practices', 'Technical recommendations']
-            },
-            {
-                'name': 'Team Coordinator',
-                'description': 'Intelligent task delegation and coordination',
-                'specialties': ['Task routing', 'Multi-agent coordination', 'Workflow optimization']
-            }
-        ]
-    })
+    return jsonify({'agents': agent_profiles()})
+
+@app.route('/api/router/stats')
+def router_stats():
+    """Fast-path router hit rate"""
+    return jsonify(router.stats() if router else {'enabled': False})
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Response cache hit rate"""
+    return jsonify(response_cache.stats() if response_cache else {'enabled': False})
+
+@app.route('/api/scheduler/stats')
+def scheduler_stats():
+    """LLM rate-limit budgets, queue and throttling counters"""
+    return jsonify(llm_scheduler.stats() if llm_scheduler is not None else {'enabled': False})
+
+@app.route('/api/singleflight/stats')
+def singleflight_stats():
+    """Requests that shared an identical in-flight request's answer"""
+    return jsonify(singleflight.stats() if singleflight else {'enabled': False})
+
+@app.route('/api/speculation/stats')
+def speculation_stats():
+    """Speculative specialist hit rate and token cost"""
+    return jsonify(speculation.stats.stats() if speculation else {'enabled': False})
+
+@app.route('/api/cascade/stats')
+def cascade_stats_view():
+    """Small/large model traffic share and savings"""
+    return jsonify(cascade_report())
+
+@app.route('/api/team/stats')
+def team_stats():
+    """Version of the running team definition and its reload history"""
+    return jsonify(team_config.stats())
+
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+
+def is_admin(headers):
+    """Whether the request carries ADMIN_TOKEN (as a Bearer token or X-Admin-Token)"""
+    authorization = headers.get('Authorization', '')
+    token = headers.get('X-Admin-Token') or (authorization[7:] if authorization.startswith('Bearer ') else '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+def reload_team(body):
+    """(payload, status) for a reload from team.toml, or from a TOML body which is also written there"""
+    try:
+        result = team_config.apply(body) if body.strip() else team_config.reload()
+    except TeamConfigError as e:
+        return {'error': str(e), 'version': team_config.spec.version}, 400
+    return result, 200
+
+@app.route('/api/admin/team/reload', methods=['POST'])
+def team_reload():
+    """Swap in the team definition from team.toml (or from the TOML request body)"""
+    if not is_admin(request.headers):
+        return jsonify({'error': 'Admin token required (set ADMIN_TOKEN)'}), 403
+    payload, status = reload_team(request.get_data(as_text=True))
+    return jsonify(payload), status
+
+@app.route('/api/admission/stats')
+def admission_stats():
+    """Fair-queue slots, waiting requests per tenant and rejections"""
+    return jsonify(fair_queue.stats() if fair_queue else {'enabled': False})
+
+@app.route('/api/hedging/stats')
+def hedging_stats_view():
+    """Hedged request rate and tail latency saved"""
+    return jsonify(hedging_report())
+
+@app.route('/api/sessions/stats')
+def session_stats():
+    """Session store counters and the agent pool serving conversations"""
+    return jsonify({**session_store.stats(), 'agents': agent_pool.stats()})
+
+@app.route('/api/tools/stats')
+def tool_stats():
+    """Tool memoization hit/miss counters"""
+    return jsonify(tool_cache_stats())
 
 @app.errorhandler(404)
 def not_found(error):
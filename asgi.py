@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Asyncio-native (ASGI) serving mode for the Strands Agent Team
+
+Serves the same routes as app.py, but drives the agents through their async
+APIs so one worker process can hold many chats waiting on Groq at once:
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+"""
+import os
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, Response, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+from admission import Rejected
+from batch_runner import parse_batch_body
+from metrics import bind_trace
+from scheduler import PRIORITY_BATCH, Overloaded, is_rate_limited
+from serialization import agent_usage, chat_payload, encode, json_text, reply_text, total_usage, usage_snapshot
+from tool_cache import tool_cache_stats
+from app import (BATCH_MAX_PROMPTS, SINGLEFLIGHT_WAIT_SECONDS, admit, agent_event_to_sse, agent_pool, agent_profiles,
+                 await_turn, cached_reply, cached_reply_frames, cascade_report, fair_queue, hedging_report, is_admin,
+                 join_flight, land_flight, llm_scheduler, llm_warm, make_batch_runner, metrics_registry, release_turn,
+                 reload_team, response_cache, retry_after_seconds, route_event, router, select_agent, session_store,
+                 share_frame, shared_follower_reply, shared_reply, singleflight, speculation, sse_event, start_trace,
+                 store_reply, team_config, tenant_id, wants_timings,
+                 withhold_flight)
+
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'))
+
+
+def get_session_id(request):
+    """Stable identifier for the current browser conversation"""
+    if 'agent_session_id' not in request.session:
+        request.session['agent_session_id'] = uuid.uuid4().hex
+    return request.session['agent_session_id']
+
+
+def capacity_response(retry_after):
+    """503 telling the client when the LLM budget should have room again"""
+    return JSONResponse(
+        {'error': 'The agents are at capacity, please retry shortly', 'retry_after': retry_after},
+        status_code=503,
+        headers={'Retry-After': str(retry_after)}
+    )
+
+
+def encoded_response(request, payload):
+    """JSON (or MessagePack, when the client asks for it) response for a payload"""
+    body, content_type = encode(payload, request.headers.get('accept'))
+    return Response(body, media_type=content_type, headers={'Vary': 'Accept'})
+
+
+def rejected_response(e):
+    """429 with the queue position and when to retry"""
+    return JSONResponse(
+        {'error': 'Too many requests are queued for you, please retry shortly', 'reason': e.reason,
+         'retry_after': e.retry_after, 'queue_position': e.position, 'queue_depth': e.depth},
+        status_code=429,
+        headers={'Retry-After': str(e.retry_after)}
+    )
+
+
+async def read_message(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    message = data.get('message') if isinstance(data, dict) else None
+    return message.strip() if isinstance(message, str) else ''
+
+
+async def index(request):
+    """Main page with agent interface"""
+    return templates.TemplateResponse(request, 'index.html')
+
+
+async def health(request):
+    """Health check endpoint for Railway"""
+    return JSONResponse({
+        'status': 'healthy',
+        'timestamp': datetime.utcnow().isoformat(),
+        'version': '1.0.0'
+    })
+
+
+async def ready(request):
+    """Readiness: 200 once the models and agents are loaded, 503 while warming up"""
+    if not llm_warm['ready']:
+        return JSONResponse({'status': 'failed' if llm_warm['error'] else 'warming', 'error': llm_warm['error']},
+                            status_code=503)
+    return JSONResponse({'status': 'ready', 'warm_up_seconds': llm_warm['seconds']})
+
+
+def settle_reply(user_message, agent, fresh, flight, text=None):
+    """store_reply() then land_flight(); run in a thread, since the response cache may be Redis"""
+    store_reply(user_message, agent, fresh, text)
+    land_flight(flight, agent, text=text)
+
+
+async def chat(request):
+    """Handle chat requests"""
+    user_message = await read_message(request)
+    if not user_message:
+        return JSONResponse({'error': 'Message is required'}, status_code=400)
+
+    trace = start_trace('chat', request.headers.get('X-Request-Start'))
+    status = '500'
+    flight = ticket = None
+    try:
+        session_id = get_session_id(request)
+        with trace.span('cache'):
+            cached = await asyncio.to_thread(cached_reply, user_message, session_id)
+        tenant = tenant_id(request.headers, session_id)
+        if not cached:
+            flight, leading = await asyncio.to_thread(join_flight, user_message, tenant, session_id)
+            if not leading:
+                # An identical request is already running: wait for its answer
+                followed, flight = flight, None
+                with trace.span('coalesced'):
+                    cached = shared_reply(await followed.await_result(SINGLEFLIGHT_WAIT_SECONDS))
+        if not cached:
+            ticket = await await_turn(tenant, user_message, trace)
+            admit()
+        waiting_since = time.perf_counter()
+        async with agent_pool.acheckout(session_id) as team:
+            trace.add('session_wait', waiting_since, time.perf_counter() - waiting_since)
+            if cached:
+                team.remember_turn(user_message, cached['response'])
+            else:
+                fresh = not team.has_history()
+                if not fresh:
+                    withhold_flight(flight)
+                with trace.span('routing'):
+                    agent, decision = select_agent(team, user_message)
+                bind_trace(team, trace)
+                saved_before = team.tokens_saved()
+                usage_before = usage_snapshot(team.agents)
+                with trace.span('agent', agent=agent.name):
+                    response = await agent.invoke_async(user_message)
+                team.record_fast_path_turn(user_message, agent)
+                tokens_saved = team.tokens_saved() - saved_before
+                agents = agent_usage(usage_before, team.agents)
+        if cached:
+            text, agent_name, usage = cached['response'], cached['agent'], {'cache_match': cached['match']}
+        else:
+            text, agent_name = reply_text(response), agent.name
+            usage = {'agents': agents, 'tokens_saved': tokens_saved}
+            await asyncio.to_thread(settle_reply, user_message, agent, fresh, flight, text)
+
+        timings = None
+        if wants_timings(request.headers.get('X-Timings'), request.query_params.get('timings')):
+            timings = trace.breakdown()
+        payload = chat_payload(text, agent_name, cached=bool(cached), timings=timings, **usage)
+        status = '200'
+        with trace.span('serialization'):
+            return encoded_response(request, payload)
+
+    except Rejected as e:
+        status = '429'
+        land_flight(flight, error=e)
+        return rejected_response(e)
+    except Overloaded as e:
+        status = '503'
+        land_flight(flight, error=e)
+        return capacity_response(e.retry_after)
+    except Exception as e:
+        land_flight(flight, error=e)
+        if is_rate_limited(e):
+            status = '503'
+            return capacity_response(retry_after_seconds())
+        return JSONResponse({'error': f'Processing error: {str(e)}'}, status_code=500)
+    finally:
+        release_turn(ticket)
+        land_flight(flight)
+        trace.finish(status)
+
+
+async def chat_stream(request):
+    """Handle chat requests, streaming tokens and tool calls as Server-Sent Events"""
+    user_message = await read_message(request)
+    if not user_message:
+        return JSONResponse({'error': 'Message is required'}, status_code=400)
+
+    session_id = get_session_id(request)
+    trace = start_trace('chat_stream', request.headers.get('X-Request-Start'))
+    timings = wants_timings(request.headers.get('X-Timings'), request.query_params.get('timings'))
+    with trace.span('cache'):
+        cached = await asyncio.to_thread(cached_reply, user_message, session_id)
+    tenant = tenant_id(request.headers, session_id)
+    flight, leading = (None, True) if cached else await asyncio.to_thread(join_flight, user_message, tenant,
+                                                                          session_id)
+    followed = ticket = None
+    if not leading:
+        followed, flight = flight, None
+    elif not cached:
+        try:
+            ticket = await await_turn(tenant, user_message, trace)
+            admit()
+        except Rejected as e:
+            land_flight(flight, error=e)
+            trace.finish('429')
+            return rejected_response(e)
+        except Overloaded as e:
+            release_turn(ticket)
+            land_flight(flight, error=e)
+            trace.finish('503')
+            return capacity_response(e.retry_after)
+
+    async def generate():
+        status = 'cancelled'
+        try:
+            if followed is not None:
+                # An identical request is already running: relay its frames and answer
+                with trace.span('coalesced'):
+                    async for frame in followed.afollow(SINGLEFLIGHT_WAIT_SECONDS):
+                        yield frame
+                shared = shared_follower_reply(followed)
+                if not followed.streamed:
+                    for frame in cached_reply_frames(shared):
+                        yield frame
+                async with agent_pool.acheckout(session_id) as team:
+                    team.remember_turn(user_message, shared['response'])
+                status = '200'
+                return
+
+            waiting_since = time.perf_counter()
+            async with agent_pool.acheckout(session_id) as team:
+                trace.add('session_wait', waiting_since, time.perf_counter() - waiting_since)
+                if cached:
+                    team.remember_turn(user_message, cached['response'])
+                    for frame in cached_reply_frames(cached):
+                        yield frame
+                    status = '200'
+                    return
+
+                fresh = not team.has_history()
+                if not fresh:
+                    withhold_flight(flight)
+                with trace.span('routing'):
+                    agent, decision = select_agent(team, user_message)
+                frame = route_event(agent, decision)
+                if frame:
+                    yield share_frame(flight, frame)
+                bind_trace(team, trace)
+                seen_tools = set()
+                saved_before = team.tokens_saved()
+                usage_before = usage_snapshot(team.agents)
+                with trace.span('agent', agent=agent.name):
+                    async for event in agent.stream_async(user_message):
+                        frame = agent_event_to_sse(event, agent.name, seen_tools)
+                        if frame:
+                            yield share_frame(flight, frame)
+                team.record_fast_path_turn(user_message, agent)
+                agents = agent_usage(usage_before, team.agents)
+                tokens_saved = team.tokens_saved() - saved_before
+                usage = {'agents': agents, 'usage': total_usage(agents, tokens_saved), 'tokens_saved': tokens_saved}
+                if timings:
+                    usage['timings'] = trace.breakdown()
+                yield sse_event('usage', usage)
+            await asyncio.to_thread(settle_reply, user_message, agent, fresh, flight)
+            status = '200'
+        except Rejected as e:
+            # The request this one was following was turned away
+            status = '429'
+            yield sse_event('error', {'error': str(e), 'reason': e.reason, 'retry_after': e.retry_after})
+        except Exception as e:
+            land_flight(flight, error=e)
+            if is_rate_limited(e):
+                status = '503'
+                yield sse_event('error', {
+                    'error': 'The agents are at capacity, please retry shortly',
+                    'retry_after': retry_after_seconds()
+                })
+            else:
+                status = '500'
+                yield sse_event('error', {'error': f'Processing error: {str(e)}'})
+        finally:
+            release_turn(ticket)
+            land_flight(flight)
+            trace.finish(status)
+
+    # The background task frees the slot even if the client hangs up before the stream starts
+    return StreamingResponse(generate(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    }, background=BackgroundTask(release_turn, ticket))
+
+
+async def batch(request):
+    """Run JSONL prompts (or {"prompts": [...]}) and stream JSONL results as they complete"""
+    try:
+        jobs = parse_batch_body((await request.body()).decode('utf-8'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    if not jobs:
+        return JSONResponse({'error': 'No prompts in request'}, status_code=400)
+    if len(jobs) > BATCH_MAX_PROMPTS:
+        return JSONResponse({'error': f'At most {BATCH_MAX_PROMPTS} prompts per batch'}, status_code=413)
+    try:
+        admit(PRIORITY_BATCH)
+    except Overloaded as e:
+        return capacity_response(e.retry_after)
+
+    runner = make_batch_runner(tenant=tenant_id(request.headers, get_session_id(request)))
+
+    async def generate():
+        async for result in runner.run(jobs):
+            yield json_text(result) + '\n'
+
+    return StreamingResponse(generate(), media_type='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+
+async def metrics(request):
+    """Prometheus metrics"""
+    if metrics_registry is None:
+        return JSONResponse({'error': 'Metrics are disabled'}, status_code=404)
+    return PlainTextResponse(metrics_registry.render(), media_type='text/plain; version=0.0.4')
+
+
+async def router_stats(request):
+    """Fast-path router hit rate"""
+    return JSONResponse(router.stats() if router else {'enabled': False})
+
+
+async def cache_stats(request):
+    """Response cache hit rate"""
+    return JSONResponse(response_cache.stats() if response_cache else {'enabled': False})
+
+
+async def scheduler_stats(request):
+    """LLM rate-limit budgets, queue and throttling counters"""
+    return JSONResponse(llm_scheduler.stats() if llm_scheduler is not None else {'enabled': False})
+
+
+async def singleflight_stats(request):
+    """Requests that shared an identical in-flight request's answer"""
+    return JSONResponse(singleflight.stats() if singleflight else {'enabled': False})
+
+
+async def speculation_stats(request):
+    """Speculative specialist hit rate and token cost"""
+    return JSONResponse(speculation.stats.stats() if speculation else {'enabled': False})
+
+
+async def cascade_stats_view(request):
+    """Small/large model traffic share and savings"""
+    return JSONResponse(cascade_report())
+
+
+async def team_stats(request):
+    """Version of the running team definition and its reload history"""
+    return JSONResponse(team_config.stats())
+
+
+async def team_reload(request):
+    """Swap in the team definition from team.toml (or from the TOML request body)"""
+    if not is_admin(request.headers):
+        return JSONResponse({'error': 'Admin token required (set ADMIN_TOKEN)'}, status_code=403)
+    # Compiling the new definition builds a trial team, which may import strands
+    payload, status = await asyncio.to_thread(reload_team, (await request.body()).decode('utf-8'))
+    return JSONResponse(payload, status_code=status)
+
+
+async def admission_stats(request):
+    """Fair-queue slots, waiting requests per tenant and rejections"""
+    return JSONResponse(fair_queue.stats() if fair_queue else {'enabled': False})
+
+
+async def hedging_stats_view(request):
+    """Hedged request rate and tail latency saved"""
+    return JSONResponse(hedging_report())
+
+
+async def session_stats(request):
+    """Session store counters and the agent pool serving conversations"""
+    return JSONResponse({**session_store.stats(), 'agents': agent_pool.stats()})
+
+
+async def tool_stats(request):
+    """Tool memoization hit/miss counters"""
+    return JSONResponse(tool_cache_stats())
+
+
+async def get_agents(request):
+    """Get information about available agents"""
+    return JSONResponse({'agents': agent_profiles()})
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/health', health),
+        Route('/ready', ready),
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/chat/stream', chat_stream, methods=['POST']),
+        Route('/api/agents', get_agents),
+        Route('/api/router/stats', router_stats),
+        Route('/api/cache/stats', cache_stats),
+        Route('/api/scheduler/stats', scheduler_stats),
+        Route('/api/singleflight/stats', singleflight_stats),
+        Route('/api/speculation/stats', speculation_stats),
+        Route('/api/cascade/stats', cascade_stats_view),
+        Route('/api/admission/stats', admission_stats),
+        Route('/api/team/stats', team_stats),
+        Route('/api/admin/team/reload', team_reload, methods=['POST']),
+        Route('/api/hedging/stats', hedging_stats_view),
+        Route('/api/sessions/stats', session_stats),
+        Route('/api/tools/stats', tool_stats),
+        Route('/api/batch', batch, methods=['POST']),
+        Route('/metrics', metrics),
+    ],
+    middleware=[
+        Middleware(SessionMiddleware, secret_key=os.getenv('SECRET_KEY', 'strands-agent-team-secret-key')),
+    ],
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=int(os.environ.get('PORT', 8080)))
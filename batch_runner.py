@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Batch processing of JSONL prompts through the agent team
+
+Each input line is a JSON object with a prompt ("prompt" or "message", or
+"title" + "body" as in requests.jsonl) and an optional id ("id" or
+"request_id", defaulting to the line number). Prompts are processed by a
+bounded pool of workers, each with a fresh team per prompt, and a JSONL
+result is emitted as soon as each one completes:
+
+    {"id": "user-001", "status": "ok", "agent": "Research Analyst", "response": "...", "agents": [...],
+     "usage": {...}, "attempts": 1, "duration_s": 2.31}
+
+response, agents and usage are read exactly as /api/chat reads them (see
+serialization.py).
+
+Job starts are paced to a requests-per-minute budget; when the API keeps
+throttling, or admission control turns a prompt away, every worker pauses
+with exponential backoff instead of piling on retries. The web app admits
+each prompt through its per-tenant fair queue (admission.py), so a batch
+gets no more of the agents than its tenant's share. The results file doubles as the checkpoint: with --resume,
+ids already recorded as ok are skipped and new results are appended.
+
+    python batch_runner.py prompts.jsonl -o results.jsonl --concurrency 8 --rpm 60 --resume
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from admission import Rejected
+from scheduler import PRIORITY_BATCH, is_rate_limited, request_priority
+from serialization import agent_usage, reply_text, total_usage, usage_snapshot
+
+
+class BatchJob:
+    """One prompt of a batch"""
+
+    def __init__(self, job_id, prompt, error=None):
+        self.id = job_id
+        self.prompt = prompt
+        self.error = error
+
+
+def parse_job(line_number, record):
+    """BatchJob from one decoded input line (a bare string is a prompt)"""
+    if isinstance(record, str):
+        return BatchJob(str(line_number), record.strip())
+    if not isinstance(record, dict):
+        return BatchJob(str(line_number), '', error='Expected a JSON object or string')
+    job_id = str(record.get('id') or record.get('request_id') or line_number)
+    prompt = record.get('prompt') or record.get('message')
+    if not prompt and record.get('body'):
+        prompt = f"{record['title']}\n\n{record['body']}" if record.get('title') else record['body']
+    if not prompt or not str(prompt).strip():
+        return BatchJob(job_id, '', error='No prompt in record')
+    return BatchJob(job_id, str(prompt).strip())
+
+
+def read_jobs(lines):
+    """Lazily parse JSONL lines into BatchJobs; bad lines become failed jobs"""
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield BatchJob(str(line_number), '', error=f'Invalid JSON: {e}')
+            continue
+        yield parse_job(line_number, record)
+
+
+def parse_batch_body(text):
+    """Jobs from a request body: JSONL, or one JSON object {"prompts": [...]}"""
+    try:
+        body = json.loads(text)
+    except ValueError:
+        body = None
+    if isinstance(body, dict) and 'prompts' in body:
+        if not isinstance(body['prompts'], list):
+            raise ValueError('"prompts" must be a list')
+        return [parse_job(index, record) for index, record in enumerate(body['prompts'], 1)]
+    return list(read_jobs(text.splitlines()))
+
+
+def completed_ids(path):
+    """Ids recorded as ok in an earlier results file (the resume checkpoint)"""
+    done = set()
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if isinstance(result, dict) and result.get('status') == 'ok':
+                    done.add(str(result.get('id')))
+    except FileNotFoundError:
+        pass
+    return done
+
+
+class RequestPacer:
+    """Spaces job starts to a requests-per-minute budget and holds them during throttle backoff
+
+    Share one pacer between runners to make the budget process-wide.
+    """
+
+    def __init__(self, requests_per_minute=0, backoff_seconds=2.0, max_backoff_seconds=60.0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.throttled = 0
+        self._next_start = 0.0
+        self._resume_at = 0.0
+        self._consecutive_throttles = 0
+
+    async def wait(self):
+        now = time.monotonic()
+        start = max(now, self._next_start, self._resume_at)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def throttle(self):
+        """The API pushed back: pause every job start with jittered exponential backoff"""
+        self.throttled += 1
+        self._consecutive_throttles += 1
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (self._consecutive_throttles - 1))
+        self._resume_at = max(self._resume_at, time.monotonic() + delay * random.uniform(0.5, 1.0))
+
+    def success(self):
+        self._consecutive_throttles = 0
+
+
+def coordinator(team, prompt):
+    """Default routing: every prompt goes through the team coordinator"""
+    return team.coordinator_agent, None
+
+
+class BatchRunner:
+    """Runs BatchJobs on fresh agent teams with bounded concurrency
+
+    Args:
+        make_team: Callable returning a new AgentTeam
+        select: select(team, prompt) -> (agent, decision), e.g. app.select_agent
+        concurrency: Prompts in flight at once
+        pacer: RequestPacer for rate limiting (a private unlimited one by default)
+        max_attempts: Tries per prompt before it is reported as an error
+        admit: Optional async admit(prompt) -> ticket, awaited before each try (raises Rejected)
+        release: release(ticket), called when that try ends
+    """
+
+    def __init__(self, make_team, select=coordinator, concurrency=4, pacer=None, max_attempts=3, admit=None,
+                 release=None):
+        self.make_team = make_team
+        self.select = select
+        self.concurrency = max(1, concurrency)
+        self.pacer = pacer or RequestPacer()
+        self.max_attempts = max(1, max_attempts)
+        self.admit = admit
+        self.release = release
+
+    async def run(self, jobs, skip=()):
+        """Process jobs and yield each result dict as soon as it completes"""
+        pending = asyncio.Queue(maxsize=self.concurrency * 2)
+        results = asyncio.Queue()
+        finished = object()
+
+        async def feed():
+            try:
+                for job in jobs:
+                    if job.id not in skip:
+                        await pending.put(job)
+            except Exception as e:
+                await results.put({'id': None, 'status': 'error', 'error': f'Reading input failed: {e}', 'attempts': 0})
+            for _ in range(self.concurrency):
+                await pending.put(finished)
+
+        async def work():
+            # Interactive chats get LLM capacity before batch prompts
+            request_priority.set(PRIORITY_BATCH)
+            while True:
+                job = await pending.get()
+                if job is finished:
+                    await results.put(finished)
+                    return
+                await results.put(await self.process(job))
+
+        tasks = [asyncio.ensure_future(feed())] + [asyncio.ensure_future(work()) for _ in range(self.concurrency)]
+        try:
+            remaining = self.concurrency
+            while remaining:
+                result = await results.get()
+                if result is finished:
+                    remaining -= 1
+                else:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def process(self, job):
+        if job.error:
+            return {'id': job.id, 'status': 'error', 'error': job.error, 'attempts': 0}
+        started = time.perf_counter()
+        for attempt in range(1, self.max_attempts + 1):
+            await self.pacer.wait()
+            ticket = None
+            try:
+                if self.admit is not None:
+                    ticket = await self.admit(job.prompt)
+                # Building a team is blocking work; keep it off the loop other jobs share
+                team = await asyncio.to_thread(self.make_team)
+                agent, _ = self.select(team, job.prompt)
+                saved_before = team.tokens_saved()
+                usage_before = usage_snapshot(team.agents)
+                response = await agent.invoke_async(job.prompt)
+            except Exception as e:
+                error = str(e)
+                if is_rate_limited(e):
+                    self.pacer.throttle()
+                    error = f'Rate limited: {e}'
+                elif isinstance(e, Rejected):
+                    self.pacer.throttle()
+            else:
+                self.pacer.success()
+                agents = agent_usage(usage_before, team.agents)
+                return {
+                    'id': job.id,
+                    'status': 'ok',
+                    'agent': agent.name,
+                    'response': reply_text(response),
+                    'agents': agents,
+                    'usage': total_usage(agents, team.tokens_saved() - saved_before),
+                    'attempts': attempt,
+                    'duration_s': round(time.perf_counter() - started, 3),
+                }
+            finally:
+                if ticket is not None and self.release is not None:
+                    self.release(ticket)
+        return {
+            'id': job.id,
+            'status': 'error',
+            'error': error,
+            'attempts': self.max_attempts,
+            'duration_s': round(time.perf_counter() - started, 3),
+        }
+
+
+async def run_batch(args, jobs, output):
+    from app import make_batch_runner
+    runner = make_batch_runner(concurrency=args.concurrency, requests_per_minute=args.rpm, max_attempts=args.max_attempts)
+    skip = completed_ids(args.output) if args.resume and args.output else set()
+    counts = {'ok': 0, 'error': 0}
+    async for result in runner.run(jobs, skip=skip):
+        counts[result['status']] += 1
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+        print(f"{result['status']:>5}  {result['id']}", file=sys.stderr)
+    print(f"Done: {counts['ok']} ok, {counts['error']} failed, {len(skip)} skipped (already done), "
+          f"{runner.pacer.throttled} throttled", file=sys.stderr)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run JSONL prompts through the agent team')
+    parser.add_argument('input', help="JSONL prompts file ('-' for stdin)")
+    parser.add_argument('-o', '--output', help='JSONL results file (default: stdout)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Prompts in flight at once')
+    parser.add_argument('--rpm', type=float, default=0, help='Max prompt attempts started per minute (0 = unlimited)')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Tries per prompt')
+    parser.add_argument('--resume', action='store_true', help='Skip ids already ok in --output and append to it')
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    output = open(args.output, 'a' if args.resume else 'w') if args.output else sys.stdout
+    try:
+        counts = asyncio.run(run_batch(args, read_jobs(source), output))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 1 if counts['error'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
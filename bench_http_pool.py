@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Before/after latency of repeated LLM calls: per-call clients vs. the shared pool
+
+Runs an agent against the fake LLM server over HTTPS (self-signed cert made
+with openssl) and compares:
+
+  before - LiteLLM's default client handling, one event loop per call
+           (how app.py used to call agent(prompt))
+  after  - model_factory's pooled keep-alive client on the shared loop
+
+    python bench_http_pool.py --calls 50 --connect-latency 0.03
+"""
+import os
+import ssl
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+
+def make_certificate(directory):
+    """Self-signed certificate for 127.0.0.1, or None without openssl"""
+    if not shutil.which('openssl'):
+        return None
+    certfile, keyfile = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-keyout', keyfile, '-out', certfile, '-subj', '/CN=127.0.0.1',
+        '-addext', 'subjectAltName=IP:127.0.0.1',
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(name, latencies, connections):
+    return {
+        'mode': name,
+        'calls': len(latencies),
+        'connections': connections,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def run(name, server, agent, call, calls):
+    call(agent)  # warm up imports and the first connection
+    opened = server.connections
+    latencies = []
+    for _ in range(calls):
+        agent.messages.clear()
+        started = time.perf_counter()
+        call(agent)
+        latencies.append(time.perf_counter() - started)
+    return summarize(name, latencies, server.connections - opened)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Repeated-call latency with and without the shared HTTP pool')
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake LLM seconds per call')
+    parser.add_argument('--connect-latency', type=float, default=0.03, help='Extra seconds per new connection (network RTTs)')
+    parser.add_argument('--plain-http', action='store_true', help='Skip TLS')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    certificate = None if args.plain_http else make_certificate(workdir)
+    ssl_context = None
+    if certificate:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(*certificate)
+        os.environ['SSL_CERT_FILE'] = certificate[0]
+
+    from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+    server, base_url = start_fake_llm_server(
+        config=FakeLLMConfig(latency=args.latency, connect_latency=args.connect_latency),
+        ssl_context=ssl_context
+    )
+    os.environ.update({'GROQ_API_BASE': base_url, 'GROQ_API_KEY': os.getenv('GROQ_API_KEY') or 'fake-key'})
+
+    from strands import Agent
+    from model_factory import create_groq_model, run_sync
+
+    def make_agent(pooled):
+        return Agent(model=create_groq_model(max_tokens=50, pooled=pooled), callback_handler=None)
+
+    results = [
+        run('before', server, make_agent(False), lambda agent: agent('Say hello'), args.calls),
+        run('after', server, make_agent(True), lambda agent: run_sync(agent.invoke_async('Say hello')), args.calls),
+    ]
+    server.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    transport = 'https' if certificate else 'http'
+    print(f"{args.calls} sequential calls over {transport}, fake LLM {args.latency * 1000:.0f} ms, "
+          f"+{args.connect_latency * 1000:.0f} ms per new connection")
+    print(f"{'mode':<8}{'conns':>7}{'mean ms':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for row in results:
+        print(f"{row['mode']:<8}{row['connections']:>7}{row['mean_ms']:>10}{row['p50_ms']:>9}{row['p99_ms']:>9}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
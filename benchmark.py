@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the agent pipeline
+
+Starts fake_llm_server.py (no GROQ_API_KEY needed) with the given latency,
+token rate, tool script and error rate, then drives each target at fixed
+concurrency levels:
+
+  wsgi - app.py under gunicorn, via /api/chat/stream
+  asgi - asgi.py under uvicorn, via /api/chat/stream
+  team - an AgentTeam's coordinator in-process, without the web layer
+
+Each level reports requests/sec, p50/p95/p99 latency, time-to-first-token
+and LLM calls and tokens per request (from the fake server's counters).
+Results are written as JSON; --compare prints the change against an
+earlier results file.
+
+    python benchmark.py --target wsgi asgi team --concurrency 1 8 32 --output bench.json
+    python benchmark.py --target team --error-rate 0.05 --compare bench.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+import httpx
+from load_test import HERE, SERVER_COMMANDS, free_port, percentile, server_env, start_process, wait_for
+
+PROMPTS = [
+    'Research the current state of renewable energy storage',
+    'Plan a three month mobile app launch',
+    'Review this code for bugs: def add(a, b): return a - b',
+    'Research vector databases and then plan a migration to one',
+    'What are the trade-offs between REST and GraphQL?',
+]
+
+# Default tool script: realistic delegation depth for the prompts above
+TOOL_SCRIPT = [
+    {'match': r'research.*plan|plan.*research', 'tools': ['research_analyst', 'project_planner', 'research_topic', 'plan_project']},
+    {'match': r'research', 'tools': ['research_analyst', 'research_topic']},
+    {'match': r'plan', 'tools': ['project_planner', 'plan_project']},
+    {'match': r'code|bug|def ', 'tools': ['senior_developer', 'analyze_code']},
+]
+
+
+def summarize(latencies, first_tokens, errors, elapsed, llm_before, llm_after):
+    requests = len(latencies)
+    per_request = max(1, requests + errors)
+    calls = llm_after['requests'] - llm_before['requests']
+    tokens = (llm_after['prompt_tokens'] + llm_after['completion_tokens']
+              - llm_before['prompt_tokens'] - llm_before['completion_tokens'])
+    ms = lambda values, pct: round((percentile(values, pct) or 0) * 1000, 1)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else 0,
+        'latency_ms': {'p50': ms(latencies, 50), 'p95': ms(latencies, 95), 'p99': ms(latencies, 99)},
+        'ttft_ms': {'p50': ms(first_tokens, 50), 'p95': ms(first_tokens, 95), 'p99': ms(first_tokens, 99)},
+        'llm_calls_per_request': round(calls / per_request, 2),
+        'llm_errors': llm_after['errors'] - llm_before['errors'],
+        'llm_rate_limited': llm_after['rate_limited'] - llm_before['rate_limited'],
+        'tokens_per_request': round(tokens / per_request, 1),
+        'completion_tokens_per_request': round(
+            (llm_after['completion_tokens'] - llm_before['completion_tokens']) / per_request, 1),
+    }
+
+
+def llm_stats(llm_base_url):
+    return httpx.get(f"{llm_base_url}/stats", timeout=10).json()
+
+
+def prompt_for(user, index, prompts):
+    # Unique per request so the response cache never short-circuits the pipeline
+    return f"{prompts[(user + index) % len(prompts)]} (#{user}-{index})"
+
+
+async def http_user(base_url, user, requests_per_user, prompts, results):
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        for index in range(requests_per_user):
+            started = time.perf_counter()
+            first_token, failed = None, False
+            try:
+                async with client.stream('POST', '/api/chat/stream', json={'message': prompt_for(user, index, prompts)}) as response:
+                    failed = response.status_code != 200
+                    async for line in response.aiter_lines():
+                        if line == 'event: token' and first_token is None:
+                            first_token = time.perf_counter() - started
+                        elif line == 'event: error':
+                            failed = True
+            except httpx.HTTPError:
+                failed = True
+            record(results, started, first_token, failed)
+
+
+async def team_user(make_team, user, requests_per_user, prompts, results):
+    team = make_team()
+    for index in range(requests_per_user):
+        started = time.perf_counter()
+        first_token, failed = None, False
+        try:
+            async for event in team.coordinator_agent.stream_async(prompt_for(user, index, prompts)):
+                data = event.get('tool_stream_event', {}).get('data', event)
+                if first_token is None and isinstance(data, dict) and isinstance(data.get('data'), str):
+                    first_token = time.perf_counter() - started
+        except Exception:
+            failed = True
+        record(results, started, first_token, failed)
+
+
+def record(results, started, first_token, failed):
+    if failed:
+        results['errors'] += 1
+        return
+    results['latencies'].append(time.perf_counter() - started)
+    if first_token is not None:
+        results['first_tokens'].append(first_token)
+
+
+async def run_level(user_factory, llm_base_url, concurrency, requests_per_user, prompts):
+    results = {'latencies': [], 'first_tokens': [], 'errors': 0}
+    before = llm_stats(llm_base_url)
+    started = time.perf_counter()
+    await asyncio.gather(*(user_factory(user, requests_per_user, prompts, results) for user in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    summary = summarize(results['latencies'], results['first_tokens'], results['errors'], elapsed, before, llm_stats(llm_base_url))
+    return dict(concurrency=concurrency, **summary)
+
+
+def bench_http(mode, llm_base_url, args, prompts):
+    port = free_port()
+    env = server_env(llm_base_url)
+    if not args.cache:
+        env['RESPONSE_CACHE'] = 'false'
+    server = start_process([part.format(port=port) for part in SERVER_COMMANDS[mode]], env)
+    base_url = f"http://127.0.0.1:{port}"
+    user_factory = lambda user, count, prompts, results: http_user(base_url, user, count, prompts, results)
+    try:
+        wait_for(f"{base_url}/health")
+        asyncio.run(run_level(user_factory, llm_base_url, 1, 1, prompts))  # warm-up
+        return [dict(target=mode, **asyncio.run(run_level(user_factory, llm_base_url, level, args.requests_per_user, prompts)))
+                for level in args.concurrency]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def bench_team(llm_base_url, args, prompts):
+    os.environ.update(server_env(llm_base_url))
+    from team import AgentTeam
+    from model_factory import create_groq_model
+
+    model = create_groq_model(max_tokens=500)
+    user_factory = lambda user, count, prompts, results: team_user(lambda: AgentTeam(model), user, count, prompts, results)
+    asyncio.run(run_level(user_factory, llm_base_url, 1, 1, prompts))  # warm-up
+    return [dict(target='team', **asyncio.run(run_level(user_factory, llm_base_url, level, args.requests_per_user, prompts)))
+            for level in args.concurrency]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(previous, current):
+    """Print the change in throughput, p95 latency and TTFT against an earlier run"""
+    baseline = {(row['target'], row['concurrency']): row for row in previous['results']}
+    print(f"\nvs. {previous.get('commit') or 'previous run'} ({previous.get('timestamp', '?')})", file=sys.stderr)
+    print(f"{'target':<7}{'users':>6}{'req/s':>10}{'p95 ms':>10}{'ttft p95':>10}", file=sys.stderr)
+    for row in current['results']:
+        old = baseline.get((row['target'], row['concurrency']))
+        if old is None:
+            continue
+        change = lambda new, before: f"{(new - before) / before * 100:+.0f}%" if before else 'n/a'
+        print(f"{row['target']:<7}{row['concurrency']:>6}"
+              f"{change(row['throughput_rps'], old['throughput_rps']):>10}"
+              f"{change(row['latency_ms']['p95'], old['latency_ms']['p95']):>10}"
+              f"{change(row['ttft_ms']['p95'], old['ttft_ms']['p95']):>10}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline throughput/latency benchmark against a fake LLM')
+    parser.add_argument('--target', choices=['wsgi', 'asgi', 'team'], nargs='+', default=['wsgi', 'asgi', 'team'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests-per-user', type=int, default=3)
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Fake LLM seconds before the first byte')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='Fake LLM streaming rate')
+    parser.add_argument('--response-words', type=int, default=60, help='Words in each fake answer')
+    parser.add_argument('--tool-script', help='JSON tool script for the fake LLM (default: built-in delegation script)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of LLM calls that fail')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--rpm-limit', type=int, default=0, help='Fake LLM requests-per-minute limit (0 = none)')
+    parser.add_argument('--tpm-limit', type=int, default=0, help='Fake LLM tokens-per-minute limit (0 = none)')
+    parser.add_argument('--prompts', help='Text file with one prompt per line (default: built-in mix)')
+    parser.add_argument('--cache', action='store_true', help='Leave the response cache on for the web targets')
+    parser.add_argument('--output', help='Write results JSON here (default: stdout)')
+    parser.add_argument('--compare', help='Earlier results JSON to diff against')
+    args = parser.parse_args()
+
+    prompts = PROMPTS
+    if args.prompts:
+        with open(args.prompts) as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    script_path = args.tool_script
+    if script_path is None:
+        script_path = os.path.join(HERE, f'.benchmark-tool-script-{os.getpid()}.json')
+        with open(script_path, 'w') as f:
+            json.dump(TOOL_SCRIPT, f)
+
+    llm_port = free_port()
+    llm_base_url = f"http://127.0.0.1:{llm_port}/v1"
+    llm_server = start_process([
+        sys.executable, 'fake_llm_server.py', '--port', str(llm_port),
+        '--latency', str(args.llm_latency), '--tokens-per-second', str(args.tokens_per_second),
+        '--response-words', str(args.response_words), '--tool-script', script_path,
+        '--error-rate', str(args.error_rate), '--error-status', str(args.error_status), '--seed', '1',
+        '--rpm-limit', str(args.rpm_limit), '--tpm-limit', str(args.tpm_limit),
+    ], dict(os.environ))
+    results = []
+    try:
+        wait_for(f"{llm_base_url}/models")
+        for target in args.target:
+            if target == 'team':
+                results.extend(bench_team(llm_base_url, args, prompts))
+            else:
+                results.extend(bench_http(target, llm_base_url, args, prompts))
+    finally:
+        llm_server.terminate()
+        llm_server.wait()
+        if args.tool_script is None:
+            os.remove(script_path)
+
+    report = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'config': {
+            key: getattr(args, key) for key in (
+                'concurrency', 'requests_per_user', 'llm_latency', 'tokens_per_second',
+                'response_words', 'tool_script', 'error_rate', 'error_status', 'rpm_limit', 'tpm_limit', 'cache',
+            )
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    print(f"\n{'target':<7}{'users':>6}{'ok':>6}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'ttft p50':>10}{'calls/req':>11}{'tok/req':>9}", file=sys.stderr)
+    for row in results:
+        print(f"{row['target']:<7}{row['concurrency']:>6}{row['requests']:>6}{row['errors']:>5}{row['throughput_rps']:>9}"
+              f"{row['latency_ms']['p50']:>9}{row['latency_ms']['p95']:>9}{row['latency_ms']['p99']:>9}"
+              f"{row['ttft_ms']['p50']:>10}{row['llm_calls_per_request']:>11}{row['tokens_per_request']:>9}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        compare(previous, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Small/large model cascade
+
+CascadeModel sits where an agent's model goes. Each model call first goes
+to the small, fast model; the call escalates to the large model only when
+
+  - the request looks complex (long prompt, code, design/architecture
+    style wording) - it then goes straight to the large model, or
+  - the small model's answer fails a quality check: cut off at max_tokens,
+    too short, hedging ("I'm not sure"), or a call to a tool that doesn't
+    exist.
+
+Tool calls (routing / delegation decisions) pass the check as long as the
+tool exists, so coordinator routing and simple specialist turns stay on
+the small model. The small answer is buffered until it has passed, so a
+failed one is never shown. Each agent role can be pinned to one tier
+instead (mode='small' / 'large'). CascadeStats reports per-tier traffic
+share and the latency and cost saved compared with running everything
+on the large model.
+"""
+import re
+import time
+import threading
+from strands.models import Model
+
+# USD per million tokens (input, output); used when LiteLLM's cost map has no entry
+DEFAULT_PRICES = {
+    'groq/llama-3.1-8b-instant': (0.05, 0.08),
+    'groq/llama-3.3-70b-versatile': (0.59, 0.79),
+    'groq/llama-3.1-70b-versatile': (0.59, 0.79),
+    'groq/gemma2-9b-it': (0.20, 0.20),
+}
+
+_COMPLEX_WORDS = re.compile(
+    r'\b(architect\w*|design|trade-?offs?|optimi[sz]\w*|scal\w+|distributed|concurren\w*|security|'
+    r'algorithm\w*|prove|in[- ]depth|comprehensive|compare|comparison|migrat\w+|strategy|step[- ]by[- ]step)\b',
+    re.IGNORECASE
+)
+_LOW_CONFIDENCE = re.compile(
+    r"\b(i'?m not sure|i am not sure|i don'?t know|i do not know|i cannot|i can'?t (?:help|answer|assist)|"
+    r"unable to (?:answer|help|determine)|as an ai\b)",
+    re.IGNORECASE
+)
+
+
+def model_prices(model_id):
+    """(input, output) USD per million tokens for a model id, or (0, 0) if unknown"""
+    try:
+        import litellm
+        entry = litellm.model_cost.get(model_id) or litellm.model_cost.get(model_id.split('/', 1)[-1])
+        if entry and entry.get('input_cost_per_token') is not None:
+            return entry['input_cost_per_token'] * 1e6, entry.get('output_cost_per_token', 0.0) * 1e6
+    except ImportError:
+        pass
+    return DEFAULT_PRICES.get(model_id, (0.0, 0.0))
+
+
+def last_user_text(messages):
+    """Text of the latest user turn that has text (skipping tool-result turns)"""
+    for message in reversed(messages):
+        if message.get('role') != 'user':
+            continue
+        text = ' '.join(block['text'] for block in message.get('content', []) if 'text' in block)
+        if text.strip():
+            return text
+    return ''
+
+
+def complexity(prompt):
+    """Rough difficulty score: length, code blocks and design-level wording"""
+    words = len(prompt.split())
+    code_blocks = prompt.count('```') // 2
+    keywords = len({match.lower() for match in _COMPLEX_WORDS.findall(prompt)})
+    return words / 60.0 + 1.5 * code_blocks + keywords
+
+
+def review(events, tool_specs, min_answer_chars=40):
+    """Why a buffered small-model response should be escalated, or None if it passes"""
+    text, tool_names, stop_reason = [], [], None
+    for event in events:
+        if 'contentBlockStart' in event:
+            tool_use = event['contentBlockStart'].get('start', {}).get('toolUse')
+            if tool_use:
+                tool_names.append(tool_use.get('name'))
+        elif 'contentBlockDelta' in event:
+            text.append(event['contentBlockDelta'].get('delta', {}).get('text', ''))
+        elif 'messageStop' in event:
+            stop_reason = event['messageStop'].get('stopReason')
+
+    if stop_reason == 'max_tokens':
+        return 'truncated'
+    if tool_names:
+        known = {spec.get('name') for spec in tool_specs or []}
+        return 'unknown_tool' if any(name not in known for name in tool_names) else None
+    answer = ''.join(text).strip()
+    if len(answer) < min_answer_chars:
+        return 'too_short'
+    if _LOW_CONFIDENCE.search(answer[:400]):
+        return 'low_confidence'
+    return None
+
+
+def _usage(events):
+    for event in events:
+        if 'metadata' in event:
+            usage = event['metadata'].get('usage') or {}
+            return usage.get('inputTokens', 0), usage.get('outputTokens', 0)
+    return 0, 0
+
+
+class CascadeStats:
+    """Per-tier traffic, escalations and estimated savings versus large-model-only"""
+
+    def __init__(self, small_model_id, large_model_id):
+        self.model_ids = {'small': small_model_id, 'large': large_model_id}
+        self.prices = {tier: model_prices(model_id) for tier, model_id in self.model_ids.items()}
+        self.tiers = {tier: {'calls': 0, 'seconds': 0.0, 'input_tokens': 0, 'output_tokens': 0} for tier in self.model_ids}
+        self.escalations = {}
+        self.by_agent = {}
+        self.wasted = {'calls': 0, 'seconds': 0.0, 'cost': 0.0}
+        self._lock = threading.Lock()
+
+    def _cost(self, tier, input_tokens, output_tokens):
+        input_price, output_price = self.prices[tier]
+        return (input_tokens * input_price + output_tokens * output_price) / 1e6
+
+    def record(self, role, tier, seconds, input_tokens, output_tokens):
+        """A call answered by tier"""
+        with self._lock:
+            stats = self.tiers[tier]
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            agent = self.by_agent.setdefault(role, {'small': 0, 'large': 0})
+            agent[tier] += 1
+
+    def escalated(self, reason, seconds, input_tokens, output_tokens):
+        """A small-model attempt that was thrown away (or skipped, for reason 'complex')"""
+        with self._lock:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+            if reason != 'complex':
+                self.wasted['calls'] += 1
+                self.wasted['seconds'] += seconds
+                self.wasted['cost'] += self._cost('small', input_tokens, output_tokens)
+
+    def stats(self):
+        with self._lock:
+            small, large = self.tiers['small'], self.tiers['large']
+            total = small['calls'] + large['calls']
+            # What the small model's calls would have cost/taken on the large model
+            large_cost = self._cost('large', small['input_tokens'], small['output_tokens'])
+            small_cost = self._cost('small', small['input_tokens'], small['output_tokens'])
+            latency_saved = None
+            if large['calls'] and small['calls']:
+                mean_large = large['seconds'] / large['calls']
+                latency_saved = round(small['calls'] * mean_large - small['seconds'] - self.wasted['seconds'], 2)
+            return {
+                'models': self.model_ids,
+                'calls': total,
+                'share': {tier: round(self.tiers[tier]['calls'] / total, 3) if total else 0.0 for tier in self.tiers},
+                'tiers': {
+                    tier: dict(stats, seconds=round(stats['seconds'], 3),
+                               mean_latency_ms=round(stats['seconds'] / stats['calls'] * 1000, 1) if stats['calls'] else None)
+                    for tier, stats in self.tiers.items()
+                },
+                'escalations': dict(self.escalations),
+                'by_agent': {role: dict(counts) for role, counts in self.by_agent.items()},
+                'wasted_small_calls': self.wasted['calls'],
+                'latency_saved_s': latency_saved,
+                'cost_saved_usd': round(large_cost - small_cost - self.wasted['cost'], 6),
+            }
+
+
+class CascadeModel(Model):
+    """Model that answers with the small model and escalates to the large one when needed
+
+    Args:
+        small: Fast, cheap model tried first
+        large: Model used for complex requests and failed small answers
+        stats: Shared CascadeStats
+        role: Agent role the model serves, for per-agent stats
+        mode: 'cascade', or 'small' / 'large' to pin the role to one tier
+        complexity_threshold: complexity() score that sends a request straight to the large model
+        min_answer_chars: Shorter small-model answers are escalated
+    """
+
+    def __init__(self, small, large, stats, role='', mode='cascade', complexity_threshold=3.0, min_answer_chars=40):
+        self.small = small
+        self.large = large
+        self.stats = stats
+        self.role = role
+        self.mode = mode
+        self.complexity_threshold = complexity_threshold
+        self.min_answer_chars = min_answer_chars
+
+    def update_config(self, **model_config):
+        self.small.update_config(**model_config)
+        self.large.update_config(**model_config)
+
+    def get_config(self):
+        return self.small.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        model = self.small if self.mode == 'small' else self.large
+        return model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def _answer(self, tier, messages, tool_specs, system_prompt, kwargs):
+        model = self.small if tier == 'small' else self.large
+        started, events = time.perf_counter(), []
+        async for event in model.stream(messages, tool_specs, system_prompt, **kwargs):
+            events.append(event)
+            yield event
+        self.stats.record(self.role, tier, time.perf_counter() - started, *_usage(events))
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        tier = self.mode if self.mode in ('small', 'large') else None
+        if tier is None and complexity(last_user_text(messages)) >= self.complexity_threshold:
+            self.stats.escalated('complex', 0.0, 0, 0)
+            tier = 'large'
+
+        if tier is None:
+            # Buffer the small model's answer until it has passed review
+            started, events = time.perf_counter(), []
+            async for event in self.small.stream(messages, tool_specs, system_prompt, **kwargs):
+                events.append(event)
+            seconds = time.perf_counter() - started
+            reason = review(events, tool_specs, self.min_answer_chars)
+            if reason is None:
+                self.stats.record(self.role, 'small', seconds, *_usage(events))
+                for event in events:
+                    yield event
+                return
+            self.stats.escalated(reason, seconds, *_usage(events))
+            tier = 'large'
+
+        async for event in self._answer(tier, messages, tool_specs, system_prompt, kwargs):
+            yield event
@@ -1,12 +1,12 @@
 import os
 from dotenv import load_dotenv
-import litellm
+from model_factory import completion
 
 load_dotenv()
 
 # Test direct LiteLLM call
 try:
-    response = litellm.completion(
+    response = completion(
         model="groq/llama-3.1-8b-instant",
         messages=[{"role": "user", "content": "Hello"}],
         api_key=os.getenv("GROQ_API_KEY")
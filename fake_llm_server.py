@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible stand-in for the Groq API
+
+Serves /chat/completions (streaming and non-streaming) with configurable
+latency so the agent team can be exercised without a GROQ_API_KEY.
+Point the app at it with GROQ_API_BASE=http://127.0.0.1:<port>/v1.
+New connections can be served over TLS and/or delayed by connect_latency
+to stand in for the TCP + TLS handshake to a remote API; the server counts
+them so connection reuse can be measured.
+
+Tool policy: when the request offers tools and the last message is a user
+turn, the fake model calls the tool whose name best matches the prompt;
+once a tool result is present it answers in plain text. A tool script
+overrides this per prompt: [{"match": "<regex>", "tools": [names]}] makes
+the model call each listed tool it is offered, one per turn and in order,
+before answering ("tools": [] answers straight away). Because tools that
+are not offered are skipped, one script entry can drive the coordinator
+and the specialist it delegates to. A nested list of names
+({"tools": [["a", "b"], "c"]}) calls those tools together in one turn.
+
+Error injection: error_rate of the completions fail with error_status
+(429s carry Retry-After). GET /v1/stats reports requests, errors, tokens
+and connections so benchmarks can diff them.
+
+Rate limits: with rpm_limit / tpm_limit set, completions over budget get
+a 429 with Retry-After, and every response carries Groq-style
+x-ratelimit-{limit,remaining,reset}-{requests,tokens} headers.
+
+Prompt caching: with prefix_cache set, the server remembers the requests it
+has seen the way a provider's prompt cache does. The model, tools and
+each leading run of messages are matched byte for byte, and the matched
+share of the prompt is reported as usage.prompt_tokens_details.cached_tokens.
+With prefill_tokens_per_second set, only uncached prompt tokens add latency.
+
+Tail latency: slow_rate of the completions wait slow_latency extra seconds
+before the first byte, like an occasional stalled upstream request.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import ssl
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMConfig:
+    """Behaviour knobs for the fake server"""
+
+    def __init__(self, latency=0.05, tokens_per_second=500.0, response_words=40, connect_latency=0.0,
+                 tool_script=None, error_rate=0.0, error_status=500, seed=None, rpm_limit=0, tpm_limit=0,
+                 prefix_cache=False, prefill_tokens_per_second=0.0, slow_rate=0.0, slow_latency=5.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_words = response_words
+        self.connect_latency = connect_latency
+        self.tool_script = [(re.compile(entry['match'], re.IGNORECASE), entry.get('tools', [])) for entry in tool_script or []]
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.prefix_cache = prefix_cache
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+
+
+def _message_text(message):
+    content = message.get('content') or ''
+    if isinstance(content, list):
+        return ' '.join(block.get('text', '') for block in content if isinstance(block, dict))
+    return str(content)
+
+
+def _pick_tool(tools, prompt):
+    """Choose the tool whose name/description shares most words with the prompt"""
+    words = set(re.findall(r'[a-z]+', prompt.lower()))
+    best, best_score = tools[0], -1
+    for tool in tools:
+        function = tool.get('function', {})
+        text = f"{function.get('name', '')} {function.get('description', '')}".lower()
+        score = len(words & set(re.findall(r'[a-z]+', text)))
+        if score > best_score:
+            best, best_score = tool, score
+    return best['function']
+
+
+def _tool_arguments(function, prompt):
+    schema = function.get('parameters') or {}
+    required = schema.get('required') or list((schema.get('properties') or {}).keys())
+    return {name: prompt for name in required[:1]}
+
+
+def _scripted_tools(config, tools, prompt, called):
+    """Next tools a matching script entry calls: functions, [] to answer, or None without a match
+
+    A step in the script is a tool name, or a list of names called together in one turn.
+    """
+    for pattern, steps in config.tool_script:
+        if pattern.search(prompt):
+            offered = {tool.get('function', {}).get('name'): tool['function'] for tool in tools}
+            for step in steps:
+                functions = [offered[name] for name in ([step] if isinstance(step, str) else step)
+                             if name in offered and name not in called]
+                if functions:
+                    return functions
+            return []
+    return None
+
+
+def _tool_call(function, prompt):
+    return {
+        'id': f'call_{uuid.uuid4().hex[:12]}',
+        'name': function['name'],
+        'arguments': json.dumps(_tool_arguments(function, prompt)),
+    }
+
+
+def plan_completion(request, config):
+    """Decide what the fake model answers: (text, tool calls or [])"""
+    messages = request.get('messages') or []
+    tools = request.get('tools') or []
+    last = messages[-1] if messages else {}
+    prompt, called = '', set()
+    for message in reversed(messages):
+        if message.get('role') == 'user':
+            prompt = _message_text(message)
+            break
+        for tool_call in message.get('tool_calls') or []:
+            called.add(tool_call.get('function', {}).get('name'))
+
+    if tools:
+        functions = _scripted_tools(config, tools, prompt, called)
+        if functions:
+            return '', [_tool_call(function, prompt) for function in functions]
+        if functions is None and last.get('role') == 'user':
+            return '', [_tool_call(_pick_tool(tools, prompt), prompt)]
+
+    words = (f"Fake answer about {prompt[:60]}".split() + ['lorem'] * config.response_words)
+    return ' '.join(words[:config.response_words]), []
+
+
+def _usage(request, text):
+    prompt_tokens = sum(len(_message_text(m)) for m in request.get('messages') or []) // 4 + 1
+    completion_tokens = max(1, len(text) // 4)
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+    }
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = FakeLLMConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        # Handshake on the handler thread so slow handshakes don't serialize accepts
+        if hasattr(self.request, 'do_handshake'):
+            self.request.do_handshake()
+        with self.server.stats_lock:
+            self.server.connections += 1
+        if self.config.connect_latency:
+            time.sleep(self.config.connect_latency)
+        super().setup()
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/stats'):
+            return self._send_json(self.server.stats())
+        if self.path.rstrip('/').endswith('/models'):
+            return self._send_json({'object': 'list', 'data': [{'id': 'fake-model', 'object': 'model'}]})
+        self._send_json({'error': {'message': 'not found'}}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            return self._send_json({'error': {'message': 'not found'}}, status=404)
+
+        text, tool_calls = plan_completion(request, self.config)
+        usage = self.usage = _usage(request, text)
+        uncached = usage['prompt_tokens']
+        if self.config.prefix_cache:
+            cached = self.server.cached_prefix_tokens(request, usage['prompt_tokens'])
+            usage['prompt_tokens_details'] = {'cached_tokens': cached}
+            uncached -= cached
+        retry_after, self.rate_limit_headers = self.server.spend(usage['total_tokens'])
+        if retry_after is not None:
+            return self._send_json(
+                {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_exceeded'}},
+                status=429, headers={'Retry-After': str(max(1, int(retry_after + 0.999)))}
+            )
+
+        time.sleep(self.config.latency)
+        if self.config.prefill_tokens_per_second:
+            time.sleep(uncached / self.config.prefill_tokens_per_second)
+        if self.server.is_slow():
+            time.sleep(self.config.slow_latency)
+        if self.server.should_fail():
+            return self._send_error()
+        self.server.record(usage)
+
+        if request.get('stream'):
+            self._stream(request, text, tool_calls)
+        else:
+            self._complete(request, text, tool_calls)
+
+    def _send_error(self):
+        status = self.config.error_status
+        headers = {'Retry-After': '1'} if status == 429 else {}
+        self._send_json({'error': {
+            'message': f'Injected error ({status})',
+            'type': 'rate_limit_exceeded' if status == 429 else 'server_error',
+        }}, status=status, headers=headers)
+
+    def _complete(self, request, text, tool_calls):
+        self._sleep_for_tokens(text)
+        message = {'role': 'assistant', 'content': text or None}
+        if tool_calls:
+            message['tool_calls'] = [{
+                'id': tool_call['id'],
+                'type': 'function',
+                'function': {'name': tool_call['name'], 'arguments': tool_call['arguments']},
+            } for tool_call in tool_calls]
+        self._send_json({
+            'id': f'chatcmpl-{uuid.uuid4().hex[:12]}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'fake-model'),
+            'choices': [{
+                'index': 0,
+                'message': message,
+                'finish_reason': 'tool_calls' if tool_calls else 'stop',
+            }],
+            'usage': self.usage,
+            'service_tier': 'on_demand',
+        })
+
+    def _stream(self, request, text, tool_calls):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        for name, value in self.rate_limit_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        completion_id = f'chatcmpl-{uuid.uuid4().hex[:12]}'
+
+        def chunk(delta, finish_reason=None, usage=None):
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': request.get('model', 'fake-model'),
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            if usage is not None:
+                payload['choices'] = []
+                payload['usage'] = usage
+            self._write_chunk(f"data: {json.dumps(payload)}\n\n")
+
+        chunk({'role': 'assistant', 'content': ''})
+        if tool_calls:
+            for index, tool_call in enumerate(tool_calls):
+                chunk({'tool_calls': [{
+                    'index': index,
+                    'id': tool_call['id'],
+                    'type': 'function',
+                    'function': {'name': tool_call['name'], 'arguments': tool_call['arguments']},
+                }]})
+            chunk({}, finish_reason='tool_calls')
+        else:
+            delay = 1.0 / self.config.tokens_per_second if self.config.tokens_per_second else 0
+            for word in text.split(' '):
+                chunk({'content': word + ' '})
+                if delay:
+                    time.sleep(delay)
+            chunk({}, finish_reason='stop')
+
+        if (request.get('stream_options') or {}).get('include_usage'):
+            chunk(None, usage=self.usage)
+        self._write_chunk('data: [DONE]\n\n')
+        self._write_chunk('')
+
+    def _sleep_for_tokens(self, text):
+        if self.config.tokens_per_second and text:
+            time.sleep(len(text.split(' ')) / self.config.tokens_per_second)
+
+    def _write_chunk(self, data):
+        body = data.encode('utf-8')
+        self.wfile.write(f"{len(body):x}\r\n".encode('ascii') + body + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in {**getattr(self, 'rate_limit_headers', {}), **(headers or {})}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Threaded server that keeps request, error, token and connection counts"""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, config):
+        super().__init__(address, handler)
+        self.config = config
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.stats_lock = threading.Lock()
+        self.rate_limited = 0
+        self.cached_prompt_tokens = 0
+        self.slow = 0
+        self._prefixes = OrderedDict()
+        self._random = random.Random(config.seed)
+        # Token buckets refilled per minute: {kind: [limit, level, updated]}
+        self._budgets = {
+            kind: [limit, float(limit), time.monotonic()]
+            for kind, limit in (('requests', config.rpm_limit), ('tokens', config.tpm_limit)) if limit
+        }
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-stream (cancelled calls) are expected, not errors
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def spend(self, tokens):
+        """Charge a completion to the budgets: (retry_after or None, rate-limit headers)"""
+        costs = {'requests': 1, 'tokens': tokens}
+        now = time.monotonic()
+        with self.stats_lock:
+            for budget in self._budgets.values():
+                limit, level, updated = budget
+                budget[1], budget[2] = min(limit, level + (now - updated) * limit / 60.0), now
+            short = [(costs[kind] - level) * 60.0 / limit
+                     for kind, (limit, level, _) in self._budgets.items() if level < min(costs[kind], limit)]
+            if short:
+                self.rate_limited += 1
+            else:
+                for kind, budget in self._budgets.items():
+                    budget[1] -= min(costs[kind], budget[0])
+            headers = {}
+            for kind, (limit, level, _) in self._budgets.items():
+                headers[f'x-ratelimit-limit-{kind}'] = str(limit)
+                headers[f'x-ratelimit-remaining-{kind}'] = str(max(0, int(level)))
+                headers[f'x-ratelimit-reset-{kind}'] = f'{max(0.0, (limit - level) * 60.0 / limit):.2f}s'
+            return (max(short) if short else None), headers
+
+    def cached_prefix_tokens(self, request, prompt_tokens):
+        """Share of prompt_tokens whose leading bytes an earlier request already sent"""
+        digest = hashlib.sha256(json.dumps([request.get('model'), request.get('tools') or []]).encode('utf-8'))
+        sizes, prefixes = [], []
+        for message in request.get('messages') or []:
+            chunk = json.dumps(message).encode('utf-8')
+            digest.update(chunk)
+            sizes.append(len(chunk))
+            prefixes.append(digest.hexdigest())
+        with self.stats_lock:
+            matched = max((i + 1 for i, prefix in enumerate(prefixes) if prefix in self._prefixes), default=0)
+            for prefix in prefixes:
+                self._prefixes[prefix] = True
+                self._prefixes.move_to_end(prefix)
+            while len(self._prefixes) > 100000:
+                self._prefixes.popitem(last=False)
+            cached = prompt_tokens * sum(sizes[:matched]) // max(1, sum(sizes))
+            self.cached_prompt_tokens += cached
+        return cached
+
+    def is_slow(self):
+        with self.stats_lock:
+            slow = self.config.slow_rate > 0 and self._random.random() < self.config.slow_rate
+            self.slow += slow
+            return slow
+
+    def should_fail(self):
+        with self.stats_lock:
+            self.requests += 1
+            failed = self.config.error_rate > 0 and self._random.random() < self.config.error_rate
+            self.errors += failed
+            return failed
+
+    def record(self, usage):
+        with self.stats_lock:
+            self.prompt_tokens += usage['prompt_tokens']
+            self.completion_tokens += usage['completion_tokens']
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'connections': self.connections,
+                'rate_limited': self.rate_limited,
+                'cached_prompt_tokens': self.cached_prompt_tokens,
+                'slow': self.slow,
+            }
+
+
+def start_fake_llm_server(host='127.0.0.1', port=0, config=None, ssl_context=None):
+    """Start the fake server on a daemon thread and return (server, base_url)
+
+    server.connections counts the TCP connections accepted so far;
+    server.stats() has the full counters.
+    """
+    config = config or FakeLLMConfig()
+    handler = type('ConfiguredFakeLLMHandler', (FakeLLMHandler,), {'config': config})
+    server = FakeLLMServer((host, port), handler, config)
+    if ssl_context is not None:
+        server.socket = ssl_context.wrap_socket(server.socket, server_side=True, do_handshake_on_connect=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    scheme = 'https' if ssl_context is not None else 'http'
+    return server, f"{scheme}://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake OpenAI-compatible LLM server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds before the first byte')
+    parser.add_argument('--tokens-per-second', type=float, default=500.0)
+    parser.add_argument('--connect-latency', type=float, default=0.0, help='Extra seconds per new connection')
+    parser.add_argument('--response-words', type=int, default=40, help='Words in each plain-text answer')
+    parser.add_argument('--tool-script', help='JSON file with [{"match": regex, "tools": [names]}]')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of completions that fail')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected failures')
+    parser.add_argument('--seed', type=int, help='Seed for error injection')
+    parser.add_argument('--rpm-limit', type=int, default=0, help='Requests per minute before 429s (0 = unlimited)')
+    parser.add_argument('--tpm-limit', type=int, default=0, help='Tokens per minute before 429s (0 = unlimited)')
+    parser.add_argument('--prefix-cache', action='store_true', help='Report repeated request prefixes as cached tokens')
+    parser.add_argument('--prefill-tokens-per-second', type=float, default=0.0,
+                        help='Prompt processing speed for uncached tokens (0 = free)')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Fraction of completions that stall')
+    parser.add_argument('--slow-latency', type=float, default=5.0, help='Extra seconds a stalled completion waits')
+    parser.add_argument('--certfile', help='Serve HTTPS with this PEM certificate (and --keyfile)')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args()
+
+    ssl_context = None
+    if args.certfile:
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(args.certfile, args.keyfile)
+
+    tool_script = None
+    if args.tool_script:
+        with open(args.tool_script) as f:
+            tool_script = json.load(f)
+
+    server, base_url = start_fake_llm_server(
+        args.host, args.port,
+        FakeLLMConfig(
+            args.latency, args.tokens_per_second, args.response_words,
+            connect_latency=args.connect_latency, tool_script=tool_script,
+            error_rate=args.error_rate, error_status=args.error_status, seed=args.seed,
+            rpm_limit=args.rpm_limit, tpm_limit=args.tpm_limit,
+            prefix_cache=args.prefix_cache, prefill_tokens_per_second=args.prefill_tokens_per_second,
+            slow_rate=args.slow_rate, slow_latency=args.slow_latency
+        ),
+        ssl_context=ssl_context
+    )
+    print(f"🧪 Fake LLM server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Local Redis-compatible stand-in for the session store and response cache
+
+Speaks RESP2/RESP3 over TCP and implements the commands the app uses (HELLO, GET, SET
+with EX/PX/NX, SETEX, DEL, EXISTS, EXPIRE, PEXPIRE, TTL, PING, SELECT,
+FLUSHDB, DBSIZE), with key expiry, so SESSION_BACKEND=redis and
+RESPONSE_CACHE_BACKEND=redis can be exercised - including several
+workers sharing one store - without a real Redis:
+
+    python fake_redis_server.py --port 6380
+    REDIS_URL=redis://127.0.0.1:6380/0 SESSION_BACKEND=redis gunicorn ...
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP server holding one keyspace: key -> (value, expires_at or None)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler):
+        super().__init__(server_address, handler)
+        self.data = {}
+        self.lock = threading.Lock()
+        self.commands = 0
+
+    def lookup(self, key):
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+
+class _Error(Exception):
+    pass
+
+
+def _encode(value, protocol=2):
+    if isinstance(value, _Error):
+        return f'-{value}\r\n'.encode()
+    if value is None:
+        return b'_\r\n' if protocol == 3 else b'$-1\r\n'
+    if isinstance(value, bool):
+        return b':1\r\n' if value else b':0\r\n'
+    if isinstance(value, int):
+        return f':{value}\r\n'.encode()
+    if isinstance(value, str):
+        return f'+{value}\r\n'.encode()
+    if isinstance(value, dict):
+        if protocol == 3:
+            return b'%%%d\r\n' % len(value) + b''.join(_encode(k) + _encode(v, protocol) for k, v in value.items())
+        value = [item for pair in value.items() for item in pair]
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(_encode(item, protocol) for item in value)
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    protocol = 2  # switched by HELLO; RESP3 differs from RESP2 only in nulls and maps here
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()  # inline command, e.g. from telnet / redis-cli
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            try:
+                args = self.read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            if not args:
+                continue
+            try:
+                reply = self.execute(args[0].decode().upper(), args[1:])
+            except _Error as e:
+                reply = e
+            except (ValueError, IndexError):
+                reply = _Error('ERR syntax error')
+            self.wfile.write(_encode(reply, self.protocol))
+
+    def execute(self, command, args):
+        server = self.server
+        with server.lock:
+            server.commands += 1
+            now = time.monotonic()
+            if command == 'PING':
+                return args[0] if args else 'PONG'
+            if command == 'HELLO':
+                if args:
+                    if args[0] not in (b'2', b'3'):
+                        raise _Error('NOPROTO unsupported protocol version')
+                    self.protocol = int(args[0])
+                return {b'server': b'redis', b'version': b'7.0.0', b'proto': self.protocol, b'mode': b'standalone'}
+            if command in ('SELECT', 'CLIENT'):
+                return 'OK'
+            if command == 'GET':
+                item = server.lookup(args[0])
+                return item[0] if item else None
+            if command == 'SET':
+                key, value, expires_at = args[0], args[1], None
+                options = [arg.decode().upper() for arg in args[2:]]
+                if 'NX' in options and server.lookup(key) is not None:
+                    return None
+                if 'EX' in options:
+                    expires_at = now + float(options[options.index('EX') + 1])
+                elif 'PX' in options:
+                    expires_at = now + float(options[options.index('PX') + 1]) / 1000
+                server.data[key] = (value, expires_at)
+                return 'OK'
+            if command == 'SETEX':
+                server.data[args[0]] = (args[2], now + float(args[1]))
+                return 'OK'
+            if command in ('DEL', 'UNLINK'):
+                return sum(1 for key in args if server.lookup(key) is not None and server.data.pop(key))
+            if command == 'EXISTS':
+                return sum(1 for key in args if server.lookup(key) is not None)
+            if command in ('EXPIRE', 'PEXPIRE'):
+                item = server.lookup(args[0])
+                if item is None:
+                    return 0
+                seconds = float(args[1]) / (1000 if command == 'PEXPIRE' else 1)
+                server.data[args[0]] = (item[0], now + seconds)
+                return 1
+            if command == 'TTL':
+                item = server.lookup(args[0])
+                if item is None:
+                    return -2
+                return -1 if item[1] is None else max(0, round(item[1] - now))
+            if command == 'DBSIZE':
+                return len(server.data)
+            if command == 'FLUSHDB':
+                server.data.clear()
+                return 'OK'
+            raise _Error(f"ERR unknown command '{command}'")
+
+
+def start_fake_redis_server(host='127.0.0.1', port=0):
+    """Start the fake server on a daemon thread and return (server, redis_url)"""
+    server = FakeRedisServer((host, port), FakeRedisHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"redis://{host}:{server.server_address[1]}/0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Redis-compatible server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6380)
+    args = parser.parse_args()
+
+    server, url = start_fake_redis_server(args.host, args.port)
+    print(f"🧪 Fake Redis server listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
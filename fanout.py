@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Parallel fan-out for requests that span several specialists
+
+"Research blockchain and then plan a blockchain project" normally runs as
+one sequential coordinator tool loop. Here the request is split into
+clauses, each clause is assigned to a specialist with the router's rule
+scores, the specialists run concurrently and one synthesis call merges
+their answers, so latency tracks the slowest specialist instead of the sum.
+"""
+import re
+import asyncio
+from model_factory import run_sync
+from serialization import reply_text
+
+# Clause boundaries: sentence/semicolon breaks and joining conjunctions
+_CLAUSE_BREAK = re.compile(r'\s*(?:[;\n]+|[.!?]\s+|,?\s+(?:and\s+then|and\s+also|then|also|and|plus)\s+)\s*', re.IGNORECASE)
+
+
+class TaskDecomposer:
+    """Split a request into per-specialist sub-tasks using a router's rule scores
+
+    Args:
+        scorer: Object with scores(text) -> {agent: score}, e.g. a FastPathRouter
+        min_score: Minimum combined rule score each specialist needs to get a sub-task
+    """
+
+    def __init__(self, scorer, min_score=2.0):
+        self.scorer = scorer
+        self.min_score = min_score
+
+    def clauses(self, message):
+        # Code blocks belong to one developer request; never split inside them
+        if '```' in message:
+            return [message.strip()]
+        return [clause for clause in _CLAUSE_BREAK.split(message) if clause.strip()]
+
+    def decompose(self, message):
+        """Return [(agent, sub_task)] for two or more specialists, or [] to leave the request alone"""
+        subtasks, totals = [], {}
+        for clause in self.clauses(message):
+            scores = self.scorer.scores(clause)
+            agent, top = max(scores.items(), key=lambda item: item[1])
+            # Unscored or ambiguous clauses qualify the clause before them
+            if top <= 0 or list(scores.values()).count(top) > 1:
+                agent = subtasks[-1][0] if subtasks else None
+            if agent is None:
+                continue
+            totals[agent] = totals.get(agent, 0.0) + top
+            if subtasks and subtasks[-1][0] == agent:
+                subtasks[-1] = (agent, f'{subtasks[-1][1]} and {clause}')
+            else:
+                subtasks.append((agent, clause))
+
+        agents = {agent for agent, _ in subtasks}
+        if len(agents) < 2 or any(totals[agent] < self.min_score for agent in agents):
+            return []
+        # Merge repeat visits to a specialist so each one runs once
+        merged = {}
+        for agent, clause in subtasks:
+            merged[agent] = f'{merged[agent]}. {clause}' if agent in merged else clause
+        return list(merged.items())
+
+
+def synthesis_prompt(request, results):
+    """Prompt asking for one answer built from the specialists' replies"""
+    sections = '\n\n'.join(f'### {name}\n{text}' for name, text in results)
+    return f"Original request: {request}\n\nSpecialist results:\n\n{sections}\n\nCombine these into a single answer to the original request."
+
+
+class ParallelFanOut:
+    """Runs a request's sub-tasks on several specialists at once, then synthesizes
+
+    Quacks like a Strands agent (invoke_async / stream_async / __call__ /
+    cancel / messages / name) so the web handlers can treat it as one.
+
+    Args:
+        team: AgentTeam whose specialists and synthesis_agent are used
+        subtasks: [(team attribute of a specialist, sub-task prompt)]
+    """
+
+    def __init__(self, team, subtasks):
+        self.team = team
+        self.subtasks = subtasks
+        self.synthesizer = team.synthesis_agent
+        self.name = team.coordinator_agent.name
+
+    @property
+    def messages(self):
+        return self.synthesizer.messages
+
+    @property
+    def specialists(self):
+        return [getattr(self.team, agent) for agent, _ in self.subtasks]
+
+    def describe(self):
+        return [{'agent': getattr(self.team, agent).name, 'task': task} for agent, task in self.subtasks]
+
+    async def run_specialists(self):
+        """Invoke every specialist concurrently; a failed one is reported, not fatal"""
+        replies = await asyncio.gather(
+            *(getattr(self.team, agent).invoke_async(task) for agent, task in self.subtasks),
+            return_exceptions=True
+        )
+        return [
+            (specialist.name, f'(unavailable: {reply})' if isinstance(reply, Exception) else reply_text(reply))
+            for specialist, reply in zip(self.specialists, replies)
+        ]
+
+    async def invoke_async(self, prompt):
+        results = await self.run_specialists()
+        # Each synthesis is a standalone call; the conversation lives in the coordinator
+        self.synthesizer.messages.clear()
+        return await self.synthesizer.invoke_async(synthesis_prompt(prompt, results))
+
+    async def stream_async(self, prompt):
+        for agent, _ in self.subtasks:
+            yield {'current_tool_use': {'toolUseId': f'fanout-{agent}', 'name': self.team.tool_names.get(agent, agent)}}
+        results = await self.run_specialists()
+        self.synthesizer.messages.clear()
+        async for event in self.synthesizer.stream_async(synthesis_prompt(prompt, results)):
+            yield event
+
+    def __call__(self, prompt):
+        return run_sync(self.invoke_async(prompt))
+
+    def cancel(self):
+        for agent in self.specialists + [self.synthesizer]:
+            agent.cancel()
@@ -2,97 +2,22 @@
 """
 Final Working Strands Agent Team Demo with Groq LLM
 """
-import os
 from dotenv import load_dotenv
-from strands import Agent, tool
 
 load_dotenv()
 
 # Configure Groq model via LiteLLM
-from strands.models.litellm import LiteLLMModel
+from model_factory import create_groq_model
+from team import AgentTeam
 
-groq_model = LiteLLMModel(
-    model_id="groq/llama-3.1-8b-instant",
-    client_args={
-        "api_key": os.getenv("GROQ_API_KEY"),
-    },
-    params={
-        "temperature": 0.7,
-        "max_tokens": 300,
-    }
-)
+groq_model = create_groq_model(model_id="groq/llama-3.1-8b-instant", temperature=0.7, max_tokens=300)
 
-# Create tools
-@tool
-def research_topic(topic: str) -> str:
-    """Research a given topic and provide key insights.
-    
-    Args:
-        topic: The topic to research (e.g., "artificial intelligence", "blockchain")
-        
-    Returns:
-        Key insights about the topic including trends, applications, and future outlook
-    """
-    return f"Research on {topic}: This field is experiencing rapid growth with significant innovations. Key areas include recent technological advances, practical applications across industries, and promising future developments. Current trends show increasing adoption and integration into various sectors."
-
-@tool
-def plan_project(project_description: str) -> str:
-    """Create a structured plan for any project.
-    
-    Args:
-        project_description: Brief description of the project to plan
-        
-    Returns:
-        Step-by-step project plan with timeline and key milestones
-    """
-    return f"Project Plan for '{project_description}':\nPhase 1: Requirements & Research\nPhase 2: Design & Architecture\nPhase 3: Development & Implementation\nPhase 4: Testing & Quality Assurance\nPhase 5: Deployment & Launch\nPhase 6: Monitoring & Maintenance\n\nEach phase includes specific deliverables and success criteria."
-
-@tool
-def analyze_code(code_snippet: str) -> str:
-    """Analyze code for quality, best practices, and improvements.
-    
-    Args:
-        code_snippet: The code to analyze
-        
-    Returns:
-        Code analysis with suggestions for improvement
-    """
-    return f"Code Analysis:\n✓ Syntax appears correct\n✓ Follows basic structure\n💡 Suggestions: Add error handling, improve documentation, consider edge cases, add unit tests for reliability."
-
-# Create specialized agents
-research_agent = Agent(
-    model=groq_model,
-    system_prompt="You are a Research Analyst specializing in technology and business topics. Use the research_topic tool to provide comprehensive, well-structured insights on any subject.",
-    tools=[research_topic],
-    name="Research Analyst"
-)
-
-planning_agent = Agent(
-    model=groq_model,
-    system_prompt="You are a Project Planner with expertise in breaking down complex projects into manageable phases. Use the plan_project tool to create detailed, actionable project plans.",
-    tools=[plan_project],
-    name="Project Planner"
-)
-
-developer_agent = Agent(
-    model=groq_model,
-    system_prompt="You are a Senior Software Engineer focused on code quality and best practices. Use the analyze_code tool to provide thorough code reviews and improvement suggestions.",
-    tools=[analyze_code],
-    name="Senior Developer"
-)
-
-# Coordinator agent
-coordinator_agent = Agent(
-    model=groq_model,
-    system_prompt="""You are a Team Coordinator managing three specialists:
-    • Research Analyst - For research, analysis, and information gathering
-    • Project Planner - For project planning, task breakdown, and roadmapping  
-    • Senior Developer - For code analysis, review, and technical guidance
-    
-    Analyze each request and delegate to the most appropriate specialist. For research tasks, use Research Analyst. For planning tasks, use Project Planner. For code-related tasks, use Senior Developer.""",
-    tools=[research_agent, planning_agent, developer_agent],
-    name="Team Coordinator"
-)
+# The same team as the web app, as declared in team.toml
+team = AgentTeam(groq_model)
+research_agent = team.research_agent
+planning_agent = team.planning_agent
+developer_agent = team.developer_agent
+coordinator_agent = team.coordinator_agent
 
 def demo_agent_team():
     """Demonstrate the agent team capabilities"""
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Hedged LLM requests against slow upstream completions
+
+HedgedModel sits where an agent's model goes, like CascadeModel. Each call
+starts on the primary model. If no output has arrived by the hedge deadline
+(a percentile of recent time-to-first-output, clamped to a floor and a
+ceiling), a duplicate is sent to the hedge model, which is the same model or
+an alternate one. Whichever produces output first is streamed to the agent
+and the other is cancelled. A primary that fails while a hedge is running
+is also covered by the hedge.
+
+"First output" is the first event after the response starts: a text delta,
+or for a tool call the finished call, since LiteLLM only emits tool calls
+once they are complete.
+
+Every duplicate is extra upstream spend, so hedges are paid for from a
+HedgeBudget that earns max_extra hedges per call. With max_extra=0.05, at
+most about 5% of calls are duplicated over time. No hedge is sent while the
+rate-limit scheduler already has calls queued, because that slowness is
+ours and not the upstream's.
+
+HedgeStats reports the hedge rate and first-output percentiles with and
+without hedging. A cancelled primary's own first-output time is unknown,
+so the time it had already waited stands in for it. The "without hedging"
+figures are therefore lower bounds, and so is the improvement.
+"""
+import time
+import asyncio
+import threading
+from collections import deque
+from strands.models import Model
+
+_END = object()
+
+
+def percentile(samples, q):
+    """q-th percentile (0-100) of a list of numbers, nearest rank"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))]
+
+
+class LatencyWindow:
+    """The most recent latency samples"""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q):
+        return percentile(list(self._samples), q)
+
+
+class HedgeBudget:
+    """Caps duplicates at max_extra per call, with up to burst saved up
+
+    Args:
+        max_extra: Hedges earned per call (0.05: at most ~5% extra calls)
+        burst: Most unspent hedges carried over
+    """
+
+    def __init__(self, max_extra=0.05, burst=10.0):
+        self.max_extra = max_extra
+        self.burst = burst
+        self.credits = min(1.0, burst)
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self.credits = min(self.burst, self.credits + self.max_extra)
+
+    def spend(self):
+        """Take one hedge, or return False when the budget is used up"""
+        with self._lock:
+            if self.credits < 1.0:
+                return False
+            self.credits -= 1.0
+            return True
+
+
+class HedgeStats:
+    """Hedge counts and first-output latency with and without hedging
+
+    Args:
+        registry: Optional MetricsRegistry to export hedges and first-output times to
+        window: Calls kept for the percentiles
+    """
+
+    OUTCOMES = ('unhedged', 'primary_won', 'hedge_won', 'skipped_budget', 'skipped_busy')
+
+    def __init__(self, registry=None, window=1000):
+        self.registry = registry
+        self.counts = dict.fromkeys(self.OUTCOMES, 0)
+        self.rescued_errors = 0
+        self.actual = LatencyWindow(window)
+        self.unhedged = LatencyWindow(window)
+        self._lock = threading.Lock()
+
+    def record(self, outcome, seconds, unhedged_seconds, rescued=False):
+        """One call: how it went, its first-output time and the primary-only estimate"""
+        with self._lock:
+            self.counts[outcome] += 1
+            self.rescued_errors += rescued
+            self.actual.add(seconds)
+            self.unhedged.add(unhedged_seconds)
+        if self.registry is not None:
+            self.registry.model_hedges.inc(outcome=outcome)
+            self.registry.model_first_output_seconds.observe(seconds, series='actual')
+            self.registry.model_first_output_seconds.observe(unhedged_seconds, series='without_hedging')
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            actual = {q: self.actual.percentile(q) for q in (50, 95, 99)}
+            unhedged = {q: self.unhedged.percentile(q) for q in (50, 95, 99)}
+            rescued = self.rescued_errors
+        calls = sum(counts.values())
+        hedged = counts['primary_won'] + counts['hedge_won']
+        rounded = lambda value: round(value, 3) if value is not None else None
+        return {
+            'calls': calls,
+            **counts,
+            'hedged': hedged,
+            'hedge_rate': round(hedged / calls, 4) if calls else 0.0,
+            'hedge_win_rate': round(counts['hedge_won'] / hedged, 4) if hedged else 0.0,
+            'rescued_errors': rescued,
+            'first_output_s': {f'p{q}': rounded(value) for q, value in actual.items()},
+            'first_output_without_hedging_s': {f'p{q}': rounded(value) for q, value in unhedged.items()},
+            'p99_improvement_s': rounded(unhedged[99] - actual[99]) if calls else None,
+        }
+
+
+class _Attempt:
+    """One upstream call, consumed on its own task so it can be raced and cancelled"""
+
+    def __init__(self, model, args, kwargs):
+        self.started = time.perf_counter()
+        self.first_output = None
+        self.error = None
+        self.events = asyncio.Queue()
+        self.ready = asyncio.get_running_loop().create_future()
+        self.task = asyncio.ensure_future(self._run(model.stream(*args, **kwargs)))
+
+    async def _run(self, stream):
+        try:
+            async for event in stream:
+                self.events.put_nowait(event)
+                if not self.ready.done() and 'messageStart' not in event:
+                    self.first_output = time.perf_counter() - self.started
+                    self.ready.set_result(True)
+        except BaseException as e:
+            self.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.events.put_nowait(_END)
+            if not self.ready.done():
+                self.ready.set_result(self.error is None)
+
+    def waited(self):
+        return self.first_output if self.first_output is not None else time.perf_counter() - self.started
+
+    async def replay(self):
+        while True:
+            event = await self.events.get()
+            if event is _END:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield event
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class HedgedModel(Model):
+    """Model that duplicates calls whose first output is late and takes the faster one
+
+    Args:
+        primary: Model every call starts on
+        stats: Shared HedgeStats
+        budget: Shared HedgeBudget capping the extra calls
+        hedge: Model the duplicate goes to (defaults to primary)
+        quantile: Percentile of recent first-output times used as the hedge deadline
+        min_delay / max_delay: Bounds on the deadline, in seconds
+        initial_delay: Deadline used until min_samples calls have been seen
+        min_samples: Calls observed before the deadline adapts
+        scheduler: Optional RateLimitScheduler; no hedges while calls are queued in it
+    """
+
+    def __init__(self, primary, stats, budget, hedge=None, quantile=95, min_delay=0.2, max_delay=10.0,
+                 initial_delay=2.0, min_samples=20, scheduler=None):
+        self.primary = primary
+        self.hedge = hedge or primary
+        self.stats = stats
+        self.budget = budget
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.scheduler = scheduler
+        self.first_output = LatencyWindow()
+
+    def update_config(self, **model_config):
+        self.primary.update_config(**model_config)
+        if self.hedge is not self.primary:
+            self.hedge.update_config(**model_config)
+
+    def get_config(self):
+        return self.primary.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.primary.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    def deadline(self):
+        """Seconds to wait for the primary's first output before hedging"""
+        if len(self.first_output) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, self.first_output.percentile(self.quantile)))
+
+    def _busy(self):
+        return self.scheduler is not None and self.scheduler.estimated_wait() > 0
+
+    async def _race(self, attempts, args, kwargs):
+        """(winner, outcome, rescued) once some attempt has output or all have failed"""
+        primary = attempts[0]
+        try:
+            await asyncio.wait_for(asyncio.shield(primary.ready), self.deadline())
+        except asyncio.TimeoutError:
+            pass
+        if primary.ready.done():
+            return primary, 'unhedged', False
+        if self._busy():
+            return primary, 'skipped_busy', False
+        if not self.budget.spend():
+            return primary, 'skipped_budget', False
+
+        hedge = _Attempt(self.hedge, args, kwargs)
+        attempts.append(hedge)
+        while True:
+            await asyncio.wait([attempt.ready for attempt in attempts], return_when=asyncio.FIRST_COMPLETED)
+            done = [attempt for attempt in attempts if attempt.ready.done()]
+            winner = next((attempt for attempt in done if attempt.error is None), None)
+            if winner is None and len(done) < len(attempts):
+                continue
+            winner = winner or primary
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancel()
+            outcome = 'primary_won' if winner is primary else 'hedge_won'
+            return winner, outcome, winner is hedge and primary.error is not None
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.budget.earn()
+        args = (messages, tool_specs, system_prompt)
+        attempts = [_Attempt(self.primary, args, kwargs)]
+        primary = attempts[0]
+        try:
+            winner, outcome, rescued = await self._race(attempts, args, kwargs)
+            # A skipped hedge leaves the primary still waiting for its first output
+            await winner.ready
+            if winner.first_output is not None:
+                # The primary's wait (a lower bound when it lost) keeps the deadline honest
+                waited = primary.waited()
+                self.first_output.add(waited)
+                seconds = winner.started + winner.first_output - primary.started
+                self.stats.record(outcome, seconds, max(waited, seconds) if winner is not primary else waited, rescued)
+            async for event in winner.replay():
+                yield event
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
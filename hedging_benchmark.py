@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tail latency with and without hedged LLM requests
+
+Sends the same agent calls to the fake LLM server, a small share of which
+stall (--slow-rate, --slow-latency), once with the plain model and once
+through HedgedModel. Reports latency percentiles, the hedge rate and the
+extra upstream calls the hedges cost.
+
+    python hedging_benchmark.py --calls 400 --concurrency 8 --slow-rate 0.03
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+from hedging import percentile
+from load_test import server_env
+
+
+def run_mode(server, hedged, calls, concurrency, max_extra):
+    from strands import Agent
+    from hedging import HedgeBudget, HedgedModel, HedgeStats
+    from model_factory import create_groq_model, run_sync
+
+    model = create_groq_model(max_tokens=100)
+    stats = HedgeStats()
+    if hedged:
+        model = HedgedModel(model, stats, HedgeBudget(max_extra), initial_delay=0.5)
+
+    async def worker(count, latencies):
+        for i in range(count):
+            agent = Agent(model=model, callback_handler=None)
+            started = time.perf_counter()
+            await agent.invoke_async(f'Give me one tip about writing tests (#{i})')
+            latencies.append(time.perf_counter() - started)
+
+    async def run_all():
+        latencies = []
+        await asyncio.gather(*(worker(calls // concurrency, latencies) for _ in range(concurrency)))
+        return latencies
+
+    run_sync(worker(5, []))  # warm up imports and the connection pool
+    before = server.stats()
+    latencies = run_sync(run_all())
+    after = server.stats()
+    upstream = after['requests'] - before['requests']
+    report = stats.stats() if hedged else {}
+    return {
+        'mode': 'hedged' if hedged else 'plain',
+        'calls': len(latencies),
+        'upstream_calls': upstream,
+        'extra_calls': round(upstream / len(latencies) - 1, 4),
+        'stalled_upstream': after['slow'] - before['slow'],
+        'p50_s': round(statistics.median(latencies), 3),
+        'p95_s': round(percentile(latencies, 95), 3),
+        'p99_s': round(percentile(latencies, 99), 3),
+        'max_s': round(max(latencies), 3),
+        'hedge_rate': report.get('hedge_rate'),
+        'hedge_win_rate': report.get('hedge_win_rate'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM call latency percentiles with and without hedging')
+    parser.add_argument('--calls', type=int, default=400, help='Agent calls per mode')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.1, help='Fake LLM seconds before the first byte')
+    parser.add_argument('--slow-rate', type=float, default=0.03, help='Fraction of upstream calls that stall')
+    parser.add_argument('--slow-latency', type=float, default=3.0, help='Extra seconds a stalled call waits')
+    parser.add_argument('--max-extra', type=float, default=0.05, help='Hedge budget: extra calls per call')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    server, llm_base_url = start_fake_llm_server(config=FakeLLMConfig(
+        latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency, seed=7
+    ))
+    os.environ.update(server_env(llm_base_url))
+    results = [run_mode(server, hedged, args.calls, args.concurrency, args.max_extra) for hedged in (False, True)]
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<8}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'max s':>8}{'extra calls':>13}{'hedge rate':>12}")
+    for row in results:
+        hedge_rate = f"{row['hedge_rate']:.1%}" if row['hedge_rate'] is not None else '-'
+        print(f"{row['mode']:<8}{row['p50_s']:>8}{row['p95_s']:>8}{row['p99_s']:>8}{row['max_s']:>8}"
+              f"{row['extra_calls']:>13.1%}{hedge_rate:>12}")
+    plain, hedged = results
+    print(f"\np99 {hedged['p99_s'] - plain['p99_s']:+.3f}s ({hedged['p99_s'] / plain['p99_s'] - 1:+.1%}), "
+          f"hedges won {hedged['hedge_win_rate']:.0%} of races")
+
+
+if __name__ == '__main__':
+    main()
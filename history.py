@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted conversation history for long-lived agents
+
+The agents behind the web app keep their conversation for the life of the
+session, and every turn resends all of it. TokenBudgetConversationManager
+keeps what is resent under a token budget:
+
+  1. Bulky tool results older than the last few messages are replaced by a
+     short placeholder (the answer built from them is still in the history).
+  2. When the history is still over budget, the oldest turns are dropped at
+     a valid trim point and folded into a rolling summary, which is carried
+     at the start of the first remaining user message.
+  3. The summary is refined by the model on a background task; until that
+     finishes an extractive summary (first lines of each turn) stands in.
+
+With compact_to set, the history is left alone until it goes over budget
+and is then compacted well below it in one go, so between compactions every
+turn only appends and the resent prefix stays byte-identical for the
+provider's prompt cache (see prompt_prefix.py).
+
+Tokens are estimated at ~4 characters each, which is close enough for
+budgeting without a tokenizer dependency.
+"""
+import json
+import asyncio
+from strands import Agent
+from strands.agent.conversation_manager import ConversationManager
+from strands.agent.conversation_manager.compression.context_compression import find_valid_trim_point
+from strands.hooks import BeforeInvocationEvent, BeforeModelCallEvent
+from strands.types.exceptions import ContextWindowOverflowException
+
+CHARS_PER_TOKEN = 4
+SUMMARY_PREFIX = '[Summary of earlier conversation]\n'
+STRIPPED_SUFFIX = ' characters of tool output removed from history]'
+SUMMARY_PROMPT = "You maintain a running summary of a conversation between a user and an AI team. Merge the current summary with the new turns into one short factual summary (at most 120 words). Keep names, decisions, numbers and open questions; drop pleasantries."
+
+
+def estimate_tokens(value):
+    """Rough token count of a message, content block or list of them"""
+    if isinstance(value, str):
+        return len(value) // CHARS_PER_TOKEN + 1
+    return len(json.dumps(value, default=str, ensure_ascii=False)) // CHARS_PER_TOKEN + 1
+
+
+def _is_summary_block(block):
+    return isinstance(block.get('text'), str) and block['text'].startswith(SUMMARY_PREFIX)
+
+
+def _is_stripped(result):
+    content = result.get('content') or []
+    return len(content) == 1 and str(content[0].get('text', '')).endswith(STRIPPED_SUFFIX)
+
+
+def _message_text(message):
+    return ' '.join(block['text'] for block in message.get('content', []) if 'text' in block and not _is_summary_block(block))
+
+
+class TokenBudgetConversationManager(ConversationManager):
+    """Sliding window by token budget, with tool-output stripping and a rolling summary
+
+    Args:
+        max_tokens: Token budget for the history resent to the model
+        keep_tool_results: Number of most recent messages whose tool results are kept whole
+        tool_result_chars: Tool results longer than this are stripped once they are old
+        summary_model: Model used to refine the summary in the background (None keeps it extractive)
+        summary_max_tokens: Cap on the summary carried in the history
+        compact_to: Fraction of max_tokens to compact down to once over budget, leaving
+            the history untouched otherwise (None strips and trims on every turn)
+    """
+
+    def __init__(self, max_tokens=3000, keep_tool_results=4, tool_result_chars=200,
+                 summary_model=None, summary_max_tokens=200, compact_to=None):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.keep_tool_results = keep_tool_results
+        self.tool_result_chars = tool_result_chars
+        self.summary_model = summary_model
+        self.summary_max_tokens = summary_max_tokens
+        self.compact_to = compact_to
+        self.compactions = 0
+        self.removed_tokens = 0
+        self.tokens_saved = 0
+        self.stripped_tool_results = 0
+        self._model_summary = ''
+        self._in_flight = []
+        self._pending = []
+        self._task = None
+
+    @property
+    def summary(self):
+        """Model summary plus extractive notes for turns it has not absorbed yet"""
+        notes = ' '.join(self._in_flight + self._pending)
+        text = f'{self._model_summary} {notes}'.strip()
+        limit = self.summary_max_tokens * CHARS_PER_TOKEN
+        return text if len(text) <= limit else '…' + text[-limit:]
+
+    def register_hooks(self, registry, **kwargs):
+        super().register_hooks(registry, **kwargs)
+        registry.add_callback(BeforeInvocationEvent, self._on_before_invocation)
+        registry.add_callback(BeforeModelCallEvent, self._on_before_model_call)
+
+    def _on_before_invocation(self, event):
+        # Pick up a summary the background task finished since the last turn
+        # (prefix-stable histories wait for the next compaction instead)
+        if self.compact_to is None:
+            self._place_summary(event.agent.messages)
+
+    def _on_before_model_call(self, event):
+        self.tokens_saved += self.tokens_saved_per_call()
+
+    def tokens_saved_per_call(self):
+        """Estimated input tokens each model call no longer sends"""
+        summary_tokens = estimate_tokens(SUMMARY_PREFIX + self.summary) if self.summary else 0
+        return max(0, self.removed_tokens - summary_tokens)
+
+    def apply_management(self, agent, **kwargs):
+        messages = agent.messages
+        if self.compact_to is not None:
+            if estimate_tokens(messages) <= self.max_tokens:
+                return
+            self.compactions += 1
+            self._strip_tool_results(messages)
+            target = int(self.max_tokens * self.compact_to)
+            if estimate_tokens(messages) > target:
+                self.reduce_context(agent, target_tokens=target)
+            return
+        self._strip_tool_results(messages)
+        if estimate_tokens(messages) > self.max_tokens:
+            self.reduce_context(agent)
+
+    def reduce_context(self, agent, e=None, target_tokens=None, **kwargs):
+        messages = agent.messages
+        # Drop whole turns from the front until the rest fits the budget
+        sizes = [estimate_tokens(message) for message in messages]
+        budget = (target_tokens or self.max_tokens) - self.summary_max_tokens
+        start, remaining = 0, sum(sizes)
+        while start < len(messages) - 1 and remaining > budget:
+            remaining -= sizes[start]
+            start += 1
+        if e is not None:
+            start = max(start, 2)
+        # Prefer the latest valid trim point at or before the cut, so the
+        # current turn survives even when it alone is over budget
+        trim_index = next((i for i in range(start, 0, -1) if find_valid_trim_point(messages, i) == i), 0)
+        if trim_index == 0 and start:
+            trim_index = find_valid_trim_point(messages, start)
+        if trim_index == 0 or trim_index >= len(messages):
+            if e is not None:
+                raise ContextWindowOverflowException('Unable to trim conversation context!') from e
+            return
+
+        evicted = messages[:trim_index]
+        del messages[:trim_index]
+        self.removed_message_count += len(evicted)
+        self.removed_tokens += sum(
+            estimate_tokens([block for block in message.get('content', []) if not _is_summary_block(block)])
+            for message in evicted
+        )
+        self._summarize_later(evicted)
+        self._place_summary(messages)
+
+    def _strip_tool_results(self, messages):
+        for message in messages[:max(0, len(messages) - self.keep_tool_results)]:
+            for block in message.get('content', []):
+                result = block.get('toolResult')
+                if not result or _is_stripped(result):
+                    continue
+                size = len(json.dumps(result.get('content', []), default=str, ensure_ascii=False))
+                if size <= self.tool_result_chars:
+                    continue
+                placeholder = [{'text': f'[{size}{STRIPPED_SUFFIX}'}]
+                self.removed_tokens += estimate_tokens(result.get('content', [])) - estimate_tokens(placeholder)
+                result['content'] = placeholder
+                self.stripped_tool_results += 1
+
+    def _place_summary(self, messages):
+        """Carry the summary at the front of the first message, and nowhere else"""
+        for message in messages:
+            message['content'] = [block for block in message.get('content', []) if not _is_summary_block(block)]
+        if self.summary and messages and messages[0].get('role') == 'user':
+            messages[0]['content'].insert(0, {'text': SUMMARY_PREFIX + self.summary})
+
+    def _summarize_later(self, evicted):
+        notes = []
+        for message in evicted:
+            text = _message_text(message).strip()
+            if text:
+                notes.append(f"{message['role'].capitalize()}: {text[:160]}")
+        if not notes:
+            return
+        self._pending.append(' | '.join(notes))
+        if self.summary_model is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._summarize())
+
+    async def _summarize(self):
+        while self._pending:
+            self._in_flight, self._pending = self._pending, []
+            summarizer = Agent(model=self.summary_model, system_prompt=SUMMARY_PROMPT, callback_handler=None)
+            try:
+                result = await summarizer.invoke_async(
+                    f"Current summary:\n{self._model_summary or '(none)'}\n\nNew turns:\n" + '\n'.join(self._in_flight)
+                )
+            except Exception:
+                # Keep the extractive notes; the next eviction retries with them
+                self._pending = self._in_flight + self._pending
+                self._in_flight = []
+                return
+            self._model_summary = str(result).strip()
+            self._in_flight = []
+
+    def stats(self):
+        return {
+            'max_tokens': self.max_tokens,
+            'compactions': self.compactions,
+            'removed_messages': self.removed_message_count,
+            'stripped_tool_results': self.stripped_tool_results,
+            'summary_tokens': estimate_tokens(self.summary) if self.summary else 0,
+            'tokens_saved_per_call': self.tokens_saved_per_call(),
+            'tokens_saved': self.tokens_saved,
+        }
+
+    def get_state(self):
+        state = super().get_state()
+        state.update({
+            'summary': self.summary,
+            'removed_tokens': self.removed_tokens,
+            'tokens_saved': self.tokens_saved,
+            'stripped_tool_results': self.stripped_tool_results,
+            'compactions': self.compactions,
+        })
+        return state
+
+    def restore_from_session(self, state):
+        super().restore_from_session(state)
+        self._model_summary = state.get('summary', '')
+        self.removed_tokens = state.get('removed_tokens', 0)
+        self.tokens_saved = state.get('tokens_saved', 0)
+        self.stripped_tool_results = state.get('stripped_tool_results', 0)
+        self.compactions = state.get('compactions', 0)
+        return None
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Concurrency load test: synchronous gunicorn (app.py) vs. ASGI (asgi.py)
+
+Starts the fake LLM server and the web app as subprocesses, then drives
+/api/chat with N concurrent users (each with its own session) and reports
+throughput and p50/p99 latency per concurrency level.
+
+    python load_test.py --mode both --concurrency 1 8 32 128
+"""
+import os
+import sys
+import time
+import json
+import socket
+import asyncio
+import argparse
+import subprocess
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SERVER_COMMANDS = {
+    'wsgi': ['gunicorn', '--bind', '127.0.0.1:{port}', '--workers', '1', '--threads', '8', '--timeout', '300', 'app:app'],
+    'asgi': ['uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def wait_for(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server at {url} did not become healthy")
+
+
+def start_process(command, env):
+    return subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def server_env(llm_base_url):
+    env = dict(os.environ)
+    env.update({
+        'GROQ_API_KEY': env.get('GROQ_API_KEY') or 'fake-key',
+        'GROQ_API_BASE': llm_base_url,
+        'LITELLM_LOCAL_MODEL_COST_MAP': 'True',
+        'HF_HUB_OFFLINE': '1',
+        'AGENT_POOL_MAX_SESSIONS': '10000',
+    })
+    return env
+
+
+async def run_user(base_url, requests_per_user, latencies, errors):
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        for i in range(requests_per_user):
+            started = time.perf_counter()
+            try:
+                response = await client.post('/api/chat', json={'message': f'Research AI trends #{i}'})
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors.append(response.status_code)
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+
+
+async def run_level(base_url, concurrency, requests_per_user):
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(base_url, requests_per_user, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'p50_s': round(percentile(latencies, 50) or 0, 3),
+        'p99_s': round(percentile(latencies, 99) or 0, 3),
+    }
+
+
+def run_mode(mode, llm_base_url, levels, requests_per_user):
+    port = free_port()
+    command = [part.format(port=port) for part in SERVER_COMMANDS[mode]]
+    server = start_process(command, server_env(llm_base_url))
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(f"{base_url}/health")
+        # Warm up imports and the connection pool before measuring
+        asyncio.run(run_level(base_url, 1, 1))
+        return [dict(mode=mode, **asyncio.run(run_level(base_url, level, requests_per_user))) for level in levels]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrency vs. latency load test against a fake LLM')
+    parser.add_argument('--mode', choices=['wsgi', 'asgi', 'both'], default='both')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--requests-per-user', type=int, default=2)
+    parser.add_argument('--llm-latency', type=float, default=0.25, help='Fake LLM seconds per model call')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    llm_server = start_process(
+        [sys.executable, 'fake_llm_server.py', '--port', str(llm_port), '--latency', str(args.llm_latency)],
+        dict(os.environ)
+    )
+    modes = ['wsgi', 'asgi'] if args.mode == 'both' else [args.mode]
+    try:
+        wait_for(f"http://127.0.0.1:{llm_port}/v1/models")
+        results = []
+        for mode in modes:
+            results.extend(run_mode(mode, f"http://127.0.0.1:{llm_port}/v1", args.concurrency, args.requests_per_user))
+    finally:
+        llm_server.terminate()
+        llm_server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<6}{'users':>7}{'ok':>6}{'err':>5}{'req/s':>9}{'p50 s':>9}{'p99 s':>9}")
+    for row in results:
+        print(f"{row['mode']:<6}{row['concurrency']:>7}{row['requests']:>6}{row['errors']:>5}"
+              f"{row['throughput_rps']:>9}{row['p50_s']:>9}{row['p99_s']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Request tracing and Prometheus metrics for the agent web app
+
+Each request gets a RequestTrace. The web handlers time their own stages
+(queueing, cache lookup, waiting for the session, routing, the agent run,
+serialization) and AgentMetricsHooks, registered on every agent of a team,
+adds a span per model call (with token counts) and per tool call. Finished
+traces feed the counters and histograms rendered on /metrics in the
+Prometheus text format.
+
+With METRICS_ENABLED=false start_trace() hands out a no-op trace and teams
+are built without the hooks, so the hot path only pays an attribute lookup.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                     for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_label_text(self.labels, key)} {value}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{self.name}_bucket{_label_text(self.labels + ("le",), key + (le,))} {cumulative}')
+                lines.append(f'{self.name}_sum{_label_text(self.labels, key)} {total}')
+                lines.append(f'{self.name}_count{_label_text(self.labels, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """The app's metrics, rendered together for /metrics"""
+
+    def __init__(self):
+        self.requests = Counter('agent_requests_total', 'HTTP requests handled', ('endpoint', 'status'))
+        self.request_seconds = Histogram('agent_request_duration_seconds', 'End-to-end request latency', ('endpoint',))
+        self.stage_seconds = Histogram('agent_stage_duration_seconds', 'Time spent per request stage', ('stage',))
+        self.model_calls = Counter('agent_model_calls_total', 'LLM calls made by agents', ('agent', 'outcome'))
+        self.model_seconds = Histogram('agent_model_call_duration_seconds', 'LLM call latency', ('agent',))
+        self.model_tokens = Counter('agent_model_tokens_total', 'LLM tokens used', ('agent', 'direction'))
+        self.tool_calls = Counter('agent_tool_calls_total', 'Tool calls made by agents', ('tool', 'status'))
+        self.tool_seconds = Histogram('agent_tool_call_duration_seconds', 'Tool call latency', ('tool',))
+        # Filled in by hedging.HedgeStats when HEDGED_REQUESTS is on
+        self.model_hedges = Counter('agent_model_hedge_calls_total', 'LLM calls by hedging outcome', ('outcome',))
+        self.model_first_output_seconds = Histogram(
+            'agent_model_first_output_seconds', 'Time to first LLM output, actual and estimated without hedging', ('series',))
+        self._metrics = [
+            self.requests, self.request_seconds, self.stage_seconds, self.model_calls,
+            self.model_seconds, self.model_tokens, self.tool_calls, self.tool_seconds,
+            self.model_hedges, self.model_first_output_seconds,
+        ]
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class RequestTrace:
+    """Spans recorded while serving one request"""
+
+    enabled = True
+
+    def __init__(self, registry, endpoint, queued_seconds=None):
+        self.registry = registry
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.spans = []
+        if queued_seconds is not None:
+            self.add('queue', self.started - queued_seconds, queued_seconds)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, started, time.perf_counter() - started, **attributes)
+
+    def add(self, name, started, duration, **attributes):
+        self.spans.append((name, started, duration, attributes))
+
+    def breakdown(self):
+        """Per-span timings relative to the start of the request, in milliseconds"""
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'spans': [
+                dict(name=name, start_ms=round((started - self.started) * 1000, 1), duration_ms=round(duration * 1000, 1), **attributes)
+                for name, started, duration, attributes in self.spans
+            ],
+        }
+
+    def finish(self, status):
+        """Record the request and its stage spans in the registry"""
+        registry = self.registry
+        registry.requests.inc(endpoint=self.endpoint, status=status)
+        registry.request_seconds.observe(time.perf_counter() - self.started, endpoint=self.endpoint)
+        for name, _, duration, _ in self.spans:
+            if name not in ('model', 'tool'):
+                registry.stage_seconds.observe(duration, stage=name)
+
+
+class NullTrace:
+    """Stand-in when metrics are disabled"""
+
+    enabled = False
+    spans = ()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        yield
+
+    def add(self, name, started, duration, **attributes):
+        pass
+
+    def breakdown(self):
+        return {}
+
+    def finish(self, status):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class AgentMetricsHooks:
+    """Times model and tool calls for whatever trace the team is serving
+
+    A strands HookProvider (a structural protocol, so strands is only
+    imported once hooks are registered). One instance is shared by all
+    agents of a team; requests hold the team's lock, so there is at most
+    one trace at a time.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.trace = NULL_TRACE
+        self._model_started = {}
+
+    def register_hooks(self, registry, **kwargs):
+        from strands.hooks import AfterModelCallEvent, AfterToolCallEvent, BeforeModelCallEvent
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+        registry.add_callback(AfterToolCallEvent, self._after_tool_call)
+
+    def _before_model_call(self, event):
+        self._model_started[id(event.agent)] = time.perf_counter()
+
+    def _after_model_call(self, event):
+        started = self._model_started.pop(id(event.agent), None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        agent = event.agent.name
+        usage = {}
+        if event.stop_response is not None:
+            usage = (event.stop_response.message.get('metadata') or {}).get('usage') or {}
+        input_tokens, output_tokens = usage.get('inputTokens', 0), usage.get('outputTokens', 0)
+        cached_tokens = usage.get('cacheReadInputTokens', 0)
+
+        self.registry.model_calls.inc(agent=agent, outcome='error' if event.exception else 'ok')
+        self.registry.model_seconds.observe(duration, agent=agent)
+        self.registry.model_tokens.inc(input_tokens, agent=agent, direction='input')
+        self.registry.model_tokens.inc(output_tokens, agent=agent, direction='output')
+        # Input tokens served from the provider's prompt cache (a subset of input)
+        self.registry.model_tokens.inc(cached_tokens, agent=agent, direction='cached')
+        self.trace.add('model', started, duration, agent=agent, input_tokens=input_tokens,
+                       cached_tokens=cached_tokens, output_tokens=output_tokens)
+
+    def _after_tool_call(self, event):
+        duration = event.duration or 0.0
+        tool = event.tool_use.get('name', 'unknown')
+        status = 'error' if event.exception else (event.result or {}).get('status', 'success')
+        self.registry.tool_calls.inc(tool=tool, status=status)
+        self.registry.tool_seconds.observe(duration, tool=tool)
+        self.trace.add('tool', time.perf_counter() - duration, duration, agent=event.agent.name, tool=tool)
+
+
+def bind_trace(team, trace):
+    """Point a team's metrics hooks at the trace of the request it is serving"""
+    for hook in getattr(team, 'hooks', ()):
+        if isinstance(hook, AgentMetricsHooks):
+            hook.trace = trace
+
+
+def queued_seconds(header_value):
+    """Seconds since a proxy's X-Request-Start header ('t=<epoch µs|ms|s>'), if present"""
+    if not header_value:
+        return None
+    try:
+        stamp = float(header_value.strip().lstrip('t='))
+    except ValueError:
+        return None
+    # Proxies send microseconds, milliseconds or seconds since the epoch
+    while stamp > 1e11:
+        stamp /= 1000.0
+    return max(0.0, time.time() - stamp)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Model factory: one pooled, keep-alive HTTP client for all Groq/LiteLLM traffic
+
+Every LiteLLMModel built here shares the same connection pool, so TCP and
+TLS handshakes are paid once per connection rather than once per LLM call:
+
+    from model_factory import create_groq_model
+    groq_model = create_groq_model(max_tokens=500)
+
+Pool size, keep-alive and timeouts come from the environment (HTTP_* vars,
+see README_RAILWAY.md). Async connections belong to the event loop that
+opened them, so synchronous callers should run agents on the shared
+background loop (run_sync / background_loop) to reuse them across requests.
+Async LLM calls are also admitted through the process's RateLimitScheduler
+(scheduler.py, GROQ_RPM / GROQ_TPM / SCHEDULER_* vars).
+
+strands and LiteLLM take seconds to import, so they are only imported once
+a model or client is actually created; the loop and scheduler helpers are
+cheap to import.
+"""
+import os
+import ssl
+import asyncio
+import threading
+import httpx
+from dotenv import load_dotenv
+from scheduler import RateLimitScheduler
+
+load_dotenv()
+
+
+class HTTPPoolSettings:
+    """Connection pool limits and timeouts for LLM traffic"""
+
+    def __init__(self, max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0,
+                 timeout=120.0, connect_timeout=10.0, http2=False, verify=True):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.http2 = http2
+        self.verify = verify
+
+    @classmethod
+    def from_env(cls):
+        # httpx takes a CA bundle as an SSLContext (a path string is deprecated)
+        cafile = os.getenv('SSL_CERT_FILE')
+        return cls(
+            max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+            max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20')),
+            keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60')),
+            timeout=float(os.getenv('HTTP_TIMEOUT', '120')),
+            connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', '10')),
+            http2=os.getenv('HTTP2', 'false').lower() == 'true',
+            verify=ssl.create_default_context(cafile=cafile) if cafile else True,
+        )
+
+    def limits(self):
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeouts(self):
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+    def client_kwargs(self):
+        from litellm.llms.custom_httpx.http_handler import get_default_headers
+        return {
+            'limits': self.limits(),
+            'timeout': self.timeouts(),
+            'http2': self.http2,
+            'verify': self.verify,
+            'headers': get_default_headers(),
+            'follow_redirects': True,
+        }
+
+    def async_transport(self):
+        return httpx.AsyncHTTPTransport(limits=self.limits(), http2=self.http2, verify=self.verify)
+
+
+_background_loop = None
+_shared_handlers = {}
+_factory_lock = threading.Lock()
+
+
+def background_loop():
+    """Process-wide event loop (on a daemon thread) for running agents from sync code"""
+    global _background_loop
+    with _factory_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name='llm-io-loop', daemon=True).start()
+        return _background_loop
+
+
+def run_sync(coroutine):
+    """Run a coroutine on the shared background loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coroutine, background_loop()).result()
+
+
+def shared_scheduler():
+    """The process's RateLimitScheduler for LLM calls, or None with SCHEDULER_ENABLED=false"""
+    with _factory_lock:
+        if 'scheduler' not in _shared_handlers:
+            _shared_handlers['scheduler'] = None
+            if os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true':
+                _shared_handlers['scheduler'] = RateLimitScheduler(
+                    requests_per_minute=float(os.getenv('GROQ_RPM', '0')),
+                    tokens_per_minute=float(os.getenv('GROQ_TPM', '0')),
+                    max_queue=int(os.getenv('SCHEDULER_MAX_QUEUE', '100')),
+                    max_wait_seconds=float(os.getenv('SCHEDULER_MAX_WAIT_SECONDS', '30')),
+                    max_retries=int(os.getenv('SCHEDULER_MAX_RETRIES', '4'))
+                )
+        return _shared_handlers['scheduler']
+
+
+def shared_async_client():
+    """The process's pooled AsyncHTTPHandler for LiteLLM async calls"""
+    from pooled_http import PooledAsyncHTTPHandler
+    scheduler = shared_scheduler()
+    with _factory_lock:
+        if 'async' not in _shared_handlers:
+            _shared_handlers['async'] = PooledAsyncHTTPHandler(HTTPPoolSettings.from_env(), scheduler)
+        return _shared_handlers['async']
+
+
+def shared_sync_client():
+    """The process's pooled HTTPHandler for LiteLLM sync calls (litellm.completion)"""
+    from litellm.llms.custom_httpx.http_handler import HTTPHandler
+    with _factory_lock:
+        if 'sync' not in _shared_handlers:
+            settings = HTTPPoolSettings.from_env()
+            _shared_handlers['sync'] = HTTPHandler(
+                timeout=settings.timeouts(),
+                client=httpx.Client(**settings.client_kwargs())
+            )
+        return _shared_handlers['sync']
+
+
+def default_model_id():
+    """LiteLLM id of the default Groq model (GROQ_MODEL)"""
+    return os.getenv('GROQ_MODEL', 'groq/llama-3.1-8b-instant')
+
+
+def stable_prompt_prefix():
+    """Whether models freeze each agent's system prompt and tools (STABLE_PROMPT_PREFIX)"""
+    return os.getenv('STABLE_PROMPT_PREFIX', 'true').lower() == 'true'
+
+
+def create_groq_model(model_id=None, temperature=0.7, max_tokens=500, pooled=True, frozen_prefix=None):
+    """LiteLLMModel for Groq that sends its requests through the shared pool
+
+    Args:
+        model_id: LiteLLM model id (defaults to GROQ_MODEL or llama-3.1-8b-instant)
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+        pooled: Set False to fall back to LiteLLM's own client handling
+        frozen_prefix: Send byte-identical system prompts and tools on every call
+            so Groq's prompt cache applies (defaults to STABLE_PROMPT_PREFIX)
+    """
+    if frozen_prefix is None:
+        frozen_prefix = stable_prompt_prefix()
+    if frozen_prefix:
+        from prompt_prefix import FrozenPrefixLiteLLMModel as LiteLLMModel
+    else:
+        from strands.models.litellm import LiteLLMModel
+    client_args = {
+        "api_key": os.getenv("GROQ_API_KEY"),
+        "api_base": os.getenv("GROQ_API_BASE"),
+    }
+    if pooled:
+        client_args["client"] = shared_async_client()
+    return LiteLLMModel(
+        model_id=model_id or default_model_id(),
+        client_args=client_args,
+        params={
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+    )
+
+
+def completion(**kwargs):
+    """litellm.completion through the shared sync pool"""
+    import litellm
+    kwargs.setdefault('client', shared_sync_client())
+    return litellm.completion(**kwargs)
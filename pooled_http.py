@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+LiteLLM async HTTP handler backed by keep-alive httpx pools
+
+Separate from model_factory.py because subclassing LiteLLM's handler means
+importing LiteLLM, which model_factory defers until a client is created.
+"""
+import asyncio
+import threading
+import weakref
+import httpx
+from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+from model_factory import background_loop
+from scheduler import ScheduledTransport
+
+
+class PooledAsyncHTTPHandler(AsyncHTTPHandler):
+    """LiteLLM async handler with one keep-alive httpx pool per event loop
+
+    With a scheduler, every request is admitted through it (see scheduler.py).
+    """
+
+    def __init__(self, settings, scheduler=None):
+        # AsyncHTTPHandler.__init__ would build a throwaway client; set its fields directly
+        self.settings = settings
+        self.scheduler = scheduler
+        self.timeout = settings.timeouts()
+        self.event_hooks = None
+        self.ssl_verify = settings.verify
+        self.shared_session = None
+        self.transport = None
+        self.follow_redirects = True
+        self.client_alias = 'groq-pool'
+        self._owns_client = True
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = background_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._clients[loop] = self.create_client()
+            return client
+
+    @client.setter
+    def client(self, client):
+        raise AttributeError('PooledAsyncHTTPHandler manages its own clients')
+
+    def create_client(self, timeout=None, event_hooks=None, ssl_verify=None, shared_session=None):
+        # Also used by LiteLLM for its one-off retry after a dropped connection
+        if self.scheduler is None:
+            return httpx.AsyncClient(**self.settings.client_kwargs())
+        transport = ScheduledTransport(self.settings.async_transport(), self.scheduler)
+        return httpx.AsyncClient(transport=transport, **self.settings.client_kwargs())
+
+    def __del__(self):
+        # Pools are closed by close() or with their event loop
+        pass
+
+    async def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await client.aclose()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Byte-stable request prefixes for provider-side prompt caching
+
+Groq (like most providers) caches the processed prefix of a prompt and
+bills and serves repeated prefixes faster. A request's prefix is the model,
+the tool definitions, the system prompt and the earliest messages, so it
+only stays cacheable if those bytes are identical on every call.
+
+FrozenPrefixLiteLLMModel formats an agent's system prompt and tool specs
+once and sends the same frozen objects on every later call, instead of
+rebuilding them from the agents' tool registry and the @tool docstrings on
+each turn. The conversation side is kept append-only between compactions by
+TokenBudgetConversationManager (see compact_to in history.py).
+
+Separate from model_factory.py because subclassing the model class means
+importing strands and LiteLLM, which model_factory defers.
+"""
+import json
+import hashlib
+import threading
+from strands.models.litellm import LiteLLMModel
+
+# Distinct (system prompt, tools) pairs kept per model; the team has five
+MAX_PREFIXES = 64
+
+
+def tools_signature(tool_specs):
+    """Cheap identity of a tool list: names and descriptions, in order"""
+    return tuple((spec['name'], spec.get('description', '')) for spec in tool_specs or [])
+
+
+def prefix_fingerprint(request):
+    """Digest of everything a provider caches ahead of the conversation"""
+    system = [message for message in request.get('messages', []) if message.get('role') == 'system']
+    return hashlib.sha256(json.dumps([request.get('model'), request.get('tools'), system]).encode('utf-8')).hexdigest()
+
+
+class FrozenPrefixLiteLLMModel(LiteLLMModel):
+    """LiteLLMModel that formats each agent's system prompt and tools only once
+
+    One model instance serves every agent of every team, so frozen prefixes
+    are kept per (system prompt, tool names and descriptions).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prefixes = {}
+        self._lock = threading.Lock()
+        self.prefix_builds = 0
+        self.prefix_reuses = 0
+
+    def frozen_prefix(self, tool_specs, system_prompt, system_prompt_content=None):
+        """(system messages, tools) formatted the first time this pair was seen"""
+        key = (system_prompt, tools_signature(tool_specs))
+        prefix = self._prefixes.get(key)
+        if prefix is not None:
+            self.prefix_reuses += 1
+            return prefix
+        prefix = (
+            self._format_system_messages(system_prompt, system_prompt_content=system_prompt_content),
+            [
+                {
+                    'type': 'function',
+                    'function': {
+                        'name': spec['name'],
+                        'description': spec['description'],
+                        'parameters': spec['inputSchema']['json'],
+                    },
+                }
+                for spec in tool_specs or []
+            ],
+        )
+        with self._lock:
+            if len(self._prefixes) >= MAX_PREFIXES:
+                self._prefixes.clear()
+            prefix = self._prefixes.setdefault(key, prefix)
+            self.prefix_builds += 1
+        return prefix
+
+    def format_request(self, messages, tool_specs=None, system_prompt=None, tool_choice=None, *,
+                       system_prompt_content=None, **kwargs):
+        system_messages, tools = self.frozen_prefix(tool_specs, system_prompt, system_prompt_content)
+        request = super().format_request(messages, None, None, tool_choice, **kwargs)
+        request['messages'] = system_messages + request['messages']
+        request['tools'] = tools
+        return request
+
+    def prefix_stats(self):
+        return {'prefixes': len(self._prefixes), 'builds': self.prefix_builds, 'reuses': self.prefix_reuses}
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Input tokens and latency saved by keeping request prefixes cacheable
+
+Runs the same multi-turn conversations through the team against the fake
+LLM server with its prompt cache on, once the old way (history stripped and
+trimmed every turn) and once prefix-stable (frozen system prompt and tools,
+history compacted only when over budget). Uncached prompt tokens cost
+prefill time, so the cached share shows up as latency too.
+
+    python prompt_prefix_benchmark.py --conversations 4 --prefill-tokens-per-second 2000
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+from load_test import server_env
+from test_prompt_prefix import TURNS, tool_script
+
+MODES = {'per-turn trim': (False, None), 'prefix-stable': (True, 0.6)}
+
+
+def run_mode(server, mode, conversations, max_tokens):
+    from model_factory import create_groq_model, run_sync
+    from history import TokenBudgetConversationManager
+    from team import AgentTeam
+
+    frozen, compact_to = MODES[mode]
+    model = create_groq_model(max_tokens=200, frozen_prefix=frozen)
+    before = server.stats()
+    latencies = []
+    for _ in range(conversations):
+        team = AgentTeam(model, conversation_manager=lambda role: TokenBudgetConversationManager(
+            max_tokens=max_tokens, compact_to=compact_to))
+        for prompt in TURNS:
+            started = time.perf_counter()
+            run_sync(team.coordinator_agent.invoke_async(prompt))
+            latencies.append(time.perf_counter() - started)
+    after = server.stats()
+    prompt_tokens = after['prompt_tokens'] - before['prompt_tokens']
+    cached = after['cached_prompt_tokens'] - before['cached_prompt_tokens']
+    return {
+        'mode': mode,
+        'turns': len(latencies),
+        'llm_calls': after['requests'] - before['requests'],
+        'prompt_tokens': prompt_tokens,
+        'cached_tokens': cached,
+        'cached_share': round(cached / prompt_tokens, 4) if prompt_tokens else 0.0,
+        'uncached_tokens_per_turn': round((prompt_tokens - cached) / len(latencies), 1),
+        'p50_s': round(statistics.median(latencies), 3),
+        'mean_s': round(statistics.mean(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prompt cache hits with per-turn trimming vs prefix-stable history')
+    parser.add_argument('--conversations', type=int, default=3, help='Conversations per mode')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake LLM seconds per model call')
+    parser.add_argument('--prefill-tokens-per-second', type=float, default=2000.0,
+                        help='Fake LLM prompt processing speed for uncached tokens')
+    parser.add_argument('--max-tokens', type=int, default=1500, help='History budget per agent')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    server, llm_base_url = start_fake_llm_server(config=FakeLLMConfig(
+        latency=args.latency, tool_script=tool_script(), prefix_cache=True,
+        prefill_tokens_per_second=args.prefill_tokens_per_second
+    ))
+    os.environ.update(server_env(llm_base_url))
+    results = [run_mode(server, mode, args.conversations, args.max_tokens) for mode in MODES]
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<15}{'calls':>7}{'prompt tok':>12}{'cached':>9}{'uncached/turn':>15}{'p50 s':>8}{'mean s':>8}")
+    for row in results:
+        print(f"{row['mode']:<15}{row['llm_calls']:>7}{row['prompt_tokens']:>12}{row['cached_share']:>9.1%}"
+              f"{row['uncached_tokens_per_turn']:>15}{row['p50_s']:>8}{row['mean_s']:>8}")
+    legacy, stable = results
+    print(f"\nuncached input tokens {stable['uncached_tokens_per_turn'] / legacy['uncached_tokens_per_turn'] - 1:+.1%}, "
+          f"mean turn latency {stable['mean_s'] / legacy['mean_s'] - 1:+.1%}")
+
+
+if __name__ == '__main__':
+    main()
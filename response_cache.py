@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Response cache for repeated /api/chat prompts
+
+Entries are keyed on the normalized prompt plus the model id, temperature
+and agent graph version, so changing any of them naturally misses. Lookups
+try an exact match first, then (optionally) the closest earlier prompt in
+a local bag-of-words embedding index.
+
+Entries are shared by every user, so callers only store and look up the
+opening turn of a conversation: an answer given with earlier turns in the
+history depends on them (see app.cached_reply).
+"""
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from router import tokenize
+
+
+def normalize_prompt(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r'\s+', ' ', text).strip().lower().rstrip('.!?')
+
+
+class MemoryCacheBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Redis-compatible store; size is bounded by the server's maxmemory LRU policy"""
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='agent-cache:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl_seconds):
+        self._client.set(self._prefix + key, json.dumps(value, separators=(',', ':')), ex=max(1, int(ttl_seconds)))
+
+
+class SemanticIndex:
+    """Local near-duplicate index over hashed unigram + bigram vectors"""
+
+    def __init__(self, threshold=0.9, max_entries=1000, dimensions=2 ** 18):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dimensions = dimensions
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, text):
+        tokens = tokenize(text)
+        features = Counter(tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])])
+        vector = Counter()
+        for feature, count in features.items():
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            vector[int.from_bytes(digest, 'big') % self.dimensions] += count
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {index: value / norm for index, value in vector.items()} if norm else {}
+
+    def add(self, key, text):
+        with self._lock:
+            self._vectors[key] = self.embed(text)
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+
+    def nearest(self, text):
+        """Return (key, similarity) of the closest indexed prompt above the threshold"""
+        vector = self.embed(text)
+        best, best_score = None, self.threshold
+        with self._lock:
+            for key, other in self._vectors.items():
+                score = sum(value * other.get(index, 0.0) for index, value in vector.items())
+                if score >= best_score:
+                    best, best_score = key, score
+        return (best, best_score) if best else (None, 0.0)
+
+    def discard(self, key):
+        with self._lock:
+            self._vectors.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._vectors.clear()
+
+
+class ResponseCache:
+    """Prompt -> response cache with exact and optional semantic lookup
+
+    Args:
+        backend: Store with get(key) / set(key, value, ttl_seconds)
+        model_id: Model the responses came from
+        temperature: Sampling temperature the responses came from
+        graph_version: Version of the agent graph (prompts + tools)
+        ttl_seconds: How long an entry stays valid
+        semantic_index: Optional SemanticIndex for near-match lookups
+    """
+
+    def __init__(self, backend, model_id, temperature, graph_version, ttl_seconds=3600, semantic_index=None):
+        self.backend = backend
+        self.semantic_index = semantic_index
+        self.rekey(model_id, temperature, graph_version)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def rekey(self, model_id, temperature, graph_version):
+        """Key entries on another model or agent graph; earlier entries are no longer found"""
+        self.namespace = f'{graph_version}|{model_id}|{temperature}'
+        if self.semantic_index is not None:
+            self.semantic_index.clear()
+
+    def key_for(self, prompt):
+        return hashlib.sha256(f'{self.namespace}|{normalize_prompt(prompt)}'.encode('utf-8')).hexdigest()
+
+    def get(self, prompt):
+        """Return the cached entry with a 'match' field ('exact' or 'semantic'), or None"""
+        entry = self.backend.get(self.key_for(prompt))
+        match = 'exact'
+        if entry is None and self.semantic_index is not None:
+            key, similarity = self.semantic_index.nearest(normalize_prompt(prompt))
+            if key is not None:
+                entry = self.backend.get(key)
+                if entry is None:
+                    self.semantic_index.discard(key)
+                match = 'semantic'
+        self._count(match if entry is not None else 'miss')
+        return dict(entry, match=match) if entry is not None else None
+
+    def put(self, prompt, response, agent=None):
+        if not response:
+            return
+        key = self.key_for(prompt)
+        self.backend.set(key, {'response': response, 'agent': agent, 'created': time.time()}, self.ttl_seconds)
+        if self.semantic_index is not None:
+            self.semantic_index.add(key, normalize_prompt(prompt))
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = sum(counts.values())
+        hits = counts.get('exact', 0) + counts.get('semantic', 0)
+        return {
+            'lookups': lookups,
+            'exact_hits': counts.get('exact', 0),
+            'semantic_hits': counts.get('semantic', 0),
+            'misses': counts.get('miss', 0),
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Fast-path router that sends clearly-classified requests straight to a specialist
+
+Keyword/regex rules score each specialist; an optional TF-IDF classifier
+trained on example prompts breaks ties. When neither is confident the
+request falls back to the Team Coordinator as before.
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+# Team attribute names of the specialists the router can dispatch to
+RESEARCH = 'research_agent'
+PLANNING = 'planning_agent'
+DEVELOPER = 'developer_agent'
+
+DEFAULT_RULES = {
+    RESEARCH: [
+        (r'\bresearch\w*', 2.0),
+        (r'\binvestigat\w*', 2.0),
+        (r'\b(latest|current|emerging) (trends?|developments?)\b', 2.0),
+        (r'\btrends?\b', 1.0),
+        (r'\b(market|industry|competitive) analysis\b', 2.0),
+        (r'\b(what is|what are|explain|overview of|compare)\b', 1.0),
+    ],
+    PLANNING: [
+        (r'\bplan(ning)?\b', 2.0),
+        (r'\broadmap\w*', 2.0),
+        (r'\bmilestones?\b', 1.5),
+        (r'\btimeline\b', 1.5),
+        (r'\bbreak (it |this |that )?down\b', 1.5),
+        (r'\b(tasks?|phases?|sprints?)\b', 0.5),
+        (r'\bproject\b', 0.5),
+    ],
+    DEVELOPER: [
+        (r'```', 3.0),
+        # Declarations only count in code shape ("def f(", "let x =", "class A:"), not as English words
+        (r'\bdef \w+\s*\(|\bclass \w+\s*[(:{]|\bfunction\s*\w*\s*\(|\b(const|let|var) \w+\s*=[^=]'
+         r'|^\s*(import [\w.]+\s*$|from [\w.]+ import\b)', 2.5),
+        (r'\bcode\b', 2.0),
+        (r'\b(review|refactor|debug|optimi[sz]e) (this|my|the)\b', 1.5),
+        (r'\b(bug|exception|stack trace|error)\b', 1.0),
+        (r'\b(python|javascript|typescript|sql|java|rust|golang)\b|\bgo (func|mod)\b|\bgoroutines?\b', 1.0),
+    ],
+}
+
+# Seed prompts for the optional TF-IDF classifier
+DEFAULT_EXAMPLES = {
+    RESEARCH: [
+        'Research the latest trends in artificial intelligence',
+        'What are the applications of blockchain technology',
+        'Give me insights on the electric vehicle market',
+        'Investigate renewable energy developments',
+        'Tell me about quantum computing and its future outlook',
+    ],
+    PLANNING: [
+        'Plan a mobile app development project',
+        'Create a roadmap for a website redesign',
+        'Break down a data migration project into phases',
+        'Organize the launch of a new product with milestones',
+        'Schedule the tasks for building an online store',
+    ],
+    DEVELOPER: [
+        'Analyze this Python code: def calculate_sum(numbers): return sum(numbers)',
+        'Review this JavaScript function for best practices',
+        'Suggest improvements for this SQL query',
+        'Why does this function throw an exception',
+        'Refactor my class to be easier to test',
+    ],
+}
+
+_TOKEN = re.compile(r'[a-z0-9_]+')
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+class RouteDecision:
+    """Where a request should go and how sure the router is"""
+
+    def __init__(self, agent=None, confidence=0.0, method='fallback'):
+        self.agent = agent
+        self.confidence = confidence
+        self.method = method
+
+    @property
+    def fast_path(self):
+        return self.agent is not None
+
+    def to_dict(self):
+        return {'agent': self.agent, 'confidence': round(self.confidence, 3), 'method': self.method}
+
+
+class TfidfClassifier:
+    """Nearest-centroid classifier over TF-IDF vectors, no external dependencies"""
+
+    def __init__(self, examples=None):
+        self._idf = {}
+        self._centroids = {}
+        if examples:
+            self.fit(examples)
+
+    def fit(self, examples):
+        documents = [(label, Counter(tokenize(text))) for label, texts in examples.items() for text in texts]
+        document_frequency = Counter(term for _, counts in documents for term in counts)
+        self._idf = {term: math.log((1 + len(documents)) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+        centroids = {}
+        for label, counts in documents:
+            centroid = centroids.setdefault(label, Counter())
+            for term, weight in self._vector(counts).items():
+                centroid[term] += weight
+        self._centroids = {label: self._normalize(centroid) for label, centroid in centroids.items()}
+        return self
+
+    def predict(self, text):
+        """Return (label, cosine similarity) of the closest class, or (None, 0.0)"""
+        vector = self._normalize(self._vector(Counter(tokenize(text))))
+        best, best_score = None, 0.0
+        for label, centroid in self._centroids.items():
+            score = sum(weight * centroid.get(term, 0.0) for term, weight in vector.items())
+            if score > best_score:
+                best, best_score = label, score
+        return best, best_score
+
+    def _vector(self, counts):
+        return {term: count * self._idf[term] for term, count in counts.items() if term in self._idf}
+
+    @staticmethod
+    def _normalize(vector):
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+
+class FastPathRouter:
+    """Rules first, then the optional classifier, otherwise the coordinator
+
+    Args:
+        rules: Mapping of specialist -> [(regex, weight)]
+        classifier: Optional object with predict(text) -> (label, score)
+        min_score: Minimum rule score for the top specialist
+        min_share: Minimum share of the total rule score the top specialist must hold
+        classifier_threshold: Minimum classifier similarity to route on it
+    """
+
+    def __init__(self, rules=None, classifier=None, min_score=2.0, min_share=0.75, classifier_threshold=0.35):
+        self.rules = {
+            agent: [(re.compile(pattern, re.IGNORECASE | re.MULTILINE), weight) for pattern, weight in patterns]
+            for agent, patterns in (rules or DEFAULT_RULES).items()
+        }
+        self.classifier = classifier
+        self.min_score = min_score
+        self.min_share = min_share
+        self.classifier_threshold = classifier_threshold
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def scores(self, message):
+        return {
+            agent: sum(weight for pattern, weight in patterns if pattern.search(message))
+            for agent, patterns in self.rules.items()
+        }
+
+    def route(self, message):
+        decision = self._decide(message)
+        with self._lock:
+            self._counts['requests'] += 1
+            self._counts[f'{decision.method}:{decision.agent}'] += 1
+        return decision
+
+    def _decide(self, message):
+        scores = self.scores(message)
+        total = sum(scores.values())
+        agent, top = max(scores.items(), key=lambda item: item[1])
+        share = top / total if total else 0.0
+
+        if top >= self.min_score and share >= self.min_share:
+            return RouteDecision(agent, share, 'rules')
+
+        # Several domains scored strongly: a multi-part request for the coordinator
+        if total and share < 0.5:
+            return RouteDecision(confidence=share)
+
+        if self.classifier is not None:
+            label, similarity = self.classifier.predict(message)
+            if label is not None and similarity >= self.classifier_threshold and (not total or label == agent):
+                return RouteDecision(label, similarity, 'classifier')
+
+        return RouteDecision(confidence=share)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        requests = counts.pop('requests', 0)
+        fallback = counts.pop('fallback:None', 0)
+        by_agent = Counter()
+        for key, count in counts.items():
+            by_agent[key.split(':', 1)[1]] += count
+        return {
+            'requests': requests,
+            'fast_path': requests - fallback,
+            'fallback': fallback,
+            'hit_rate': round((requests - fallback) / requests, 4) if requests else 0.0,
+            'by_agent': dict(by_agent),
+            'by_method': {
+                'rules': sum(c for k, c in counts.items() if k.startswith('rules:')),
+                'classifier': sum(c for k, c in counts.items() if k.startswith('classifier:')),
+            },
+        }
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Horizontal scaling test for stateless workers
+
+Starts the fake LLM and fake Redis servers, then runs app.py under
+gunicorn with STATELESS_WORKERS=true and SESSION_BACKEND=redis at each
+worker count. A fixed population of users, each keeping its session
+cookie, holds multi-turn conversations against /api/chat, so consecutive
+turns of one conversation land on different workers. Throughput should
+grow close to linearly with the worker count; the efficiency column is
+req/s divided by (workers x the 1-worker req/s).
+
+    python scale_test.py --workers 1 2 4 --users 32 --turns 4
+"""
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import httpx
+from load_test import free_port, percentile, server_env, start_process, wait_for
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+async def run_user(base_url, user, turns, latencies, errors):
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        for turn in range(turns):
+            started = time.perf_counter()
+            try:
+                response = await client.post('/api/chat', json={
+                    'message': f'Research topic {user}.{turn} and summarize what we discussed so far'
+                })
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors.append(user)
+
+
+async def run_level(base_url, users, turns):
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(base_url, user, turns, latencies, errors) for user in range(users)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'p50_s': round(percentile(latencies, 50) or 0, 3),
+        'p99_s': round(percentile(latencies, 99) or 0, 3),
+    }
+
+
+def run_workers(workers, threads, llm_base_url, redis_url, users, turns):
+    port = free_port()
+    env = server_env(llm_base_url)
+    env.update({
+        'STATELESS_WORKERS': 'true',
+        'SESSION_BACKEND': 'redis',
+        'REDIS_URL': redis_url,
+        'RESPONSE_CACHE': 'false',
+        'METRICS_ENABLED': 'false',
+    })
+    # gthread workers accept connections beyond their free threads and queue them;
+    # capping worker connections at the thread count leaves the rest to idle workers
+    server = start_process([
+        'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads),
+        '--worker-connections', str(threads), '--timeout', '300', 'app:app'
+    ], env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(f"{base_url}/health")
+        # Warm up every worker's imports and connection pool before measuring
+        asyncio.run(run_level(base_url, workers * threads, 2))
+        return dict(workers=workers, users=users, **asyncio.run(run_level(base_url, users, turns)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of stateless gunicorn workers sharing a session store')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--users', type=int, help='Concurrent conversations (default: threads x max workers)')
+    parser.add_argument('--turns', type=int, default=4, help='Requests per conversation')
+    parser.add_argument('--llm-latency', type=float, default=0.25, help='Fake LLM seconds per model call')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    users = args.users or args.threads * max(args.workers)
+
+    llm_port, redis_port = free_port(), free_port()
+    helpers = [
+        start_process([sys.executable, 'fake_llm_server.py', '--port', str(llm_port), '--latency', str(args.llm_latency)], server_env('')),
+        start_process([sys.executable, 'fake_redis_server.py', '--port', str(redis_port)], server_env('')),
+    ]
+    try:
+        wait_for(f"http://127.0.0.1:{llm_port}/v1/models")
+        wait_for_port(redis_port)
+        results = [
+            run_workers(workers, args.threads, f"http://127.0.0.1:{llm_port}/v1",
+                        f"redis://127.0.0.1:{redis_port}/0", users, args.turns)
+            for workers in args.workers
+        ]
+    finally:
+        for process in helpers:
+            process.terminate()
+            process.wait()
+
+    baseline = results[0]['throughput_rps'] / results[0]['workers']
+    for row in results:
+        row['efficiency'] = round(row['throughput_rps'] / (row['workers'] * baseline), 2) if baseline else None
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'workers':>7}{'users':>7}{'ok':>6}{'err':>5}{'req/s':>9}{'p50 s':>9}{'p99 s':>9}{'effic.':>8}")
+    for row in results:
+        print(f"{row['workers']:>7}{row['users']:>7}{row['requests']:>6}{row['errors']:>5}"
+              f"{row['throughput_rps']:>9}{row['p50_s']:>9}{row['p99_s']:>9}{row['efficiency']:>8}")
+
+
+if __name__ == '__main__':
+    main()
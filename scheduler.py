@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Rate-limit aware scheduling of every LLM call
+
+Groq enforces requests- and tokens-per-window limits. Instead of letting
+bursts run into 429s, every model call waits in RateLimitScheduler for room
+in a set of token buckets:
+
+  rpm / tokens  configured budgets (GROQ_RPM / GROQ_TPM, 0 = learn only)
+  requests      learned from x-ratelimit-{limit,remaining,reset}-requests
+  tokens        resynced from x-ratelimit-{limit,remaining,reset}-tokens
+
+Waiting calls are served by priority (interactive chat before batch work,
+via the request_priority context variable), then in arrival order. A 429
+pauses all calls for Retry-After or a jittered exponential backoff and the
+call is retried by ScheduledTransport, the httpx transport the pooled LLM
+client sends through. Web handlers call admit() first so that, once the
+queue is too long to serve in time, new requests get a 503 with
+Retry-After instead of piling on.
+"""
+import re
+import json
+import math
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+import contextvars
+import httpx
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Priority of the model calls made by the current request / task
+request_priority = contextvars.ContextVar('request_priority', default=PRIORITY_INTERACTIVE)
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNIT_SECONDS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+
+class Overloaded(Exception):
+    """Too much queued LLM work to take on a new request; retry after retry_after seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'LLM capacity exhausted, retry in {retry_after}s')
+        self.retry_after = retry_after
+
+
+def parse_duration(value):
+    """Seconds from a rate-limit reset header: '7.66s', '2m59.56s', '120ms' or a plain number"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def is_rate_limited(error):
+    """Whether an exception (or one it was raised from) is an HTTP 429 / throttling error"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if getattr(error, 'status_code', None) == 429 or type(error).__name__ in ('ModelThrottledException', 'RateLimitError'):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def estimate_request_tokens(request):
+    """Prompt estimate (~4 characters per token) plus the completion budget of an LLM request"""
+    try:
+        body = request.content
+    except httpx.RequestNotRead:
+        return 0
+    max_tokens = 0
+    try:
+        max_tokens = int(json.loads(body).get('max_tokens') or 0)
+    except (ValueError, AttributeError, TypeError):
+        pass
+    return len(body) // 4 + max_tokens
+
+
+class TokenBucket:
+    """Capacity refilled continuously at rate units per second"""
+
+    def __init__(self, capacity, rate):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount is available (requests larger than the bucket wait for a full one)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate if self.rate > 0 else math.inf
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, limit, remaining, reset_seconds, now):
+        """Adopt the server's view: remaining now, back to limit after reset_seconds"""
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        self.level = float(remaining)
+        if reset_seconds and reset_seconds > 0 and self.capacity > remaining:
+            self.rate = (self.capacity - remaining) / reset_seconds
+
+
+class _Waiter:
+    def __init__(self, priority, sequence, cost):
+        self.priority = priority
+        self.sequence = sequence
+        self.cost = cost
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def __lt__(self, other):
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self.event.set)
+
+
+class RateLimitScheduler:
+    """Admission control and priority queueing for LLM calls against RPM/TPM budgets
+
+    Args:
+        requests_per_minute: Configured request budget (0 = rely on headers and 429s)
+        tokens_per_minute: Configured token budget (0 = learn from headers)
+        max_queue: Waiting calls at or above a request's priority before admit() sheds it
+        max_wait_seconds: Estimated queueing delay beyond which admit() sheds
+        max_retries: Times a 429'd call is retried before the 429 is returned
+        backoff_seconds: First backoff after a 429 without Retry-After (doubles per repeat)
+        max_backoff_seconds: Backoff ceiling
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_queue=100, max_wait_seconds=30.0,
+                 max_retries=4, backoff_seconds=1.0, max_backoff_seconds=60.0):
+        self.buckets = {}
+        if requests_per_minute:
+            self.buckets['rpm'] = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        if tokens_per_minute:
+            self.buckets['tokens'] = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.calls = 0
+        self.throttled = 0
+        self.shed = 0
+        self.queued_seconds = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._resume_at = 0.0
+        self._consecutive_throttles = 0
+        self._average_tokens = 0.0
+        self._lock = threading.Lock()
+
+    def _costs(self, tokens):
+        return {'rpm': 1, 'requests': 1, 'tokens': tokens}
+
+    def _wait_time(self, tokens, now):
+        wait = max(0.0, self._resume_at - now)
+        for name, bucket in self.buckets.items():
+            wait = max(wait, bucket.wait_time(self._costs(tokens)[name], now))
+        return wait
+
+    def _seconds_per_call(self):
+        costs = self._costs(self._average_tokens)
+        return max([costs[name] / bucket.rate for name, bucket in self.buckets.items() if bucket.rate > 0] or [0.0])
+
+    def _wake_head(self):
+        if self._waiters:
+            self._waiters[0].wake()
+
+    async def acquire(self, tokens=0, priority=None):
+        """Wait until the budgets allow one more call of about `tokens` tokens"""
+        priority = request_priority.get() if priority is None else priority
+        waiter = _Waiter(priority, next(self._sequence), tokens)
+        started = time.monotonic()
+        with self._lock:
+            heapq.heappush(self._waiters, waiter)
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = self._wait_time(tokens, now) if self._waiters[0] is waiter else None
+                    if wait == 0.0:
+                        heapq.heappop(self._waiters)
+                        for name, bucket in self.buckets.items():
+                            bucket.take(self._costs(tokens)[name], now)
+                        self.calls += 1
+                        self.queued_seconds += now - started
+                        self._average_tokens += (tokens - self._average_tokens) * 0.1
+                        self._wake_head()
+                        return
+                    waiter.event.clear()
+                try:
+                    # Woken early when we reach the head or the budgets change
+                    await asyncio.wait_for(waiter.event.wait(), timeout=None if wait is None else min(wait, 60.0))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                    self._wake_head()
+            raise
+
+    def estimated_wait(self, priority=PRIORITY_INTERACTIVE):
+        """Seconds a new call at this priority would likely queue for"""
+        with self._lock:
+            ahead = sum(1 for waiter in self._waiters if waiter.priority <= priority)
+            return self._wait_time(self._average_tokens, time.monotonic()) + ahead * self._seconds_per_call()
+
+    def admit(self, priority=PRIORITY_INTERACTIVE):
+        """Raise Overloaded when a new request at this priority should be turned away"""
+        with self._lock:
+            ahead = sum(1 for waiter in self._waiters if waiter.priority <= priority)
+        wait = self.estimated_wait(priority)
+        if ahead >= self.max_queue or wait > self.max_wait_seconds:
+            with self._lock:
+                self.shed += 1
+            raise Overloaded(max(1, math.ceil(wait if math.isfinite(wait) else self.max_wait_seconds)))
+
+    def observe(self, status_code, headers):
+        """Learn budgets from a response; for a 429 return how long to back off before retrying"""
+        now = time.monotonic()
+        with self._lock:
+            for kind in ('requests', 'tokens'):
+                remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+                if remaining is None:
+                    continue
+                try:
+                    limit = float(headers.get(f'x-ratelimit-limit-{kind}') or 0)
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                bucket = self.buckets.get(kind)
+                if bucket is None:
+                    # Assume a one-minute window until a reset header says otherwise
+                    bucket = self.buckets[kind] = TokenBucket(limit or remaining, (limit or remaining) / 60.0)
+                bucket.sync(limit, remaining, reset, now)
+
+            if status_code != 429:
+                self._consecutive_throttles = 0
+                self._wake_head()
+                return None
+
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (self._consecutive_throttles - 1))
+            delay = random.uniform(delay / 2, delay)
+            retry_after = parse_duration(headers.get('retry-after'))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            self._resume_at = max(self._resume_at, now + delay)
+            return delay
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'calls': self.calls,
+                'throttled': self.throttled,
+                'shed': self.shed,
+                'queued': len(self._waiters),
+                'mean_queue_ms': round(self.queued_seconds / self.calls * 1000, 1) if self.calls else 0.0,
+                'backoff_remaining_s': round(max(0.0, self._resume_at - now), 2),
+                'buckets': {
+                    name: {'capacity': bucket.capacity, 'level': round(bucket.level, 1), 'per_second': round(bucket.rate, 3)}
+                    for name, bucket in self.buckets.items()
+                },
+            }
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """httpx transport that admits each request through a RateLimitScheduler and retries 429s"""
+
+    def __init__(self, transport, scheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request):
+        tokens = estimate_request_tokens(request)
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(tokens)
+            response = await self.transport.handle_async_request(request)
+            delay = self.scheduler.observe(response.status_code, response.headers)
+            if delay is None or attempt >= self.scheduler.max_retries:
+                return response
+            # The scheduler holds every call for the backoff; this one retries after it
+            await response.aclose()
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
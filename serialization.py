@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Chat response schema and its wire encodings
+
+A /api/chat reply always has the same shape:
+
+    response     final answer text
+    agent        agent that answered
+    cached       served from the response cache or a coalesced run
+    cache_match  how a cached answer matched ('exact', 'semantic', 'in-flight'); cached replies only
+    agents       [{name, input_tokens, output_tokens, cached_tokens, total_tokens}] for every
+                 agent of the team that called the model during this request
+    usage        the same token counts summed over agents, plus tokens_saved by history trimming
+    tokens_saved same as usage.tokens_saved (kept for older clients)
+    timings      per-stage breakdown (only when asked for, see wants_timings)
+    timestamp    ISO 8601, UTC
+
+The answer text is read once from the final message (reply_text) and never
+from the conversation history. /api/chat and the batch runner both build
+their replies with it and with agent_usage.
+
+Bodies are encoded with orjson when it is installed and the stdlib json
+encoder otherwise. Both are compact and UTF-8. A client that sends
+Accept: application/msgpack (or application/x-msgpack) gets MessagePack
+instead, when the msgpack package is installed (pip install msgpack).
+"""
+import json
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_TYPE = 'application/json'
+MSGPACK_TYPE = 'application/msgpack'
+MSGPACK_TYPES = (MSGPACK_TYPE, 'application/x-msgpack', 'application/vnd.msgpack')
+USAGE_FIELDS = (('inputTokens', 'input_tokens'), ('outputTokens', 'output_tokens'),
+                ('cacheReadInputTokens', 'cached_tokens'), ('totalTokens', 'total_tokens'))
+
+
+def dumps(payload, default=None):
+    """Compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=default)
+    return json.dumps(payload, default=default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_text(payload):
+    """dumps() as a str, for SSE frames"""
+    return dumps(payload).decode('utf-8')
+
+
+def wants_msgpack(accept):
+    """Whether an Accept header prefers MessagePack over JSON (and msgpack is installed)"""
+    if msgpack is None or not accept:
+        return False
+    quality = {}
+    for part in accept.split(','):
+        media_type, *params = [item.strip() for item in part.split(';')]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        quality[media_type.lower()] = max(q, quality.get(media_type.lower(), 0.0))
+    packed = max((quality.get(media_type, 0.0) for media_type in MSGPACK_TYPES), default=0.0)
+    plain = max(quality.get(JSON_TYPE, 0.0), quality.get('application/*', 0.0), quality.get('*/*', 0.0))
+    return packed > 0 and packed >= plain
+
+
+def encode(payload, accept=None):
+    """(body, content type) for a payload, as the Accept header asks"""
+    if wants_msgpack(accept):
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK_TYPE
+    return dumps(payload), JSON_TYPE
+
+
+def reply_text(source):
+    """Answer text of an AgentResult (its final message), or of an agent's latest assistant message"""
+    message = getattr(source, 'message', None)
+    if message is None:
+        message = next((message for message in reversed(source.messages) if message.get('role') == 'assistant'), {})
+    return ''.join(block.get('text', '') for block in message.get('content', []) if 'text' in block)
+
+
+def usage_snapshot(agents):
+    """Each agent's token counters so far, to diff after a request"""
+    return [(agent.name, dict(agent.event_loop_metrics.accumulated_usage)) for agent in agents]
+
+
+def agent_usage(before, agents):
+    """Per-agent token use since usage_snapshot(agents) was taken, for agents that called the model"""
+    breakdown = []
+    for (name, start), agent in zip(before, agents):
+        now = agent.event_loop_metrics.accumulated_usage
+        row = {'name': name}
+        for source, field in USAGE_FIELDS:
+            row[field] = now.get(source, 0) - start.get(source, 0)
+        if row['total_tokens'] or row['input_tokens']:
+            breakdown.append(row)
+    return breakdown
+
+
+def total_usage(breakdown, tokens_saved=0):
+    usage = {field: sum(row[field] for row in breakdown) for _, field in USAGE_FIELDS}
+    usage['tokens_saved'] = tokens_saved
+    return usage
+
+
+def chat_payload(text, agent, cached=False, cache_match=None, agents=None, tokens_saved=0, timings=None):
+    """A /api/chat reply in the schema above"""
+    agents = agents or []
+    payload = {
+        'response': text,
+        'agent': agent,
+        'cached': cached,
+        'agents': agents,
+        'usage': total_usage(agents, tokens_saved),
+        'tokens_saved': tokens_saved,
+        'timestamp': datetime.utcnow().isoformat(),
+    }
+    if cached:
+        payload['cache_match'] = cache_match
+    if timings:
+        payload['timings'] = timings
+    return payload
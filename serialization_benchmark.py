@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Cost of encoding /api/chat replies at realistic sizes
+
+Builds replies in the schema of serialization.py: a short answer, a typical
+one and a long one, each with a per-agent breakdown and a timings breakdown.
+Every reply is encoded with:
+
+  jsonify   Flask's jsonify, the encoder /api/chat used before
+  stdlib    json.dumps, compact
+  orjson    orjson.dumps (when installed)
+  msgpack   msgpack.packb (when installed)
+
+Reports microseconds per reply and body size. It also times reading the
+answer text: str(AgentResult) against reply_text(), and the history size
+estimate the agent pool takes after every request.
+
+    python serialization_benchmark.py --repeat 2000
+"""
+import json
+import timeit
+import argparse
+from datetime import datetime
+import serialization
+from serialization import chat_payload, dumps, reply_text
+
+# (label, words in the answer, model calls in the timings)
+SIZES = [('short', 60, 2), ('typical', 400, 6), ('long', 2500, 14)]
+WORDS = 'the team reviewed the rollout plan and found three risks worth fixing before launch'.split()
+
+
+def make_payload(words, model_calls):
+    text = ' '.join(WORDS[i % len(WORDS)] for i in range(words)) + ' — naïve café ✓'
+    agents = [
+        {'name': name, 'input_tokens': 900 + 40 * i, 'output_tokens': words // 2,
+         'cached_tokens': 512, 'total_tokens': 900 + 40 * i + words // 2}
+        for i, name in enumerate(['Team Coordinator', 'Research Analyst', 'Project Planner'][:max(1, model_calls // 2)])
+    ]
+    spans = [{'name': stage, 'start_ms': 0.1 * i, 'duration_ms': 0.2} for i, stage in
+             enumerate(['cache', 'admission', 'session_wait', 'routing'])]
+    spans += [{'name': 'model', 'agent': 'Team Coordinator', 'start_ms': 12.5 * i, 'duration_ms': 410.2,
+               'input_tokens': 900, 'output_tokens': 60, 'cached_tokens': 512} for i in range(model_calls)]
+    timings = {'total_ms': 2451.7, 'spans': spans}
+    return chat_payload(text, 'Team Coordinator', agents=agents, tokens_saved=120, timings=timings)
+
+
+def make_result(payload, turns):
+    """An AgentResult for the payload's answer, and an agent history of turns exchanges"""
+    from strands.agent.agent_result import AgentResult
+    from strands.telemetry.metrics import EventLoopMetrics
+
+    message = {'role': 'assistant', 'content': [{'text': payload['response']}]}
+    history = []
+    for _ in range(turns):
+        history += [{'role': 'user', 'content': [{'text': 'Plan the next release'}]}, message]
+    return AgentResult('end_turn', message, EventLoopMetrics(), {}), history
+
+
+def per_call_us(func, repeat):
+    return round(min(timeit.repeat(func, number=repeat, repeat=3)) / repeat * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microseconds per /api/chat reply for each encoder')
+    parser.add_argument('--repeat', type=int, default=2000, help='Encodings per measurement')
+    parser.add_argument('--turns', type=int, default=20, help='Conversation turns in the history estimate')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    from flask import Flask, jsonify
+    app = Flask(__name__)
+    encoders = {
+        'jsonify': lambda payload: jsonify(payload).get_data(),
+        'stdlib': lambda payload: json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+    }
+    if serialization.orjson is not None:
+        encoders['orjson'] = serialization.orjson.dumps
+    if serialization.msgpack is not None:
+        encoders['msgpack'] = lambda payload: serialization.msgpack.packb(payload, use_bin_type=True)
+
+    results = []
+    with app.app_context():
+        for label, words, model_calls in SIZES:
+            payload = make_payload(words, model_calls)
+            result, history = make_result(payload, args.turns)
+            row = {'size': label, 'encode_us': {}, 'bytes': {}}
+            for name, encoder in encoders.items():
+                row['encode_us'][name] = per_call_us(lambda: encoder(payload), args.repeat)
+                row['bytes'][name] = len(encoder(payload))
+            row['text_us'] = {
+                'str(result)': per_call_us(lambda: str(result), args.repeat),
+                'reply_text': per_call_us(lambda: reply_text(result), args.repeat),
+            }
+            row['history_us'] = {
+                'json.dumps': per_call_us(lambda: len(json.dumps(history, default=str)), args.repeat // 10 or 1),
+                'dumps': per_call_us(lambda: len(dumps(history, default=str)), args.repeat // 10 or 1),
+            }
+            results.append(row)
+
+    if args.json:
+        print(json.dumps({'timestamp': datetime.utcnow().isoformat(), 'results': results}, indent=2))
+        return
+
+    names = list(encoders)
+    print(f"{'size':<9}" + ''.join(f'{name + " us":>13}' for name in names) + ''.join(f'{name + " B":>12}' for name in names))
+    for row in results:
+        print(f"{row['size']:<9}" + ''.join(f"{row['encode_us'][name]:>13}" for name in names)
+              + ''.join(f"{row['bytes'][name]:>12}" for name in names))
+    print(f'\nanswer text and history size estimate ({args.turns} turns), us:')
+    for row in results:
+        text, history = row['text_us'], row['history_us']
+        print(f"{row['size']:<9}str(result) {text['str(result)']:>7}  reply_text {text['reply_text']:>7}"
+              f"   json.dumps {history['json.dumps']:>8}  dumps {history['dumps']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Session and conversation store shared by every worker
+
+Two interchangeable backends hold small binary values under string keys
+with a TTL:
+
+  MemorySessionStore - in-process dict; a background thread sweeps expired keys
+  RedisSessionStore  - any Redis-compatible server (redis package);
+                       expiry is left to the server, so every gunicorn worker
+                       and Railway replica sees the same state
+
+StoreSessionInterface puts Flask's session behind a store (the cookie only
+carries a signed session id), and save_conversation / load_conversation
+snapshot an AgentTeam's message histories and history-manager state.
+Values are compact JSON, zlib-compressed once they are large enough for it
+to pay off.
+"""
+import json
+import time
+import uuid
+import zlib
+import weakref
+import threading
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+COMPRESS_OVER_BYTES = 1024
+
+# Team members whose conversation is persisted (the synthesis agent is stateless)
+CONVERSATION_AGENTS = ('coordinator_agent', 'research_agent', 'planning_agent', 'developer_agent')
+
+
+def pack(value):
+    """Compact bytes for a JSON-serializable value"""
+    raw = json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    if len(raw) > COMPRESS_OVER_BYTES:
+        return b'z' + zlib.compress(raw, 6)
+    return b'j' + raw
+
+
+def unpack(data):
+    """Inverse of pack()"""
+    if data[:1] == b'z':
+        return json.loads(zlib.decompress(data[1:]))
+    return json.loads(data[1:])
+
+
+class MemorySessionStore:
+    """In-process key/value store with TTL expiry and background cleanup
+
+    Args:
+        cleanup_interval: Seconds between sweeps of expired keys (0 disables the sweeper)
+    """
+
+    def __init__(self, cleanup_interval=60):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.expired = 0
+        if cleanup_interval:
+            _start_sweeper(self, cleanup_interval)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._data[key]
+                self.expired += 1
+                return None
+            return item[1]
+
+    def set(self, key, value, ttl_seconds):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl_seconds, value)
+
+    def add(self, key, value, ttl_seconds):
+        """Set only if the key is absent (or expired); True when it was set"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > time.monotonic():
+                return False
+            self._data[key] = (time.monotonic() + ttl_seconds, value)
+            return True
+
+    def touch(self, key, ttl_seconds):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data[key] = (time.monotonic() + ttl_seconds, item[1])
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def cleanup(self):
+        """Drop expired keys; returns how many were removed"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                del self._data[key]
+            self.expired += len(expired)
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'keys': len(self._data),
+                'bytes': sum(len(value) for _, value in self._data.values()),
+                'expired': self.expired,
+            }
+
+
+def _start_sweeper(store, interval):
+    # Holds only a weak reference so a discarded store (and its thread) can go away
+    store_ref = weakref.ref(store)
+
+    def sweep():
+        while True:
+            time.sleep(interval)
+            store = store_ref()
+            if store is None:
+                return
+            store.cleanup()
+            del store
+
+    threading.Thread(target=sweep, name='session-store-cleanup', daemon=True).start()
+
+
+class RedisSessionStore:
+    """Redis-compatible store; the server expires keys on its own"""
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='agent-session:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package (pip install redis)")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        return self._client.get(self._prefix + key)
+
+    def set(self, key, value, ttl_seconds):
+        self._client.set(self._prefix + key, value, ex=max(1, int(ttl_seconds)))
+
+    def add(self, key, value, ttl_seconds):
+        return bool(self._client.set(self._prefix + key, value, px=max(1, int(ttl_seconds * 1000)), nx=True))
+
+    def touch(self, key, ttl_seconds):
+        self._client.expire(self._prefix + key, max(1, int(ttl_seconds)))
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+    def cleanup(self):
+        return 0
+
+    def stats(self):
+        return {'backend': 'redis'}
+
+
+def save_conversation(store, session_id, team, ttl_seconds):
+    """Snapshot a team's conversation under the session id; returns the stored size in bytes"""
+    state = {}
+    for name in CONVERSATION_AGENTS:
+        agent = getattr(team, name)
+        state[name] = {'messages': agent.messages, 'manager': agent.conversation_manager.get_state()}
+    data = pack(state)
+    store.set(f'conversation:{session_id}', data, ttl_seconds)
+    return len(data)
+
+
+def load_conversation(store, session_id, team):
+    """Restore a team's conversation from its snapshot; False when there is none"""
+    data = store.get(f'conversation:{session_id}')
+    if data is None:
+        return False
+    state = unpack(data)
+    for name in CONVERSATION_AGENTS:
+        agent_state = state.get(name)
+        if agent_state is None:
+            continue
+        agent = getattr(team, name)
+        agent.messages[:] = agent_state['messages']
+        agent.conversation_manager.restore_from_session(agent_state['manager'])
+    return True
+
+
+class StoreSession(CallbackDict, SessionMixin):
+    """Flask session whose data lives in a session store"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class StoreSessionInterface(SessionInterface):
+    """Keeps Flask sessions in a session store; the cookie holds only a signed id
+
+    Args:
+        store: MemorySessionStore, RedisSessionStore or anything with get/set/add/touch/delete
+        ttl_seconds: Idle lifetime of a session
+    """
+
+    salt = 'agent-session'
+
+    def __init__(self, store, ttl_seconds=86400):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('ascii')
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.store.get(f'session:{sid}')
+                if data is not None:
+                    return StoreSession(unpack(data), sid=sid)
+        return StoreSession(sid=uuid.uuid4().hex, new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified:
+                self.store.delete(f'session:{session.sid}')
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified or session.new:
+            self.store.set(f'session:{session.sid}', pack(dict(session)), self.ttl_seconds)
+        elif self.should_set_cookie(app, session):
+            self.store.touch(f'session:{session.sid}', self.ttl_seconds)
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid.encode('ascii')).decode('ascii'),
+                max_age=self.ttl_seconds,
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                domain=domain,
+                path=path,
+            )
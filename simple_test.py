@@ -2,24 +2,14 @@
 """
 Simple test of the agent team with Groq
 """
-import os
 from dotenv import load_dotenv
 from strands import Agent
-from strands.models.litellm import LiteLLMModel
+from model_factory import create_groq_model
 
 load_dotenv()
 
 # Configure Groq model
-groq_model = LiteLLMModel(
-    model_id="groq/llama-3.1-8b-instant",
-    client_args={
-        "api_key": os.getenv("GROQ_API_KEY"),
-    },
-    params={
-        "temperature": 0.7,
-        "max_tokens": 200,
-    }
-)
+groq_model = create_groq_model(model_id="groq/llama-3.1-8b-instant", temperature=0.7, max_tokens=200)
 
 def test_basic_agent():
     """Test a basic agent"""
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Single-flight for concurrent identical prompts
+
+When several requests with the same normalized prompt arrive while one of
+them is still running, the first (the leader) runs the agents and the rest
+(followers) wait for it and share its answer: streaming followers replay the
+leader's SSE frames as they are produced, the others get the final reply.
+Keys can be scoped per tenant, per session or globally, so tenants need not
+share answers. Outside the session scope the caller only joins flights for
+the opening turn of a conversation, since a later answer depends on its
+session's history; followers record the shared answer in their own. Flights are per process; the response cache catches repeats
+that arrive after a flight has landed.
+
+Followers never hold an LLM slot. If the leader goes away before answering
+(a streaming client hanging up), its flight is abandoned and waiting
+non-streaming followers run the prompt themselves.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter
+from response_cache import normalize_prompt
+
+SCOPES = ('global', 'tenant', 'session')
+
+
+class Flight:
+    """One in-flight agent execution that identical requests attach to"""
+
+    def __init__(self, key):
+        self.key = key
+        self.frames = []
+        self.streamed = False
+        self.result = None
+        self.error = None
+        self.abandoned = False
+        self.done = False
+        self.followers = 0
+        self._cond = threading.Condition()
+        self._async_waiters = []
+
+    def _notify(self):
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            loop.call_soon_threadsafe(event.set)
+        self._async_waiters.clear()
+
+    def publish(self, frame):
+        """Hand an SSE frame the leader just sent to streaming followers; returns the frame"""
+        with self._cond:
+            if self.done:
+                return frame
+            self.streamed = True
+            self.frames.append(frame)
+            self._notify()
+        return frame
+
+    def settle(self, result=None, error=None):
+        """Land the flight with the leader's reply or error (neither: abandoned)"""
+        with self._cond:
+            if self.done:
+                return False
+            self.result, self.error = result, error
+            self.abandoned = result is None and error is None
+            self.done = True
+            self._notify()
+            return True
+
+    def outcome(self):
+        """The leader's reply, its error raised, or None if the flight was abandoned"""
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def wait(self, timeout=None):
+        """Block until the flight lands; the reply, or None when abandoned or timed out"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout)
+            if not self.done:
+                return None
+        return self.outcome()
+
+    def _poll(self, index, loop=None, event=None):
+        """(frames after index, done); registers event to be set on the next change"""
+        with self._cond:
+            frames, done = self.frames[index:], self.done
+            if event is not None and not frames and not done:
+                self._async_waiters.append((loop, event))
+            return frames, done
+
+    def follow(self, timeout=None):
+        """Yield the leader's frames as they are published until the flight lands"""
+        deadline = time.monotonic() + timeout if timeout else None
+        index = 0
+        while True:
+            with self._cond:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                self._cond.wait_for(lambda: self.done or len(self.frames) > index, remaining)
+            frames, done = self._poll(index)
+            index += len(frames)
+            yield from frames
+            if done or (deadline is not None and time.monotonic() >= deadline):
+                return
+
+    async def await_result(self, timeout=None):
+        """Async wait(): the reply, or None when abandoned or timed out"""
+        async for _ in self.afollow(timeout):
+            pass
+        return self.outcome() if self.done else None
+
+    async def afollow(self, timeout=None):
+        """Async follow()"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        index = 0
+        while True:
+            event = asyncio.Event()
+            frames, done = self._poll(index, loop, event)
+            index += len(frames)
+            for frame in frames:
+                yield frame
+            if done:
+                return
+            if frames:
+                continue
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+
+class SingleFlight:
+    """Coalesces concurrent requests with the same scoped, normalized prompt
+
+    Args:
+        scope: 'tenant', 'session' or 'global' (everyone shares)
+    """
+
+    def __init__(self, scope='tenant'):
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown single-flight scope '{scope}' (expected one of {', '.join(SCOPES)})")
+        self.scope = scope
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def key(self, prompt, tenant=None, session_id=None):
+        owner = {'global': '', 'tenant': tenant or '', 'session': session_id or ''}[self.scope]
+        return f'{owner}|{normalize_prompt(prompt)}'
+
+    def join(self, key):
+        """(flight, leading): lead a new flight, or follow the one already running"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight(key)
+                self._counts['leaders'] += 1
+                return flight, True
+            flight.followers += 1
+            self._counts['followers'] += 1
+            self._counts['max_followers'] = max(self._counts['max_followers'], flight.followers)
+            return flight, False
+
+    def finish(self, flight, result=None, error=None):
+        """Land a led flight (no result or error: abandoned); later calls are ignored"""
+        if flight is None:
+            return
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            if flight.settle(result, error):
+                self._counts['errors' if error is not None else 'abandoned' if result is None else 'completed'] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            in_flight = len(self._flights)
+        leaders, followers = counts.get('leaders', 0), counts.get('followers', 0)
+        return {
+            'scope': self.scope,
+            'in_flight': in_flight,
+            'leaders': leaders,
+            'followers': followers,
+            'completed': counts.get('completed', 0),
+            'errors': counts.get('errors', 0),
+            'abandoned': counts.get('abandoned', 0),
+            'max_followers': counts.get('max_followers', 0),
+            'coalesced_rate': round(followers / (leaders + followers), 4) if leaders + followers else 0.0,
+        }
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Speculative specialist execution while the coordinator decides
+
+A request the fast-path router is unsure about goes to the coordinator,
+whose first LLM call only decides which specialist to delegate to; the
+specialist's own calls start after it. Here a cheap local prediction
+(the router's rule scores and classifier) picks the likeliest
+specialist(s), which start on the user's message at the same time as the
+coordinator. When the coordinator's tool choice arrives, a matching
+speculative run stands in for the tool call and the others are cancelled.
+
+A speculative run answers the user's message rather than the coordinator's
+rewording of it; the specialist prompt is the same either way, and as a
+coordinator tool the specialist starts without history too. Tokens spent
+on runs the coordinator did not use are charged to a per-minute budget,
+and no speculation starts while the budget is exhausted.
+"""
+import time
+import asyncio
+import threading
+from model_factory import run_sync
+from scheduler import TokenBucket
+
+
+class SpecialistPredictor:
+    """Likely specialists for a message from a FastPathRouter's rules and classifier
+
+    A rule match counts with its share of the total rule score, scaled down
+    when the score is below the router's own minimum; a classifier match
+    counts with its similarity.
+
+    Args:
+        router: FastPathRouter whose scores() and classifier are used
+        min_confidence: Minimum likelihood to speculate on a specialist
+        max_agents: Most specialists started for one request
+    """
+
+    def __init__(self, router, min_confidence=0.5, max_agents=1):
+        self.router = router
+        self.min_confidence = min_confidence
+        self.max_agents = max_agents
+
+    def likelihoods(self, message):
+        scores = self.router.scores(message)
+        total = sum(scores.values())
+        likely = {
+            agent: score / total * min(1.0, score / self.router.min_score)
+            for agent, score in scores.items() if score > 0
+        }
+        if self.router.classifier is not None:
+            label, similarity = self.router.classifier.predict(message)
+            if label is not None:
+                likely[label] = max(likely.get(label, 0.0), similarity)
+        return likely
+
+    def predict(self, message):
+        """[(agent, likelihood)] worth speculating on, likeliest first"""
+        ranked = sorted(self.likelihoods(message).items(), key=lambda item: item[1], reverse=True)
+        return [(agent, p) for agent, p in ranked if p >= self.min_confidence][:self.max_agents]
+
+
+class SpeculativeRun:
+    """One specialist started ahead of the coordinator's decision"""
+
+    def __init__(self, agent, specialist, prompt):
+        self.agent = agent
+        self.specialist = specialist
+        self.started = time.perf_counter()
+        self.finished = None
+        self.claimed_at = None
+        self.taken = False
+        self.task = asyncio.ensure_future(specialist.invoke_async(prompt))
+        self.task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self.finished = time.perf_counter()
+
+    def completed(self):
+        """Whether the run ended with an answer the coordinator can use"""
+        return (self.task.done() and not self.task.cancelled() and self.task.exception() is None
+                and self.task.result().stop_reason != 'cancelled')
+
+    def abort(self):
+        self.specialist.cancel()
+        self.task.cancel()
+
+    def tokens(self):
+        """Tokens billed so far, counting the prompt of a model call cut off mid-flight"""
+        used = self.specialist.event_loop_metrics.accumulated_usage.get('totalTokens', 0)
+        if not self.completed():
+            from history import estimate_tokens
+            used += estimate_tokens(self.specialist.system_prompt or '') + estimate_tokens(self.specialist.messages)
+        return used
+
+    def seconds_saved(self):
+        """How far the run was ahead of the coordinator asking for it"""
+        if self.claimed_at is None or not self.completed():
+            return 0.0
+        return min(self.claimed_at, self.finished) - self.started
+
+    def as_tool(self, original):
+        """Tool that answers the coordinator's call with this run's result
+
+        Falls back to the original tool when the speculative run failed.
+        """
+        from strands.tools.tools import PythonAgentTool
+
+        async def answer(tool_use, **invocation_state):
+            try:
+                await asyncio.shield(self.task)
+            except Exception:
+                pass
+            if self.completed():
+                return {'toolUseId': tool_use['toolUseId'], 'status': 'success',
+                        'content': [{'text': str(self.task.result())}]}
+            result = None
+            async for event in original.stream(tool_use, invocation_state):
+                if isinstance(event, dict) and 'tool_result' in event:
+                    result = event['tool_result']
+            return result
+
+        return PythonAgentTool(original.tool_name, original.tool_spec, answer)
+
+
+class SpeculationHooks:
+    """Swaps the coordinator's specialist calls for speculative runs
+
+    A strands HookProvider (structural, like AgentMetricsHooks) shared by all
+    agents of a team. Requests hold the team's lock, so at most one
+    SpeculativeCoordinator is active at a time.
+    """
+
+    def __init__(self):
+        self.active = None
+
+    def register_hooks(self, registry, **kwargs):
+        from strands.hooks import AfterModelCallEvent, BeforeToolCallEvent
+        registry.add_callback(AfterModelCallEvent, self._after_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+
+    def _after_model_call(self, event):
+        active = self.active
+        if active is None or event.agent is not active.coordinator or event.stop_response is None:
+            return
+        content = event.stop_response.message.get('content', [])
+        active.decided([block['toolUse']['name'] for block in content if 'toolUse' in block])
+
+    def _before_tool_call(self, event):
+        active = self.active
+        if active is None or event.agent is not active.coordinator or event.selected_tool is None:
+            return
+        run = active.take(event.tool_use.get('name'))
+        if run is not None:
+            event.selected_tool = run.as_tool(event.selected_tool)
+
+
+class SpeculationStats:
+    """Outcome counts, tokens and latency of speculative runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'launched': 0, 'hits': 0, 'misses': 0, 'unused': 0, 'skipped_budget': 0}
+        self.tokens = {'used': 0, 'wasted': 0}
+        self.seconds_saved = 0.0
+
+    def record(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.counts[key] += value
+
+    def record_run(self, outcome, tokens, seconds_saved=0.0):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.tokens['used'] += tokens
+            if outcome != 'hits':
+                self.tokens['wasted'] += tokens
+            self.seconds_saved += seconds_saved
+
+    def mean_run_tokens(self):
+        with self._lock:
+            settled = self.counts['hits'] + self.counts['misses'] + self.counts['unused']
+            return self.tokens['used'] / settled if settled else 0.0
+
+    def stats(self):
+        with self._lock:
+            counts, tokens, saved = dict(self.counts), dict(self.tokens), self.seconds_saved
+        settled = counts['hits'] + counts['misses'] + counts['unused']
+        return {
+            **counts,
+            'hit_rate': round(counts['hits'] / settled, 4) if settled else 0.0,
+            'tokens_used': tokens['used'],
+            'tokens_wasted': tokens['wasted'],
+            'seconds_saved': round(saved, 3),
+            'mean_seconds_saved_per_hit': round(saved / counts['hits'], 3) if counts['hits'] else 0.0,
+        }
+
+
+class SpeculationController:
+    """Decides when to speculate and keeps the budget and stats
+
+    Args:
+        predictor: SpecialistPredictor
+        tokens_per_minute: Tokens per minute speculation may waste (0: unlimited)
+        default_run_tokens: Cost assumed for a run before any have been measured
+    """
+
+    def __init__(self, predictor, tokens_per_minute=20000, default_run_tokens=1000):
+        self.predictor = predictor
+        self.budget = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute > 0 else None
+        self.default_run_tokens = default_run_tokens
+        self.stats = SpeculationStats()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Set aside the expected cost of one run, or return None when over budget"""
+        tokens = self.stats.mean_run_tokens() or self.default_run_tokens
+        if self.budget is None:
+            return tokens
+        with self._lock:
+            now = time.monotonic()
+            if self.budget.wait_time(tokens, now) > 0:
+                return None
+            self.budget.take(tokens, now)
+        return tokens
+
+    def settle(self, reserved, wasted):
+        """Charge what a run actually wasted instead of what was reserved for it"""
+        if self.budget is None:
+            return
+        with self._lock:
+            self.budget.take(wasted - reserved, time.monotonic())
+            self.budget.level = min(self.budget.level, self.budget.capacity)
+
+    def speculate(self, team, message):
+        """A SpeculativeCoordinator for the message, or None when nothing is worth starting"""
+        hooks = next((hook for hook in team.hooks if isinstance(hook, SpeculationHooks)), None)
+        agents = [agent for agent, _ in self.predictor.predict(message)] if hooks else []
+        self.stats.record(requests=1)
+        if not agents:
+            return None
+        return SpeculativeCoordinator(team, agents, hooks, self)
+
+
+class SpeculativeCoordinator:
+    """Runs the coordinator with the predicted specialists already working
+
+    Quacks like a Strands agent (invoke_async / stream_async / __call__ /
+    cancel / messages / name) so the web handlers can treat it as one.
+
+    Args:
+        team: AgentTeam whose coordinator runs the request
+        agents: Team attributes of the specialists to start
+        hooks: The team's SpeculationHooks
+        controller: SpeculationController holding the budget and stats
+    """
+
+    def __init__(self, team, agents, hooks, controller):
+        self.team = team
+        self.coordinator = team.coordinator_agent
+        self.name = self.coordinator.name
+        self.agents = agents
+        self.hooks = hooks
+        self.controller = controller
+        self.runs = {}
+        self.reserved = {}
+        self.outcomes = {}
+
+    @property
+    def messages(self):
+        return self.coordinator.messages
+
+    def start(self, prompt):
+        for agent in self.agents:
+            reserved = self.controller.reserve()
+            if reserved is None:
+                self.controller.stats.record(skipped_budget=1)
+                continue
+            name = self.team.tool_names[agent]
+            self.runs[name] = SpeculativeRun(agent, self.team.spare_specialist(agent), prompt)
+            self.reserved[name] = reserved
+        self.controller.stats.record(launched=len(self.runs))
+        self.hooks.active = self
+
+    def decided(self, tool_names):
+        """The coordinator chose its tools (none: it answered itself); cancel the losers"""
+        for name, run in self.runs.items():
+            if name in self.outcomes:
+                continue
+            if name in tool_names:
+                run.claimed_at = time.perf_counter()
+                self.outcomes[name] = 'hits'
+            else:
+                run.abort()
+                self.outcomes[name] = 'misses' if tool_names else 'unused'
+
+    def take(self, tool_name):
+        """The speculative run standing in for this tool call, used at most once"""
+        run = self.runs.get(tool_name)
+        if run is None or run.taken or self.outcomes.get(tool_name) != 'hits':
+            return None
+        run.taken = True
+        return run
+
+    async def finish(self):
+        self.hooks.active = None
+        for name, run in self.runs.items():
+            if not run.taken:
+                # Claimed but never called (the turn ended early) counts as a miss
+                run.abort()
+                self.outcomes[name] = 'misses' if self.outcomes.get(name) == 'hits' else self.outcomes.get(name, 'unused')
+        await asyncio.gather(*(run.task for run in self.runs.values()), return_exceptions=True)
+        for name, run in self.runs.items():
+            outcome = self.outcomes[name]
+            tokens = run.tokens()
+            self.controller.stats.record_run(outcome, tokens, run.seconds_saved() if outcome == 'hits' else 0.0)
+            self.controller.settle(self.reserved[name], 0 if outcome == 'hits' else tokens)
+
+    async def invoke_async(self, prompt):
+        self.start(prompt)
+        try:
+            return await self.coordinator.invoke_async(prompt)
+        finally:
+            await self.finish()
+
+    async def stream_async(self, prompt):
+        self.start(prompt)
+        try:
+            async for event in self.coordinator.stream_async(prompt):
+                yield event
+        finally:
+            await self.finish()
+
+    def __call__(self, prompt):
+        return run_sync(self.invoke_async(prompt))
+
+    def cancel(self):
+        self.coordinator.cancel()
+        for run in self.runs.values():
+            run.abort()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Latency and token cost of speculative specialist execution
+
+Runs requests the fast-path router leaves to the coordinator against the
+fake LLM server, once with the plain coordinator and once with the
+predicted specialist started alongside it. A tool script makes the fake
+coordinator delegate each prompt to the specialist it is labelled with
+(or answer itself), so the hit rate reflects the local predictor.
+
+    python speculation_benchmark.py --rounds 5 --latency 0.3
+"""
+import os
+import re
+import json
+import time
+import argparse
+import statistics
+from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+from load_test import server_env
+
+# Prompts the router does not fast-path, with the coordinator tool that should handle them
+# ("predicted" rows below are the ones the predictor speculates on)
+PROMPTS = [
+    ('What are the risks of serverless for our team', 'research_analyst'),
+    ('Can you check my function for bugs', 'senior_developer'),
+    ('How do competitors price their enterprise tiers', 'research_analyst'),
+    ('Which tests are missing for this module', 'senior_developer'),
+    ('What are the risks of our launch timeline', 'project_planner'),
+    ('Estimate how long the billing rewrite will take', 'project_planner'),
+    ('What should we do about our website?', 'project_planner'),
+    ('Who should own the migration and by when', 'project_planner'),
+    ('Thanks, that was helpful', None),
+]
+
+
+def tool_script():
+    """Fake LLM script: each prompt's coordinator tool, then the specialist's own tool"""
+    specialist_tools = {'research_analyst': 'research_topic', 'project_planner': 'plan_project', 'senior_developer': 'analyze_code'}
+    return [
+        {'match': '^' + re.escape(prompt), 'tools': [tool, specialist_tools[tool]] if tool else []}
+        for prompt, tool in PROMPTS
+    ]
+
+
+def run_mode(server, speculate, rounds, min_confidence, max_agents):
+    from model_factory import create_groq_model, run_sync
+    from router import DEFAULT_EXAMPLES, FastPathRouter, TfidfClassifier
+    from speculation import SpecialistPredictor, SpeculationController, SpeculationHooks
+    from team import AgentTeam
+
+    model = create_groq_model(max_tokens=500)
+    controller = SpeculationController(
+        SpecialistPredictor(FastPathRouter(classifier=TfidfClassifier(DEFAULT_EXAMPLES)), min_confidence, max_agents),
+        tokens_per_minute=0
+    )
+
+    def ask(prompt):
+        team = AgentTeam(model, hooks=[SpeculationHooks()])
+        agent = (controller.speculate(team, prompt) if speculate else None) or team.coordinator_agent
+        return run_sync(agent.invoke_async(prompt))
+
+    ask(PROMPTS[0][0])  # warm up imports and the connection pool
+    controller.stats = type(controller.stats)()
+    before = server.stats()
+    predicted = {prompt for prompt, _ in PROMPTS if controller.predictor.predict(prompt)}
+    latencies, predicted_latencies = [], []
+    for _ in range(rounds):
+        for prompt, _ in PROMPTS:
+            started = time.perf_counter()
+            ask(prompt)
+            latencies.append(time.perf_counter() - started)
+            if prompt in predicted:
+                predicted_latencies.append(latencies[-1])
+    after = server.stats()
+    requests = len(latencies)
+    tokens = (after['prompt_tokens'] + after['completion_tokens']) - (before['prompt_tokens'] + before['completion_tokens'])
+    return {
+        'mode': 'speculative' if speculate else 'coordinator',
+        'requests': requests,
+        'p50_s': round(statistics.median(latencies), 3),
+        'mean_s': round(statistics.mean(latencies), 3),
+        'p50_predicted_s': round(statistics.median(predicted_latencies), 3),
+        'llm_calls_per_request': round((after['requests'] - before['requests']) / requests, 2),
+        'tokens_per_request': round(tokens / requests, 1),
+        'speculation': controller.stats.stats() if speculate else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Coordinator latency with and without speculative specialists')
+    parser.add_argument('--rounds', type=int, default=3, help='Passes over the prompt set per mode')
+    parser.add_argument('--latency', type=float, default=0.3, help='Fake LLM seconds per model call')
+    parser.add_argument('--min-confidence', type=float, default=0.3)
+    parser.add_argument('--max-agents', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    server, llm_base_url = start_fake_llm_server(config=FakeLLMConfig(latency=args.latency, tool_script=tool_script()))
+    os.environ.update(server_env(llm_base_url))
+    results = [run_mode(server, speculate, args.rounds, args.min_confidence, args.max_agents) for speculate in (False, True)]
+    server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<13}{'p50 s':>8}{'mean s':>8}{'p50 predicted s':>17}{'calls/req':>11}{'tokens/req':>12}")
+    for row in results:
+        print(f"{row['mode']:<13}{row['p50_s']:>8}{row['mean_s']:>8}{row['p50_predicted_s']:>17}"
+              f"{row['llm_calls_per_request']:>11}{row['tokens_per_request']:>12}")
+    stats = results[1]['speculation']
+    extra = results[1]['tokens_per_request'] / results[0]['tokens_per_request'] - 1
+    print(f"\nhit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses, {stats['unused']} unused "
+          f"of {stats['launched']} launched for {stats['requests']} requests), extra tokens {extra:+.1%}")
+
+
+if __name__ == '__main__':
+    main()
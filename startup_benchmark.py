@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: import time and time to /health and /ready
+
+Measures, each over several fresh processes (median and max):
+
+  import   - `import app` with the warm-up thread off (what every worker pays
+             before it can answer anything)
+  warm-up  - building the LLM stack and one agent team after that import
+             (strands + LiteLLM imports, model and agent construction)
+  server   - for gunicorn (wsgi) and uvicorn (asgi): seconds from spawning
+             the server until /health, and then /ready, first return 200
+
+    python startup_benchmark.py --runs 5 --target wsgi asgi
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import httpx
+from load_test import HERE, SERVER_COMMANDS, free_port, server_env, start_process
+
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.warm_up()
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def measure_import(env):
+    env = dict(env, WARMUP_ON_START='false')
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE], cwd=HERE, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    import_seconds, warm_up_seconds = (float(value) for value in output.split()[-2:])
+    return import_seconds, warm_up_seconds
+
+
+def first_ok(client, url, started, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"{url} did not return 200 in time")
+
+
+def measure_server(target, env, timeout):
+    port = free_port()
+    command = [part.format(port=port) for part in SERVER_COMMANDS[target]]
+    started = time.perf_counter()
+    server = start_process(command, env)
+    try:
+        with httpx.Client(timeout=2) as client:
+            health = first_ok(client, f"http://127.0.0.1:{port}/health", started, started + timeout)
+            ready = first_ok(client, f"http://127.0.0.1:{port}/ready", started, started + timeout)
+        return health, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summary(values):
+    return {'median_s': round(statistics.median(values), 3), 'max_s': round(max(values), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time and time-to-health/ready of the web app')
+    parser.add_argument('--runs', type=int, default=3, help='Fresh processes per measurement')
+    parser.add_argument('--target', nargs='*', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+    parser.add_argument('--timeout', type=float, default=120, help='Seconds to wait for /ready')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    # No LLM calls are made; the fake base URL only keeps the app off the real API
+    env = server_env('http://127.0.0.1:9/v1')
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    results = {
+        'import': summary([row[0] for row in imports]),
+        'warm_up': summary([row[1] for row in imports]),
+    }
+    for target in args.target:
+        runs = [measure_server(target, env, args.timeout) for _ in range(args.runs)]
+        results[target] = {'health': summary([row[0] for row in runs]), 'ready': summary([row[1] for row in runs])}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'measurement':<16}{'median s':>10}{'max s':>9}")
+    print(f"{'import app':<16}{results['import']['median_s']:>10}{results['import']['max_s']:>9}")
+    print(f"{'warm-up':<16}{results['warm_up']['median_s']:>10}{results['warm_up']['max_s']:>9}")
+    for target in args.target:
+        for probe in ('health', 'ready'):
+            row = results[target][probe]
+            print(f"{target + ' /' + probe:<16}{row['median_s']:>10}{row['max_s']:>9}")
+
+
+if __name__ == '__main__':
+    main()
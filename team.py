@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Strands Agent Team definition used by the web application
+"""
+import asyncio
+import threading
+from strands import Agent, tool
+from strands.tools.executors import ConcurrentToolExecutor
+from serialization import dumps, reply_text
+from session_store import CONVERSATION_AGENTS
+from team_config import TeamConfigError, load_team_spec
+from tool_cache import memoize_tool, strip_argument
+from tool_executor import ToolConcurrencyLimit, threaded_tool
+
+# Define tools (results are memoized, see tool_cache.py; they run on the
+# tool thread pool, see tool_executor.py)
+@tool
+@threaded_tool
+@memoize_tool()
+def research_topic(topic: str) -> str:
+    """Research a given topic and provide key insights.
+
+    Args:
+        topic: The topic to research
+
+    Returns:
+        Key insights about the topic including trends, applications, and future outlook
+    """
+    return f"Research on {topic}: This field is experiencing rapid growth with significant innovations. Key areas include recent technological advances, practical applications across industries, and promising future developments. Current trends show increasing adoption and integration into various sectors."
+
+@tool
+@threaded_tool
+@memoize_tool()
+def plan_project(project_description: str) -> str:
+    """Create a structured plan for any project.
+
+    Args:
+        project_description: Brief description of the project to plan
+
+    Returns:
+        Step-by-step project plan with timeline and key milestones
+    """
+    return f"Project Plan for '{project_description}':\nPhase 1: Requirements & Research\nPhase 2: Design & Architecture\nPhase 3: Development & Implementation\nPhase 4: Testing & Quality Assurance\nPhase 5: Deployment & Launch\nPhase 6: Monitoring & Maintenance\n\nEach phase includes specific deliverables and success criteria."
+
+@tool
+@threaded_tool
+@memoize_tool(normalize=strip_argument)
+def analyze_code(code_snippet: str) -> str:
+    """Analyze code for quality, best practices, and improvements.
+
+    Args:
+        code_snippet: The code to analyze
+
+    Returns:
+        Code analysis with suggestions for improvement
+    """
+    return f"Code Analysis:\n✓ Syntax appears correct\n✓ Follows basic structure\n💡 Suggestions: Add error handling, improve documentation, consider edge cases, add unit tests for reliability."
+
+
+# Tools team.toml can give an agent, by name
+TOOLS = {'research_topic': research_topic, 'plan_project': plan_project, 'analyze_code': analyze_code}
+# Role of each member, for per-role models and history budgets
+ROLES = {'coordinator_agent': 'COORDINATOR', 'research_agent': 'RESEARCH', 'planning_agent': 'PLANNING',
+         'developer_agent': 'DEVELOPER', 'synthesis_agent': 'SYNTHESIS'}
+
+
+class AgentTeam:
+    """One conversation's coordinator and its three specialists
+
+    Args:
+        model: Model shared by every agent, or a callable mapping a role
+            ('COORDINATOR', 'RESEARCH', 'PLANNING', 'DEVELOPER', 'SYNTHESIS') to that agent's model
+        conversation_manager: Optional callable mapping a role ('COORDINATOR',
+            'RESEARCH', 'PLANNING', 'DEVELOPER') to that agent's conversation manager
+        hooks: Optional hook providers registered on every agent (e.g. metrics)
+        tool_executor: Runs the tool calls of a model turn (default: strands'
+            ConcurrentToolExecutor, so several calls in one turn run concurrently)
+        tool_limit: ToolConcurrencyLimit bounding those calls (default: 4 per turn)
+        spec: TeamSpec declaring names, prompts and tools (default: team.toml, see team_config.py)
+    """
+
+    def __init__(self, model, conversation_manager=None, hooks=None, tool_executor=None, spec=None, tool_limit=None):
+        model_for = model if callable(model) else (lambda role: model)
+        manager = conversation_manager or (lambda role: None)
+        self.hooks = list(hooks or []) + [tool_limit or ToolConcurrencyLimit()]
+        self.tool_executor = tool_executor or ConcurrentToolExecutor()
+
+        self.spec = spec or load_team_spec()
+        self.version = self.spec.version
+        self.tool_names = self.spec.tool_names
+
+        def build(key, tools=()):
+            member = self.spec.agents[key]
+            unknown = [name for name in member.tools if name not in TOOLS]
+            if unknown:
+                raise TeamConfigError(f'agents.{key}.tools: unknown tool {", ".join(unknown)} '
+                                      f'(known: {", ".join(TOOLS)})')
+            return Agent(
+                model=model_for(ROLES[key]),
+                system_prompt=member.prompt,
+                tools=[TOOLS[name] for name in member.tools] + list(tools),
+                name=member.name,
+                callback_handler=None,
+                conversation_manager=manager(ROLES[key]) if key != 'synthesis_agent' else None,
+                hooks=self.hooks,
+                tool_executor=self.tool_executor
+            )
+
+        self.research_agent = build('research_agent')
+        self.planning_agent = build('planning_agent')
+        self.developer_agent = build('developer_agent')
+        coordinator = self.spec.agents['coordinator_agent']
+        self.coordinator_agent = build('coordinator_agent', [
+            getattr(self, key).as_tool(name=self.spec.agents[key].tool_name, description=self.spec.agents[key].description)
+            for key in coordinator.delegates
+        ])
+        # Tool-less coordinator that merges parallel specialist results (see fanout.py)
+        self.synthesis_agent = build('synthesis_agent')
+
+        # Strands agents refuse concurrent invocations, so requests for the
+        # same conversation take turns (async_lock serves the ASGI app)
+        self.lock = threading.Lock()
+        self.async_lock = asyncio.Lock()
+
+    @property
+    def agents(self):
+        return [self.coordinator_agent, self.research_agent, self.planning_agent, self.developer_agent, self.synthesis_agent]
+
+    def spare_specialist(self, name):
+        """A new agent set up like a specialist, without history (see speculation.py)"""
+        agent = getattr(self, name)
+        return Agent(
+            model=agent.model,
+            system_prompt=agent.system_prompt,
+            tools=list(agent.tool_registry.registry.values()),
+            name=agent.name,
+            callback_handler=None,
+            hooks=self.hooks,
+            tool_executor=self.tool_executor
+        )
+
+    def adopt(self, other):
+        """Take over another team's conversation (history and history-manager state), e.g. after a reload"""
+        for name in CONVERSATION_AGENTS:
+            agent, previous = getattr(self, name), getattr(other, name)
+            agent.messages[:] = previous.messages
+            if type(agent.conversation_manager) is type(previous.conversation_manager):
+                agent.conversation_manager.restore_from_session(previous.conversation_manager.get_state())
+
+    def has_history(self):
+        """Whether the conversation has earlier turns; answers given with them are not reusable elsewhere"""
+        return bool(self.coordinator_agent.messages)
+
+    def record_fast_path_turn(self, prompt, agent):
+        """Copy a turn a specialist answered directly into the coordinator's history"""
+        if agent.messages is self.coordinator_agent.messages or not agent.messages:
+            return
+        if agent.messages[-1].get('role') == 'assistant':
+            self.remember_turn(prompt, reply_text(agent))
+
+    def remember_turn(self, prompt, text):
+        """Append a user/assistant exchange the coordinator did not run itself"""
+        self.coordinator_agent.messages.extend([
+            {'role': 'user', 'content': [{'text': prompt}]},
+            {'role': 'assistant', 'content': [{'text': text}]},
+        ])
+
+    def tokens_saved(self):
+        """Input tokens the team's history managers have kept out of model calls so far"""
+        return sum(getattr(agent.conversation_manager, 'tokens_saved', 0) for agent in self.agents)
+
+    def memory_bytes(self):
+        """Approximate memory held by the team's conversation history"""
+        return sum(len(dumps(agent.messages, default=str)) for agent in self.agents)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Declarative agent team definition (team.toml) and its hot reload
+
+team.toml declares the members of the team: their names, system prompts,
+tools, the tool name and description each specialist has on the
+coordinator, and optionally the model settings. load_team_spec() parses and
+validates the file once into a TeamSpec. AgentTeam builds its agents from
+that TeamSpec, so building a team never reads the file again. The spec's
+version is a hash of everything in it. It names the agent graph in
+response cache keys.
+
+TeamConfig holds the current TeamSpec. reload() reads the file again.
+apply() takes new TOML text and writes it to the file, so other workers
+pick it up too. Either way, the new spec is parsed, validated and compiled
+(AgentTeam builds a trial team from it) before anything changes. Only then
+does the current spec change, in a single assignment. Teams already
+serving a request keep the spec they were built with. When the file is
+broken, the running spec stays and the error is kept for stats().
+watch() polls the file's modification time.
+
+Kept free of strands imports so the web layer can read the spec before the
+agents are built.
+"""
+import os
+import json
+import time
+import hashlib
+import tomllib
+import threading
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'team.toml')
+# Members the router, fan-out and session snapshots address by key
+SPECIALISTS = ('research_agent', 'planning_agent', 'developer_agent')
+MEMBERS = ('coordinator_agent',) + SPECIALISTS + ('synthesis_agent',)
+MODEL_SETTINGS = {'id': str, 'max_tokens': int, 'temperature': (int, float)}
+
+
+class TeamConfigError(ValueError):
+    """A team definition that does not parse, validate or compile"""
+
+
+class AgentSpec:
+    """One team member as declared in team.toml"""
+
+    def __init__(self, key, name, prompt, tools=(), tool_name=None, description=None, delegates=(),
+                 summary=None, specialties=()):
+        self.key = key
+        self.name = name
+        self.prompt = prompt
+        self.tools = tuple(tools)
+        self.tool_name = tool_name
+        self.description = description
+        self.delegates = tuple(delegates)
+        self.summary = summary
+        self.specialties = tuple(specialties)
+
+    def to_dict(self):
+        return {
+            'name': self.name, 'prompt': self.prompt, 'tools': list(self.tools), 'tool_name': self.tool_name,
+            'description': self.description, 'delegates': list(self.delegates),
+            'summary': self.summary, 'specialties': list(self.specialties),
+        }
+
+
+class TeamSpec:
+    """A validated team definition
+
+    Args:
+        agents: {member key: AgentSpec} for every key in MEMBERS
+        model: Model settings overriding the environment ('id', 'max_tokens', 'temperature')
+        source: Where the definition came from, for error messages
+    """
+
+    def __init__(self, agents, model=None, source=None):
+        self.agents = agents
+        self.model = dict(model or {})
+        self.source = source
+        canonical = json.dumps({'agents': {key: spec.to_dict() for key, spec in sorted(agents.items())},
+                                'model': self.model}, sort_keys=True)
+        self.version = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+    @property
+    def profiles(self):
+        """Specialists then the coordinator, as the web interface lists them"""
+        return [
+            {'name': agent.name, 'description': agent.summary or agent.description or '',
+             'specialties': list(agent.specialties)}
+            for agent in (self.agents[key] for key in SPECIALISTS + ('coordinator_agent',))
+        ]
+
+    @property
+    def tool_names(self):
+        """{specialist key: its tool name on the coordinator}"""
+        return {key: self.agents[key].tool_name for key in SPECIALISTS}
+
+    @classmethod
+    def from_dict(cls, data, source=None):
+        where = source or 'team definition'
+        agents_data = data.get('agents')
+        if not isinstance(agents_data, dict):
+            raise TeamConfigError(f'{where}: missing [agents.*] tables')
+        unknown = sorted(set(agents_data) - set(MEMBERS))
+        missing = [key for key in MEMBERS if key not in agents_data]
+        if unknown or missing:
+            raise TeamConfigError(f'{where}: agents must be exactly {", ".join(MEMBERS)}'
+                                  + (f'; unknown: {", ".join(unknown)}' if unknown else '')
+                                  + (f'; missing: {", ".join(missing)}' if missing else ''))
+        agents = {}
+        for key in MEMBERS:
+            entry = agents_data[key]
+            for field in ('name', 'prompt'):
+                if not isinstance(entry.get(field), str) or not entry[field].strip():
+                    raise TeamConfigError(f'{where}: agents.{key}.{field} must be a non-empty string')
+            if key in SPECIALISTS:
+                for field in ('tool_name', 'description'):
+                    if not isinstance(entry.get(field), str) or not entry[field].strip():
+                        raise TeamConfigError(f'{where}: agents.{key}.{field} must be a non-empty string')
+            tools = entry.get('tools', [])
+            delegates = entry.get('delegates', [])
+            specialties = entry.get('specialties', [])
+            if not isinstance(tools, list) or not all(isinstance(name, str) for name in tools):
+                raise TeamConfigError(f'{where}: agents.{key}.tools must be a list of tool names')
+            if not isinstance(entry.get('summary', ''), str):
+                raise TeamConfigError(f'{where}: agents.{key}.summary must be a string')
+            if not isinstance(specialties, list) or not all(isinstance(item, str) for item in specialties):
+                raise TeamConfigError(f'{where}: agents.{key}.specialties must be a list of strings')
+            if key == 'coordinator_agent':
+                if not isinstance(delegates, list) or not set(delegates) <= set(SPECIALISTS):
+                    raise TeamConfigError(f'{where}: agents.{key}.delegates must list specialists '
+                                          f'({", ".join(SPECIALISTS)})')
+            elif delegates:
+                raise TeamConfigError(f'{where}: only the coordinator_agent has delegates')
+            agents[key] = AgentSpec(key, entry['name'], entry['prompt'], tools, entry.get('tool_name'),
+                                    entry.get('description'), delegates, entry.get('summary'), specialties)
+        names = [agent.name for agent in agents.values()]
+        if len(set(names)) != len(names):
+            raise TeamConfigError(f'{where}: agent names must be unique (usage and metrics are reported by name)')
+        tool_names = [agents[key].tool_name for key in SPECIALISTS]
+        if len(set(tool_names)) != len(tool_names):
+            raise TeamConfigError(f'{where}: specialist tool_name values must be unique')
+
+        model = data.get('model', {})
+        for field, value in model.items():
+            expected = MODEL_SETTINGS.get(field)
+            if expected is None or isinstance(value, bool) or not isinstance(value, expected):
+                raise TeamConfigError(f'{where}: unknown or mistyped model setting {field!r}')
+        return cls(agents, model, source)
+
+    @classmethod
+    def from_toml(cls, text, source=None):
+        try:
+            data = tomllib.loads(text)
+        except tomllib.TOMLDecodeError as e:
+            raise TeamConfigError(f'{source or "team definition"}: {e}') from None
+        return cls.from_dict(data, source)
+
+
+def load_team_spec(path=DEFAULT_PATH):
+    """TeamSpec from a team.toml file; raises TeamConfigError"""
+    try:
+        with open(path, 'rb') as f:
+            text = f.read().decode('utf-8')
+    except OSError as e:
+        raise TeamConfigError(f'{path}: {e.strerror}') from None
+    return TeamSpec.from_toml(text, path)
+
+
+class TeamConfig:
+    """The current TeamSpec, swapped atomically on reload
+
+    Args:
+        path: team.toml to read
+        compile: Optional callable run on a new spec before it is swapped in
+            (e.g. building a trial team); exceptions reject the spec
+    """
+
+    def __init__(self, path=DEFAULT_PATH, compile=None):
+        self.path = path
+        self.compile = compile
+        self.spec = load_team_spec(path)
+        self.loaded_at = time.time()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_reload_ms = None
+        self._mtime = self._modified()
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def on_change(self, callback):
+        """Call callback(spec) after every swap"""
+        self._listeners.append(callback)
+
+    def _modified(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _swap(self, load, persist=None):
+        """Build a spec with load(), compile it, persist it and make it current; the result of the reload"""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                spec = load()
+                if spec.version != self.spec.version and self.compile is not None:
+                    try:
+                        self.compile(spec)
+                    except TeamConfigError:
+                        raise
+                    except Exception as e:
+                        raise TeamConfigError(f'{spec.source or "team definition"}: {e}') from e
+                if persist is not None:
+                    persist()
+            except TeamConfigError as e:
+                self.failures += 1
+                self.last_error = str(e)
+                raise
+            changed = spec.version != self.spec.version
+            if changed:
+                self.spec = spec
+                self.loaded_at = time.time()
+                self.reloads += 1
+                for callback in self._listeners:
+                    callback(spec)
+            self.last_error = None
+            self.last_reload_ms = round((time.perf_counter() - started) * 1000, 2)
+        return {'changed': changed, 'version': self.spec.version, 'reload_ms': self.last_reload_ms}
+
+    def reload(self):
+        """Read the file again and swap in its spec when it changed; raises TeamConfigError"""
+        self._mtime = self._modified()
+        return self._swap(lambda: load_team_spec(self.path))
+
+    def apply(self, text):
+        """Swap in a definition given as TOML text and write it to the file; raises TeamConfigError"""
+
+        def persist():
+            temporary = f'{self.path}.{os.getpid()}.tmp'
+            try:
+                with open(temporary, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(temporary, self.path)
+            except OSError as e:
+                raise TeamConfigError(f'{self.path}: {e.strerror}') from None
+            self._mtime = self._modified()
+
+        return self._swap(lambda: TeamSpec.from_toml(text, 'request body'), persist)
+
+    def watch(self, interval=2.0):
+        """Reload whenever the file's modification time changes (daemon thread)"""
+
+        def poll():
+            while True:
+                time.sleep(interval)
+                if self._modified() == self._mtime:
+                    continue
+                try:
+                    self.reload()
+                except TeamConfigError:
+                    pass  # kept in last_error; the running spec stays
+
+        threading.Thread(target=poll, name='team-config-watch', daemon=True).start()
+
+    def stats(self):
+        spec = self.spec
+        return {
+            'path': self.path,
+            'version': spec.version,
+            'loaded_at': self.loaded_at,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_reload_ms': self.last_reload_ms,
+            'agents': {key: agent.name for key, agent in spec.agents.items()},
+            'model': spec.model,
+        }
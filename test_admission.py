@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Per-tenant caps, weighted fair ordering and 429s of admission.py
+
+Requests are queued with FairQueue.enqueue() and slots handed on with
+release(), so the grant order can be checked without threads or an LLM.
+
+    python -m pytest -q test_admission.py
+"""
+import asyncio
+from admission import FairQueue, Rejected, parse_weights, request_cost
+
+
+def grant_order(queue, tickets):
+    """Release granted tickets one at a time; the tenants in the order they got a slot"""
+    order = []
+    pending = list(tickets)
+    while pending:
+        granted = [ticket for ticket in pending if ticket.granted]
+        assert granted, 'a queued request was never granted'
+        ticket = min(granted, key=lambda ticket: ticket.granted_at)
+        order.append(ticket.tenant)
+        pending.remove(ticket)
+        queue.release(ticket)
+    return order
+
+
+def refused(queue, tenant, cost=10):
+    try:
+        queue.enqueue(tenant, cost)
+    except Rejected as e:
+        return e
+    raise AssertionError(f'{tenant} was admitted past its limits')
+
+
+def test_tenant_cap_leaves_slots_for_other_tenants():
+    queue = FairQueue(max_concurrency=4, tenant_concurrency=2, tenant_queue=4)
+    first, second, third = (queue.enqueue('heavy', 10) for _ in range(3))
+    assert first.granted and second.granted and not third.granted
+    assert queue.enqueue('light', 10).granted
+    queue.release(first)
+    assert third.granted
+
+
+def test_cheap_requests_overtake_a_tenant_sending_expensive_ones():
+    queue = FairQueue(max_concurrency=1, tenant_concurrency=1, tenant_queue=10)
+    holder = queue.enqueue('holder', 1)
+    tickets = [queue.enqueue('heavy', 1000) for _ in range(3)] + [queue.enqueue('light', 10) for _ in range(3)]
+    queue.release(holder)
+    assert grant_order(queue, tickets) == ['heavy', 'light', 'light', 'light', 'heavy', 'heavy']
+
+
+def test_weights_share_slots_in_proportion():
+    queue = FairQueue(max_concurrency=1, tenant_concurrency=1, tenant_queue=10, weights={'gold': 4})
+    holder = queue.enqueue('holder', 1)
+    tickets = [queue.enqueue('free', 100) for _ in range(3)] + [queue.enqueue('gold', 100) for _ in range(4)]
+    queue.release(holder)
+    assert grant_order(queue, tickets) == ['free', 'gold', 'gold', 'gold', 'gold', 'free', 'free']
+
+
+def test_tenant_queue_overflow_is_refused_with_retry_after():
+    queue = FairQueue(max_concurrency=1, tenant_concurrency=1, tenant_queue=1)
+    queue.enqueue('a', 10)
+    queue.enqueue('a', 10)
+    error = refused(queue, 'a')
+    assert error.reason == 'tenant_queue_full'
+    assert error.retry_after >= 1 and error.position == 2 and error.depth == 1
+    assert queue.enqueue('b', 10).tenant == 'b'
+
+
+def test_global_queue_overflow_is_refused():
+    queue = FairQueue(max_concurrency=1, tenant_concurrency=1, tenant_queue=5, max_queue=2)
+    for tenant in ('a', 'b', 'c'):
+        queue.enqueue(tenant, 10)
+    assert refused(queue, 'd').reason == 'queue_full'
+
+
+def test_expected_wait_over_max_wait_is_refused():
+    queue = FairQueue(max_concurrency=1, tenant_concurrency=1, max_wait=2, service_seconds=5)
+    queue.enqueue('a', 10)
+    assert refused(queue, 'b').reason == 'wait_too_long'
+    assert queue.stats()['rejected'] == {'wait_too_long': 1}
+
+
+def test_waiting_past_max_wait_times_out_and_leaves_the_queue():
+    queue = FairQueue(max_concurrency=1, tenant_concurrency=1, max_wait=0.05, service_seconds=0.01)
+    holder = queue.acquire('a', 10)
+    try:
+        queue.acquire('b', 10)
+    except Rejected as e:
+        assert e.reason == 'timeout'
+    else:
+        raise AssertionError('acquire() returned without a free slot')
+    assert queue.stats()['waiting'] == 0
+    queue.release(holder)
+    assert queue.stats()['running'] == 0
+
+
+def test_async_acquire_is_granted_on_release():
+    async def run():
+        queue = FairQueue(max_concurrency=1, tenant_concurrency=1)
+        holder = await queue.aacquire('a', 10)
+        waiter = asyncio.ensure_future(queue.aacquire('b', 10))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        queue.release(holder)
+        ticket = await asyncio.wait_for(waiter, 1)
+        return ticket.tenant
+
+    assert asyncio.run(run()) == 'b'
+
+
+def test_release_twice_frees_one_slot():
+    queue = FairQueue(max_concurrency=1, tenant_concurrency=1, tenant_queue=2)
+    holder = queue.enqueue('a', 10)
+    second, third = queue.enqueue('b', 10), queue.enqueue('b', 10)
+    queue.release(holder)
+    queue.release(holder)
+    assert second.granted and not third.granted
+    assert queue.stats()['running'] == 1
+
+
+def test_request_cost_and_weights():
+    assert request_cost('x' * 400, 100) == 201
+    assert parse_weights('gold=4, free=0.5,,bad') == {'gold': 4.0, 'free': 0.5}
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Conversation snapshots and session leases of agent_pool.StoreBackedAgentPool
+
+Teams are stubs holding message lists, and the store is an in-process
+MemorySessionStore, so neither agents nor Redis are needed.
+
+    python -m pytest -q test_agent_pool.py
+"""
+import time
+import asyncio
+import threading
+from agent_pool import StoreBackedAgentPool
+from session_store import CONVERSATION_AGENTS, MemorySessionStore
+
+
+class StubManager:
+    def __init__(self):
+        self.state = {'removed_message_count': 0}
+
+    def get_state(self):
+        return dict(self.state)
+
+    def restore_from_session(self, state):
+        self.state = dict(state)
+
+
+class StubAgent:
+    def __init__(self):
+        self.messages = []
+        self.conversation_manager = StubManager()
+
+
+class StubTeam:
+    def __init__(self):
+        for name in CONVERSATION_AGENTS:
+            setattr(self, name, StubAgent())
+
+
+def make_pool(lease_seconds=120):
+    return StoreBackedAgentPool(StubTeam, MemorySessionStore(cleanup_interval=0), lease_seconds=lease_seconds)
+
+
+def say(team, text):
+    team.coordinator_agent.messages.append({'role': 'user', 'content': [{'text': text}]})
+
+
+def test_each_request_gets_the_conversation_the_last_one_saved():
+    pool = make_pool()
+    assert not pool.has_history('s1')
+    with pool.checkout('s1') as team:
+        assert team.coordinator_agent.messages == []
+        say(team, 'hello')
+        team.coordinator_agent.conversation_manager.state['removed_message_count'] = 3
+    assert pool.has_history('s1') and not pool.has_history('s2')
+    with pool.checkout('s1') as team:
+        assert team.coordinator_agent.messages == [{'role': 'user', 'content': [{'text': 'hello'}]}]
+        assert team.coordinator_agent.conversation_manager.state == {'removed_message_count': 3}
+    pool.discard('s1')
+    assert not pool.has_history('s1')
+    stats = pool.stats()
+    assert (stats['loads'], stats['restored'], stats['saves']) == (2, 1, 2)
+
+
+def test_async_checkout_saves_the_turn():
+    pool = make_pool()
+
+    async def run():
+        async with pool.acheckout('s1') as team:
+            say(team, 'hello')
+        async with pool.acheckout('s1') as team:
+            return len(team.coordinator_agent.messages)
+
+    assert asyncio.run(run()) == 1
+
+
+def test_requests_for_one_session_take_turns():
+    pool = make_pool()
+    order = []
+
+    def second():
+        with pool.checkout('s1') as team:
+            order.append(len(team.coordinator_agent.messages))
+
+    with pool.checkout('s1') as team:
+        waiter = threading.Thread(target=second)
+        waiter.start()
+        time.sleep(0.1)
+        say(team, 'first turn')
+        order.append('first done')
+    waiter.join(5)
+    # The second request saw the first one's turn
+    assert order == ['first done', 1]
+    assert pool.stats()['lease_waits'] == 1
+
+
+def test_lease_is_renewed_while_a_turn_outlasts_it():
+    pool = make_pool(lease_seconds=0.3)
+    with pool.checkout('s1'):
+        time.sleep(0.7)
+        assert not pool.store.add('lease:s1', b'other worker', 0.3)
+    assert pool.stats()['lease_renewals'] >= 1
+    assert pool.store.get('lease:s1') is None
+
+
+def test_crashed_holder_lease_expires_and_waiters_back_off():
+    pool = make_pool()
+    pool.store.add('lease:s1', b'crashed worker', 0.6)
+    attempts = []
+    try_lease = pool._try_lease
+
+    def counted(session_id, token):
+        attempts.append(time.monotonic())
+        return try_lease(session_id, token)
+
+    pool._try_lease = counted
+    started = time.monotonic()
+    with pool.checkout('s1'):
+        assert time.monotonic() - started >= 0.5
+    # Fixed 20 ms polling would have tried about 30 times
+    assert len(attempts) < 10
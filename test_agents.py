@@ -1,7 +1,6 @@
-import os
 from dotenv import load_dotenv
 from strands import Agent, tool
-from strands.models.litellm import LiteLLMModel
+from model_factory import create_groq_model
 
 # Load environment variables
 load_dotenv()
@@ -10,16 +9,7 @@ load_dotenv()
 def test_groq_connection():
     """Test basic connection to Groq API"""
     try:
-        groq_model = LiteLLMModel(
-            model_id="groq/llama-3.1-8b-instant",
-            client_args={
-                "api_key": os.getenv("GROQ_API_KEY"),
-            },
-            params={
-                "temperature": 0.5,
-                "max_tokens": 100,
-            }
-        )
+        groq_model = create_groq_model(model_id="groq/llama-3.1-8b-instant", temperature=0.5, max_tokens=100)
         
         test_agent = Agent(
             model=groq_model,
@@ -5,6 +5,7 @@ Test script to verify Groq API key functionality
 import os
 from dotenv import load_dotenv
 import litellm
+from model_factory import completion
 
 # Load environment variables
 load_dotenv()
@@ -35,7 +36,7 @@ def test_api_key():
     for model in models_to_test:
         print(f"🧪 Testing model: {model}")
         try:
-            response = litellm.completion(
+            response = completion(
                 model=model,
                 messages=[{"role": "user", "content": "Hello! Respond with 'API key is working'"}],
                 api_key=api_key,
@@ -59,7 +60,7 @@ def test_api_key():
     litellm.set_verbose=True
     
     try:
-        response = litellm.completion(
+        response = completion(
             model="groq/llama-3.1-8b-instant",
             messages=[{"role": "user", "content": "Test"}],
             api_key=api_key
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Input parsing, admission and retries of batch_runner.py
+
+Teams are stubs whose agent answers after a short sleep, and admission is a
+real FairQueue, so no LLM is involved.
+
+    python -m pytest -q test_batch_runner.py
+"""
+import asyncio
+import threading
+from admission import FairQueue
+from batch_runner import BatchRunner, parse_batch_body
+
+
+class StubMetrics:
+    accumulated_usage = {}
+
+
+class StubAgent:
+    name = 'Project Planner'
+    event_loop_metrics = StubMetrics()
+
+    def __init__(self, seen):
+        self.seen = seen
+
+    async def invoke_async(self, prompt):
+        self.seen['running'] += 1
+        self.seen['peak'] = max(self.seen['peak'], self.seen['running'])
+        await asyncio.sleep(0.02)
+        self.seen['running'] -= 1
+        if prompt in self.seen['fail']:
+            self.seen['fail'].remove(prompt)
+            raise RuntimeError('model down')
+        return type('Result', (), {'message': {'role': 'assistant', 'content': [{'text': f'answer to {prompt}'}]}})()
+
+
+class StubTeam:
+    def __init__(self, seen):
+        self.agent = StubAgent(seen)
+        self.agents = [self.agent]
+        seen['built_on'].add(threading.get_ident())
+
+    def tokens_saved(self):
+        return 0
+
+
+def run(runner, body):
+    async def collect():
+        return [result async for result in runner.run(parse_batch_body(body))]
+
+    return asyncio.run(collect())
+
+
+def make_runner(seen, queue=None, **kwargs):
+    admit = None
+    if queue is not None:
+        async def admit(prompt):
+            return await queue.aacquire('acme', len(prompt))
+    return BatchRunner(lambda: StubTeam(seen), select=lambda team, prompt: (team.agent, None),
+                       admit=admit, release=queue.release if queue else None, **kwargs)
+
+
+def new_seen(fail=()):
+    return {'running': 0, 'peak': 0, 'fail': list(fail), 'built_on': set()}
+
+
+def test_jsonl_and_prompt_list_bodies():
+    jobs = parse_batch_body('{"id": "a", "prompt": "Plan a launch"}\n\nnot json\n{"request_id": "b", "title": "T", "body": "B"}')
+    assert [(job.id, job.prompt, bool(job.error)) for job in jobs] == [
+        ('a', 'Plan a launch', False), ('3', '', True), ('b', 'T\n\nB', False)]
+    jobs = parse_batch_body('{"prompts": ["Plan a launch", {"message": "Research EVs"}]}')
+    assert [(job.id, job.prompt) for job in jobs] == [('1', 'Plan a launch'), ('2', 'Research EVs')]
+
+
+def test_prompts_wait_for_the_tenants_share_and_teams_are_built_off_the_loop():
+    seen = new_seen()
+    queue = FairQueue(max_concurrency=4, tenant_concurrency=1, tenant_queue=8)
+    results = run(make_runner(seen, queue, concurrency=4), '{"prompts": ["one", "two", "three", "four"]}')
+    assert sorted(result['response'] for result in results) == [
+        'answer to four', 'answer to one', 'answer to three', 'answer to two']
+    assert seen['peak'] == 1
+    assert queue.stats()['running'] == 0
+    assert threading.get_ident() not in seen['built_on']
+
+
+def test_failed_tries_are_retried_and_bad_lines_reported():
+    seen = new_seen(fail=['one'])
+    results = {result['id']: result for result in run(make_runner(seen, max_attempts=2), '"one"\n[1]')}
+    assert results['1']['status'] == 'ok' and results['1']['attempts'] == 2
+    assert results['2']['status'] == 'error' and results['2']['attempts'] == 0
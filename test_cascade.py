@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Escalation rules and savings accounting of cascade.py
+
+Both tiers are stub models that replay canned stream events, so no LLM is
+involved.
+
+    python -m pytest -q test_cascade.py
+"""
+import asyncio
+from cascade import CascadeModel, CascadeStats, complexity, last_user_text, review
+
+ANSWER = 'Paris is the capital of France and its largest city by population.'
+TOOLS = [{'name': 'research_agent'}]
+
+
+def text_events(text, stop_reason='end_turn', usage=(100, 20)):
+    return [
+        {'messageStart': {'role': 'assistant'}},
+        {'contentBlockDelta': {'delta': {'text': text}}},
+        {'messageStop': {'stopReason': stop_reason}},
+        {'metadata': {'usage': {'inputTokens': usage[0], 'outputTokens': usage[1]}}},
+    ]
+
+
+def tool_events(name):
+    return [
+        {'contentBlockStart': {'start': {'toolUse': {'name': name, 'toolUseId': 't1'}}}},
+        {'messageStop': {'stopReason': 'tool_use'}},
+    ]
+
+
+class StubModel:
+    def __init__(self, events):
+        self.events = events
+        self.calls = 0
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        for event in self.events:
+            yield event
+
+
+def ask(prompt, small_events, mode='cascade'):
+    small, large = StubModel(small_events), StubModel(text_events('large answer ' + ANSWER))
+    stats = CascadeStats('groq/llama-3.1-8b-instant', 'groq/llama-3.3-70b-versatile')
+    model = CascadeModel(small, large, stats, role='coordinator', mode=mode)
+
+    async def collect():
+        messages = [{'role': 'user', 'content': [{'text': prompt}]}]
+        return [event async for event in model.stream(messages, TOOLS)]
+
+    events = asyncio.run(collect())
+    return events, small.calls, large.calls, stats.stats()
+
+
+def test_good_small_answers_stay_on_the_small_model():
+    events, small_calls, large_calls, stats = ask('What is the capital of France?', text_events(ANSWER))
+    assert events == text_events(ANSWER)
+    assert (small_calls, large_calls) == (1, 0)
+    assert stats['share'] == {'small': 1.0, 'large': 0.0}
+    assert stats['by_agent'] == {'coordinator': {'small': 1, 'large': 0}}
+
+
+def test_failed_small_answers_escalate_without_being_shown():
+    for small_events, reason in ((text_events('Paris.'), 'too_short'),
+                                 (text_events(ANSWER, stop_reason='max_tokens'), 'truncated'),
+                                 (text_events("I'm not sure, but it might be Paris or maybe Lyon."), 'low_confidence'),
+                                 (tool_events('missing_tool'), 'unknown_tool')):
+        events, small_calls, large_calls, stats = ask('What is the capital of France?', small_events)
+        assert events == text_events('large answer ' + ANSWER), reason
+        assert (small_calls, large_calls) == (1, 1)
+        assert stats['escalations'] == {reason: 1} and stats['wasted_small_calls'] == 1
+
+
+def test_routing_to_a_known_tool_passes_review():
+    events, _, large_calls, _ = ask('Research EVs', tool_events('research_agent'))
+    assert events == tool_events('research_agent') and large_calls == 0
+
+
+def test_complex_requests_go_straight_to_the_large_model():
+    prompt = 'Compare the architecture trade-offs of a distributed cache for scalability and security'
+    assert complexity(prompt) >= 3.0
+    _, small_calls, large_calls, stats = ask(prompt, text_events(ANSWER))
+    assert (small_calls, large_calls) == (0, 1)
+    assert stats['escalations'] == {'complex': 1} and stats['wasted_small_calls'] == 0
+
+
+def test_pinned_roles_skip_the_cascade():
+    assert ask('hi', text_events('ok'), mode='small')[1:3] == (1, 0)
+    assert ask('What is the capital of France?', text_events(ANSWER), mode='large')[1:3] == (0, 1)
+
+
+def test_complexity_and_review_helpers():
+    assert complexity('hello') < 1
+    assert complexity('```\nx = 1\n```') == 1.5 + 5 / 60.0
+    assert last_user_text([{'role': 'user', 'content': [{'text': 'first'}]},
+                           {'role': 'assistant', 'content': [{'text': 'reply'}]},
+                           {'role': 'user', 'content': [{'toolResult': {'content': []}}]}]) == 'first'
+    assert review(text_events(ANSWER), TOOLS) is None
+    assert review(text_events(ANSWER), TOOLS, min_answer_chars=200) == 'too_short'
+
+
+def test_savings_are_counted_against_the_large_model():
+    stats = CascadeStats('groq/llama-3.1-8b-instant', 'groq/llama-3.3-70b-versatile')
+    stats.prices = {'small': (0.05, 0.08), 'large': (0.59, 0.79)}
+    stats.record('coordinator', 'small', 0.2, 1_000_000, 0)
+    stats.record('coordinator', 'large', 1.0, 1_000_000, 0)
+    stats.escalated('too_short', 0.1, 1_000_000, 0)
+    report = stats.stats()
+    assert report['cost_saved_usd'] == round(0.59 - 0.05 - 0.05, 6)
+    assert report['latency_saved_s'] == round(1.0 - 0.2 - 0.1, 2)
+    assert report['tiers']['large']['mean_latency_ms'] == 1000.0
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Request splitting and the parallel specialist run of fanout.py
+
+The decomposer is driven by a keyword scorer and the team by stub agents,
+so no router rules or LLM are involved.
+
+    python -m pytest -q test_fanout.py
+"""
+import asyncio
+from fanout import ParallelFanOut, TaskDecomposer, synthesis_prompt
+
+KEYWORDS = {'research_agent': 'research', 'planning_agent': 'plan', 'developer_agent': 'code'}
+
+
+class KeywordScorer:
+    def scores(self, text):
+        return {agent: 2.0 * text.lower().count(word) for agent, word in KEYWORDS.items()}
+
+
+class Result:
+    """Stands in for an AgentResult: the reply is its final message"""
+
+    def __init__(self, text):
+        self.message = {'role': 'assistant', 'content': [{'text': text}]}
+
+    def __str__(self):
+        return f'{self.message["content"][0]["text"]}\n[metrics and trace]'
+
+
+class StubAgent:
+    def __init__(self, name, reply=None, error=None):
+        self.name = name
+        self.reply = reply
+        self.error = error
+        self.messages = []
+        self.prompts = []
+
+    async def invoke_async(self, prompt):
+        self.prompts.append(prompt)
+        if self.error:
+            raise self.error
+        return Result(self.reply)
+
+
+class StubTeam:
+    def __init__(self, **agents):
+        self.coordinator_agent = StubAgent('Team Coordinator')
+        self.synthesis_agent = StubAgent('Team Synthesizer', reply='merged answer')
+        self.tool_names = {}
+        for key, agent in agents.items():
+            setattr(self, key, agent)
+
+
+def test_request_spanning_two_specialists_is_split():
+    decomposer = TaskDecomposer(KeywordScorer())
+    assert decomposer.decompose('Research blockchain and then plan a blockchain project') == [
+        ('research_agent', 'Research blockchain'), ('planning_agent', 'plan a blockchain project')]
+
+
+def test_single_domain_or_weak_requests_are_left_alone():
+    decomposer = TaskDecomposer(KeywordScorer(), min_score=4.0)
+    assert decomposer.decompose('Research blockchain and research its history') == []
+    assert decomposer.decompose('Research blockchain and plan a project') == []
+
+
+def test_unscored_clauses_join_the_clause_before_them():
+    decomposer = TaskDecomposer(KeywordScorer())
+    assert decomposer.decompose('Research blockchain, then summarize it; plan a project') == [
+        ('research_agent', 'Research blockchain and summarize it'), ('planning_agent', 'plan a project')]
+
+
+def test_repeat_visits_to_a_specialist_are_merged():
+    decomposer = TaskDecomposer(KeywordScorer())
+    assert decomposer.decompose('Research competitors. Plan the launch. Research pricing') == [
+        ('research_agent', 'Research competitors. Research pricing'), ('planning_agent', 'Plan the launch')]
+
+
+def test_code_blocks_are_never_split():
+    decomposer = TaskDecomposer(KeywordScorer())
+    assert decomposer.clauses('Review this code:\n```\nresearch(); plan()\n```') == [
+        'Review this code:\n```\nresearch(); plan()\n```']
+
+
+def test_specialists_run_together_and_their_reply_text_is_synthesized():
+    team = StubTeam(research_agent=StubAgent('Research Analyst', reply='research notes'),
+                    planning_agent=StubAgent('Project Planner', reply='a plan'))
+    team.synthesis_agent.messages.append({'role': 'user', 'content': [{'text': 'an earlier synthesis'}]})
+    fanout = ParallelFanOut(team, [('research_agent', 'Research blockchain'), ('planning_agent', 'plan a project')])
+    result = asyncio.run(fanout.invoke_async('Research blockchain and plan a project'))
+    assert result.message['content'][0]['text'] == 'merged answer'
+    assert fanout.name == 'Team Coordinator'
+    assert team.research_agent.prompts == ['Research blockchain']
+    # Only the reply text goes into the synthesis prompt, not the result's str()
+    assert team.synthesis_agent.prompts == [synthesis_prompt(
+        'Research blockchain and plan a project', [('Research Analyst', 'research notes'), ('Project Planner', 'a plan')])]
+    assert team.synthesis_agent.messages == []
+
+
+def test_failed_specialist_is_reported_to_the_synthesis():
+    team = StubTeam(research_agent=StubAgent('Research Analyst', error=RuntimeError('model down')),
+                    planning_agent=StubAgent('Project Planner', reply='a plan'))
+    fanout = ParallelFanOut(team, [('research_agent', 'Research blockchain'), ('planning_agent', 'plan a project')])
+    assert asyncio.run(fanout.run_specialists()) == [
+        ('Research Analyst', '(unavailable: model down)'), ('Project Planner', 'a plan')]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Hedge deadlines, races, budget and stats of hedging.py
+
+Primary and hedge are stub models with scripted delays before their first
+output, so no LLM is involved.
+
+    python -m pytest -q test_hedging.py
+"""
+import asyncio
+from hedging import HedgeBudget, HedgedModel, HedgeStats, percentile
+
+
+class StubModel:
+    def __init__(self, name, delays, error=None):
+        self.name = name
+        self.delays = list(delays)
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        delay = self.delays.pop(0) if len(self.delays) > 1 else self.delays[0]
+        yield {'messageStart': {'role': 'assistant'}}
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        yield {'contentBlockDelta': {'delta': {'text': self.name}}}
+        yield {'messageStop': {'stopReason': 'end_turn'}}
+
+
+class BusyScheduler:
+    def estimated_wait(self):
+        return 1.0
+
+
+def answer(model):
+    async def collect():
+        return [event async for event in model.stream([{'role': 'user', 'content': [{'text': 'hi'}]}])]
+
+    events = asyncio.run(collect())
+    return ''.join(event['contentBlockDelta']['delta']['text'] for event in events if 'contentBlockDelta' in event)
+
+
+def hedged(primary, hedge=None, budget=None, **kwargs):
+    return HedgedModel(primary, HedgeStats(), budget or HedgeBudget(max_extra=1.0), hedge=hedge,
+                       initial_delay=0.05, **kwargs)
+
+
+def test_fast_primary_is_not_hedged():
+    primary, hedge = StubModel('primary', [0.01]), StubModel('hedge', [0.01])
+    model = hedged(primary, hedge)
+    assert answer(model) == 'primary'
+    assert hedge.calls == 0 and model.stats.counts['unhedged'] == 1
+
+
+def test_slow_primary_loses_to_the_hedge_and_is_cancelled():
+    primary, hedge = StubModel('primary', [0.5]), StubModel('hedge', [0.01])
+    model = hedged(primary, hedge)
+    assert answer(model) == 'hedge'
+    assert primary.cancelled == 1
+    stats = model.stats.stats()
+    assert stats['hedge_won'] == 1 and stats['hedge_rate'] == 1.0
+    assert stats['first_output_s']['p50'] < 0.2 <= stats['first_output_without_hedging_s']['p50'] + 0.15
+
+
+def test_primary_that_answers_first_still_wins():
+    primary, hedge = StubModel('primary', [0.08]), StubModel('hedge', [0.5])
+    model = hedged(primary, hedge)
+    assert answer(model) == 'primary'
+    assert hedge.cancelled == 1 and model.stats.counts['primary_won'] == 1
+
+
+def test_hedge_rescues_a_failed_primary():
+    primary = StubModel('primary', [0.1], error=RuntimeError('upstream 502'))
+    model = hedged(primary, StubModel('hedge', [0.1]))
+    assert answer(model) == 'hedge'
+    assert model.stats.stats()['rescued_errors'] == 1
+
+
+def test_no_hedge_without_budget_or_while_our_own_queue_is_busy():
+    budget = HedgeBudget(max_extra=0.0, burst=1.0)
+    model = hedged(StubModel('primary', [0.1]), StubModel('hedge', [0.01]), budget=budget)
+    assert answer(model) == 'hedge'
+    assert answer(model) == 'primary'
+    assert model.stats.counts['skipped_budget'] == 1
+    busy = hedged(StubModel('primary', [0.1]), StubModel('hedge', [0.01]), scheduler=BusyScheduler())
+    assert answer(busy) == 'primary' and busy.stats.counts['skipped_busy'] == 1
+
+
+def test_budget_earns_a_fraction_of_a_hedge_per_call():
+    budget = HedgeBudget(max_extra=0.25, burst=2.0)
+    assert budget.spend() and not budget.spend()
+    for _ in range(4):
+        budget.earn()
+    assert budget.spend() and not budget.spend()
+    for _ in range(40):
+        budget.earn()
+    assert budget.credits == 2.0
+
+
+def test_deadline_follows_recent_first_output_within_bounds():
+    model = HedgedModel(StubModel('primary', [0.0]), HedgeStats(), HedgeBudget(), min_samples=3,
+                        min_delay=0.2, max_delay=1.0, initial_delay=2.0)
+    assert model.deadline() == 2.0
+    for seconds in (0.3, 0.4, 0.5):
+        model.first_output.add(seconds)
+    assert model.deadline() == 0.5
+    model.first_output.add(0.01)
+    model.quantile = 1
+    assert model.deadline() == 0.2
+    model.first_output.add(5.0)
+    model.quantile = 100
+    assert model.deadline() == 1.0
+    assert percentile([3, 1, 2, 4], 50) == 2 and percentile([], 99) is None
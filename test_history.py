@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tool-output stripping, trimming and the rolling summary of history.py
+
+The manager works on a stub agent's message list and keeps its summary
+extractive, so no LLM is involved.
+
+    python -m pytest -q test_history.py
+"""
+from history import SUMMARY_PREFIX, TokenBudgetConversationManager, estimate_tokens
+
+
+class StubAgent:
+    def __init__(self, messages):
+        self.messages = messages
+
+
+def text(role, value):
+    return {'role': role, 'content': [{'text': value}]}
+
+
+def tool_turn(tool_id, output):
+    return [
+        {'role': 'assistant', 'content': [{'toolUse': {'toolUseId': tool_id, 'name': 'lookup', 'input': {}}}]},
+        {'role': 'user', 'content': [{'toolResult': {'toolUseId': tool_id, 'status': 'success',
+                                                     'content': [{'text': output}]}}]},
+    ]
+
+
+def conversation(turns, size=400):
+    messages = []
+    for n in range(turns):
+        messages += [text('user', f'question {n} ' + 'q' * size), text('assistant', f'answer {n} ' + 'a' * size)]
+    return messages
+
+
+def test_old_bulky_tool_results_are_stripped():
+    messages = [text('user', 'look it up'), *tool_turn('t1', 'x' * 1000), text('assistant', 'found it'),
+                text('user', 'again'), *tool_turn('t2', 'y' * 1000), text('assistant', 'found it again')]
+    manager = TokenBudgetConversationManager(max_tokens=10000, keep_tool_results=4)
+    manager.apply_management(StubAgent(messages))
+    old = messages[2]['content'][0]['toolResult']['content'][0]['text']
+    recent = messages[6]['content'][0]['toolResult']['content'][0]['text']
+    assert old.startswith('[') and old.endswith('tool output removed from history]')
+    assert recent == 'y' * 1000
+    assert manager.stripped_tool_results == 1 and manager.removed_tokens > 200
+    # Stripping twice does not count twice
+    manager.apply_management(StubAgent(messages))
+    assert manager.stripped_tool_results == 1
+
+
+def test_history_over_budget_is_trimmed_into_a_summary():
+    messages = conversation(6)
+    manager = TokenBudgetConversationManager(max_tokens=500, summary_max_tokens=100)
+    manager.apply_management(StubAgent(messages))
+    assert estimate_tokens(messages) <= 500 + manager.summary_max_tokens
+    assert messages[0]['role'] == 'user' and messages[0]['content'][0]['text'].startswith(SUMMARY_PREFIX)
+    # The extractive summary keeps the latest evicted turns within its cap
+    assert 'User: question' in manager.summary and len(manager.summary) <= 100 * 4 + 1
+    assert manager.removed_message_count == 12 - len(messages)
+    assert manager.tokens_saved_per_call() > 0
+
+
+def test_summary_is_carried_on_the_first_message_only():
+    messages = conversation(6)
+    manager = TokenBudgetConversationManager(max_tokens=500)
+    agent = StubAgent(messages)
+    manager.apply_management(agent)
+    messages += conversation(3)
+    manager.apply_management(agent)
+    carriers = [m for m in messages for block in m['content'] if block.get('text', '').startswith(SUMMARY_PREFIX)]
+    assert carriers == [messages[0]]
+
+
+def test_history_under_budget_is_left_alone():
+    messages = conversation(2, size=20)
+    before = [dict(m) for m in messages]
+    manager = TokenBudgetConversationManager(max_tokens=3000)
+    manager.apply_management(StubAgent(messages))
+    assert messages == before and manager.summary == ''
+
+
+def test_compact_to_waits_for_the_budget_then_compacts_below_it():
+    manager = TokenBudgetConversationManager(max_tokens=1000, compact_to=0.5, summary_max_tokens=50)
+    messages = conversation(3)
+    agent = StubAgent(messages)
+    manager.apply_management(agent)
+    assert manager.compactions == 0 and len(messages) == 6
+    messages += conversation(2)
+    manager.apply_management(agent)
+    assert manager.compactions == 1
+    assert estimate_tokens(messages) <= 500 + manager.summary_max_tokens
+    # Appending after a compaction keeps the prefix as it was
+    prefix = [dict(m) for m in messages]
+    messages.append(text('user', 'short follow-up'))
+    manager.apply_management(agent)
+    assert messages[:len(prefix)] == prefix and manager.compactions == 1
+
+
+def test_state_round_trips_the_summary_and_counters():
+    manager = TokenBudgetConversationManager(max_tokens=500)
+    manager.apply_management(StubAgent(conversation(6)))
+    restored = TokenBudgetConversationManager(max_tokens=500)
+    restored.restore_from_session(manager.get_state())
+    assert restored.summary == manager.summary
+    assert restored.removed_message_count == manager.removed_message_count
+    assert restored.stats()['tokens_saved_per_call'] == manager.stats()['tokens_saved_per_call']
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Prefix stability of the requests the team sends, checked offline
+
+Runs multi-turn coordinator conversations against fake_llm_server.py and
+captures every request the model formats. The model, tools and system
+message must be byte-identical on every call, and each request's messages
+must start with the previous request's messages byte for byte, except right
+after the history manager compacts.
+
+    python -m pytest -q test_prompt_prefix.py
+"""
+import os
+import json
+from contextlib import contextmanager
+from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+from load_test import server_env
+
+TURNS = [
+    'Research the market for developer tools and summarize the competitors',
+    'Plan a six week launch for the developer tools product',
+    'Review this code: def add(a, b): return a + b',
+    'Research pricing models used by similar developer tools',
+    'Plan the hiring needed for the launch team',
+    'Review this code: def div(a, b): return a / b',
+] * 2
+
+
+def tool_script():
+    return [
+        {'match': '^Research', 'tools': ['research_analyst', 'research_topic']},
+        {'match': '^Plan', 'tools': ['project_planner', 'plan_project']},
+        {'match': '^Review', 'tools': ['senior_developer', 'analyze_code']},
+    ]
+
+
+def run_conversation(compact_to, max_tokens=1500):
+    """Captured coordinator requests: [(compactions so far, serialized prefix, [serialized messages])]"""
+    from model_factory import create_groq_model, run_sync
+    from history import TokenBudgetConversationManager
+    from team import AgentTeam
+
+    model = create_groq_model(max_tokens=200, frozen_prefix=True)
+    managers = {}
+    team = AgentTeam(model, conversation_manager=lambda role: managers.setdefault(
+        role, TokenBudgetConversationManager(max_tokens=max_tokens, compact_to=compact_to)))
+    manager = managers['COORDINATOR']
+
+    captured = []
+    format_request = model.format_request
+
+    def capture(messages, tool_specs=None, system_prompt=None, *args, **kwargs):
+        request = format_request(messages, tool_specs, system_prompt, *args, **kwargs)
+        if system_prompt == team.coordinator_agent.system_prompt:
+            system = [message for message in request['messages'] if message['role'] == 'system']
+            rest = [json.dumps(message) for message in request['messages'] if message['role'] != 'system']
+            captured.append((manager.compactions, json.dumps([request['model'], request['tools'], system]), rest))
+        return request
+
+    model.format_request = capture
+    for prompt in TURNS:
+        run_sync(team.coordinator_agent.invoke_async(prompt))
+    return captured, manager
+
+
+@contextmanager
+def fake_server():
+    """A fake LLM server, with the environment pointed at it until the block exits"""
+    server, url = start_fake_llm_server(config=FakeLLMConfig(latency=0, tool_script=tool_script()))
+    saved = dict(os.environ)
+    os.environ.update(server_env(url))
+    try:
+        yield server
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        server.shutdown()
+
+
+def test_system_prompt_and_tools_identical_across_turns():
+    with fake_server():
+        captured, _ = run_conversation(compact_to=0.6)
+    assert len(captured) >= len(TURNS) * 2
+    assert len({prefix for _, prefix, _ in captured}) == 1
+
+
+def test_history_is_append_only_between_compactions():
+    with fake_server():
+        captured, manager = run_conversation(compact_to=0.6)
+    assert manager.compactions > 0, 'conversation never reached the history budget'
+    extended = 0
+    for (before_compactions, _, before), (after_compactions, _, after) in zip(captured, captured[1:]):
+        if after_compactions != before_compactions:
+            continue
+        assert after[:len(before)] == before
+        extended += 1
+    assert extended >= len(captured) - manager.compactions - 1
+
+
+def test_per_turn_trimming_rewrites_the_prefix():
+    """The legacy mode this replaces: stripping and trimming every turn changes earlier messages"""
+    with fake_server():
+        captured, _ = run_conversation(compact_to=None)
+    rewritten = sum(after[:len(before)] != before for (_, _, before), (_, _, after) in zip(captured, captured[1:]))
+    assert rewritten > 0
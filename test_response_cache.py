@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Expiry, LRU eviction, rekeying and semantic matching of response_cache.py
+
+    python -m pytest -q test_response_cache.py
+"""
+import time
+from response_cache import MemoryCacheBackend, ResponseCache, SemanticIndex, normalize_prompt
+
+
+def make_cache(semantic_threshold=None, ttl_seconds=3600, max_entries=1000):
+    index = SemanticIndex(semantic_threshold) if semantic_threshold else None
+    return ResponseCache(MemoryCacheBackend(max_entries), 'groq/llama-3.1-8b-instant', 0.7, 'v1',
+                         ttl_seconds=ttl_seconds, semantic_index=index)
+
+
+def test_exact_hit_after_normalization():
+    cache = make_cache()
+    cache.put('Plan a launch for our product', 'the plan', 'Project Planner')
+    entry = cache.get('  plan a LAUNCH   for our product?!')
+    assert entry['response'] == 'the plan' and entry['agent'] == 'Project Planner' and entry['match'] == 'exact'
+    assert normalize_prompt(' Plan\n a launch. ') == 'plan a launch'
+
+
+def test_miss_and_empty_replies_are_not_stored():
+    cache = make_cache()
+    cache.put('Plan a launch for our product', '')
+    assert cache.get('Plan a launch for our product') is None
+    assert cache.stats() == {'lookups': 1, 'exact_hits': 0, 'semantic_hits': 0, 'misses': 1, 'hit_rate': 0.0}
+
+
+def test_entries_expire_after_their_ttl():
+    backend = MemoryCacheBackend()
+    backend.set('fresh', 'value', 60)
+    backend.set('stale', 'value', 0.01)
+    time.sleep(0.02)
+    assert backend.get('fresh') == 'value'
+    assert backend.get('stale') is None
+    assert len(backend) == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set('a', 1, 60)
+    backend.set('b', 2, 60)
+    assert backend.get('a') == 1
+    backend.set('c', 3, 60)
+    assert backend.get('b') is None
+    assert (backend.get('a'), backend.get('c')) == (1, 3)
+
+
+def test_rekey_hides_entries_of_the_previous_model_or_graph():
+    cache = make_cache(semantic_threshold=0.5)
+    cache.put('Plan a launch for our product', 'the plan')
+    cache.rekey('groq/llama-3.1-8b-instant', 0.7, 'v2')
+    assert cache.get('Plan a launch for our product') is None
+    assert cache.semantic_index.nearest('plan a launch for our product') == (None, 0.0)
+    cache.rekey('groq/llama-3.1-8b-instant', 0.7, 'v1')
+    assert cache.get('Plan a launch for our product')['response'] == 'the plan'
+
+
+def test_model_and_temperature_are_part_of_the_key():
+    cache = make_cache()
+    key = cache.key_for('Plan a launch')
+    cache.rekey('groq/llama-3.3-70b-versatile', 0.7, 'v1')
+    assert cache.key_for('Plan a launch') != key
+    cache.rekey('groq/llama-3.1-8b-instant', 0.2, 'v1')
+    assert cache.key_for('Plan a launch') != key
+
+
+def test_semantic_match_needs_the_threshold():
+    cache = make_cache(semantic_threshold=0.8)
+    cache.put('Research the latest trends in electric vehicles', 'EV trends')
+    entry = cache.get('research the latest trends in electric vehicles today')
+    assert entry['response'] == 'EV trends' and entry['match'] == 'semantic'
+    assert cache.get('Plan a marketing campaign for electric bikes') is None
+    assert cache.stats()['semantic_hits'] == 1
+
+
+def test_semantic_index_drops_entries_the_backend_expired():
+    cache = make_cache(semantic_threshold=0.8, ttl_seconds=0.01)
+    cache.put('Research the latest trends in electric vehicles', 'EV trends')
+    time.sleep(0.02)
+    assert cache.get('research the latest trends in electric vehicles today') is None
+    assert cache.semantic_index.nearest('research the latest trends in electric vehicles') == (None, 0.0)
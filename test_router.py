@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Rule scores, thresholds and the TF-IDF fallback of router.py
+
+    python -m pytest -q test_router.py
+"""
+from router import (DEFAULT_EXAMPLES, DEVELOPER, PLANNING, RESEARCH, FastPathRouter, RouteDecision,
+                    TfidfClassifier)
+
+
+def route(message, classifier=False):
+    router = FastPathRouter(classifier=TfidfClassifier(DEFAULT_EXAMPLES) if classifier else None)
+    return router.route(message)
+
+
+def test_clear_requests_take_the_fast_path():
+    assert route('Research the latest trends in AI').to_dict() == {
+        'agent': RESEARCH, 'confidence': 1.0, 'method': 'rules'}
+    assert route('Create a roadmap with milestones for the launch').agent == PLANNING
+    assert route('Review this code: def add(a, b): return a + b').agent == DEVELOPER
+
+
+def test_code_shaped_declarations_count_for_the_developer():
+    for message in ('let total = 0; why is it wrong', 'const x = 1 breaks the build', 'class Cart(Base): ...',
+                    'function render() { }', 'import os\nprint(os.getcwd())', 'from pathlib import Path',
+                    'write a go func that retries', 'my goroutines leak'):
+        assert FastPathRouter().scores(message)[DEVELOPER] >= 1.0, message
+
+
+def test_plain_english_is_not_mistaken_for_code():
+    assert route("let's go over the plan: milestones for Q3").agent == PLANNING
+    for message in ("let's go over it: what went well", 'Go ahead and let me know', 'We need to import goods',
+                    'the class is full: help', 'I want to go: where next', 'let x == y be our rule'):
+        assert FastPathRouter().scores(message)[DEVELOPER] == 0, message
+
+
+def test_mixed_or_weak_requests_fall_back_to_the_coordinator():
+    mixed = route('Plan the project and research the competitors and review this code')
+    assert not mixed.fast_path and mixed.method == 'fallback' and 0 < mixed.confidence < 0.5
+    assert not route('hello there').fast_path
+    # One weak developer keyword is below min_score
+    assert not route('Why does this function throw an exception').fast_path
+
+
+def test_classifier_routes_what_the_rules_miss():
+    decision = route('Give me insights on the electric vehicle market', classifier=True)
+    assert decision.agent == RESEARCH and decision.method == 'classifier' and decision.confidence >= 0.35
+    # It only breaks ties in favour of the rules' own leader
+    assert not route('Plan the project and research the competitors and review this code', classifier=True).fast_path
+
+
+def test_tfidf_classifier_nearest_centroid():
+    classifier = TfidfClassifier(DEFAULT_EXAMPLES)
+    label, similarity = classifier.predict('Refactor my Python class')
+    assert label == DEVELOPER and 0 < similarity <= 1
+    assert classifier.predict('zzz qqq') == (None, 0.0)
+
+
+def test_custom_rules_and_thresholds():
+    router = FastPathRouter(rules={RESEARCH: [(r'\bsurvey\b', 1.0)], PLANNING: [(r'\bschedule\b', 1.0)]},
+                            min_score=1.0, min_share=0.6)
+    assert router.route('Survey the users').agent == RESEARCH
+    assert not router.route('Survey the users and schedule interviews').fast_path
+
+
+def test_stats_count_fast_path_and_fallback():
+    router = FastPathRouter()
+    router.route('Research the latest trends in AI')
+    router.route('Review this code: def f(x): return x')
+    router.route('hello there')
+    stats = router.stats()
+    assert (stats['requests'], stats['fast_path'], stats['fallback']) == (3, 2, 1)
+    assert stats['by_agent'] == {RESEARCH: 1, DEVELOPER: 1}
+    assert stats['by_method'] == {'rules': 2, 'classifier': 0}
+    assert RouteDecision().to_dict() == {'agent': None, 'confidence': 0.0, 'method': 'fallback'}
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Token buckets, priority queueing, 429 retries and load shedding of scheduler.py
+
+No LLM is involved: the buckets are driven with explicit clocks and the
+transport with an httpx.MockTransport that answers 429 before it answers 200.
+
+    python -m pytest -q test_scheduler.py
+"""
+import time
+import asyncio
+import httpx
+from scheduler import (PRIORITY_BATCH, PRIORITY_INTERACTIVE, Overloaded, RateLimitScheduler, ScheduledTransport,
+                       TokenBucket, parse_duration)
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity():
+    bucket = TokenBucket(10, 2)
+    now = bucket.updated
+    bucket.take(10, now)
+    assert bucket.wait_time(4, now) == 2.0
+    assert bucket.wait_time(4, now + 1) == 1.0
+    assert bucket.wait_time(4, now + 100) == 0.0
+    assert bucket.level == 10
+
+
+def test_bucket_request_larger_than_capacity_waits_for_a_full_bucket():
+    bucket = TokenBucket(10, 5)
+    now = bucket.updated
+    bucket.take(4, now)
+    assert bucket.wait_time(50, now) == (10 - 6) / 5
+    bucket.take(50, now + 10)
+    assert bucket.level == 0
+
+
+def test_bucket_sync_adopts_the_server_budget():
+    bucket = TokenBucket(100, 100 / 60)
+    bucket.sync(30, 0, 15, bucket.updated)
+    assert (bucket.capacity, bucket.level, bucket.rate) == (30, 0, 2)
+
+
+def test_parse_duration():
+    assert parse_duration('7.66s') == 7.66
+    assert abs(parse_duration('2m59.56s') - 179.56) < 1e-9
+    assert parse_duration('120ms') == 0.12
+    assert parse_duration('3') == 3.0
+    assert parse_duration(None) is None
+    assert parse_duration('soon') is None
+
+
+def test_interactive_calls_are_served_before_earlier_batch_calls():
+    async def run():
+        scheduler = RateLimitScheduler()
+        scheduler.buckets['rpm'] = TokenBucket(1, 20)
+        await scheduler.acquire()
+        order = []
+
+        async def call(name, priority):
+            await scheduler.acquire(priority=priority)
+            order.append(name)
+
+        batch = asyncio.ensure_future(call('batch', PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        await asyncio.gather(call('interactive', PRIORITY_INTERACTIVE), batch)
+        return order
+
+    assert asyncio.run(run()) == ['interactive', 'batch']
+
+
+def test_observe_learns_request_budget_from_headers():
+    scheduler = RateLimitScheduler()
+    delay = scheduler.observe(200, {
+        'x-ratelimit-limit-requests': '30',
+        'x-ratelimit-remaining-requests': '10',
+        'x-ratelimit-reset-requests': '40s',
+    })
+    assert delay is None
+    bucket = scheduler.buckets['requests']
+    assert (bucket.capacity, bucket.level, bucket.rate) == (30, 10, 0.5)
+
+
+def mock_transport(statuses, headers=None):
+    """MockTransport answering with each status in turn; records how many requests it saw"""
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(statuses[min(len(seen), len(statuses)) - 1], headers=headers or {}, json={})
+
+    return httpx.MockTransport(handler), seen
+
+
+def send(transport):
+    async def run():
+        async with httpx.AsyncClient(transport=transport, base_url='http://llm') as client:
+            return await client.post('/chat/completions', json={'max_tokens': 10})
+
+    return asyncio.run(run())
+
+
+def test_429_is_retried_after_the_backoff():
+    scheduler = RateLimitScheduler(backoff_seconds=0.01, max_backoff_seconds=0.02)
+    inner, seen = mock_transport([429, 200], {'retry-after': '0.05'})
+    started = time.monotonic()
+    response = send(ScheduledTransport(inner, scheduler))
+    assert response.status_code == 200
+    assert len(seen) == 2
+    assert time.monotonic() - started >= 0.05
+    assert scheduler.stats()['throttled'] == 1
+    assert scheduler.stats()['calls'] == 2
+
+
+def test_429_is_returned_once_retries_run_out():
+    scheduler = RateLimitScheduler(max_retries=1, backoff_seconds=0.01, max_backoff_seconds=0.01)
+    inner, seen = mock_transport([429])
+    assert send(ScheduledTransport(inner, scheduler)).status_code == 429
+    assert len(seen) == 2
+
+
+def test_admit_sheds_when_the_queue_cannot_be_served_in_time():
+    scheduler = RateLimitScheduler(max_wait_seconds=30)
+    scheduler.admit()
+    scheduler.buckets['rpm'] = TokenBucket(1, 0.01)
+    scheduler.buckets['rpm'].take(1, time.monotonic())
+    try:
+        scheduler.admit()
+    except Overloaded as e:
+        assert e.retry_after > 30
+    else:
+        raise AssertionError('admit() took a request it could not serve in time')
+    assert scheduler.stats()['shed'] == 1
+
+
+def test_admit_sheds_when_too_many_calls_wait_ahead():
+    async def run():
+        scheduler = RateLimitScheduler(max_queue=2)
+        scheduler._resume_at = time.monotonic() + 0.1
+        waiting = [asyncio.ensure_future(scheduler.acquire(priority=PRIORITY_INTERACTIVE)) for _ in range(2)]
+        await asyncio.sleep(0)
+        outcomes = []
+        for priority in (PRIORITY_INTERACTIVE, -1):
+            try:
+                scheduler.admit(priority)
+                outcomes.append('admitted')
+            except Overloaded:
+                outcomes.append('shed')
+        await asyncio.gather(*waiting)
+        return outcomes
+
+    # Only waiters at or above a request's priority count against it
+    assert asyncio.run(run()) == ['shed', 'admitted']
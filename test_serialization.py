@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Reply text, usage accounting and wire encodings of serialization.py
+
+    python -m pytest -q test_serialization.py
+"""
+import json
+import serialization
+from serialization import agent_usage, chat_payload, dumps, encode, json_text, reply_text, usage_snapshot
+
+
+class StubMetrics:
+    def __init__(self, usage):
+        self.accumulated_usage = usage
+
+
+class StubAgent:
+    def __init__(self, name, usage=None, messages=()):
+        self.name = name
+        self.event_loop_metrics = StubMetrics(dict(usage or {}))
+        self.messages = list(messages)
+
+
+class StubResult:
+    def __init__(self, content):
+        self.message = {'role': 'assistant', 'content': content}
+
+    def __str__(self):
+        return 'text plus metrics and trace'
+
+
+def test_reply_text_reads_the_final_message_only():
+    result = StubResult([{'toolUse': {'name': 'research_agent'}}, {'text': 'Hello, '}, {'text': 'world'}])
+    assert reply_text(result) == 'Hello, world'
+    agent = StubAgent('Team Coordinator', messages=[
+        {'role': 'assistant', 'content': [{'text': 'earlier'}]},
+        {'role': 'assistant', 'content': [{'text': 'latest'}]},
+        {'role': 'user', 'content': [{'text': 'a follow-up'}]},
+    ])
+    assert reply_text(agent) == 'latest'
+    assert reply_text(StubAgent('Team Coordinator')) == ''
+
+
+def test_usage_counts_only_what_each_agent_spent_since_the_snapshot():
+    idle = StubAgent('Research Analyst', {'inputTokens': 50, 'outputTokens': 5, 'totalTokens': 55})
+    busy = StubAgent('Team Coordinator', {'inputTokens': 100, 'outputTokens': 10, 'totalTokens': 110})
+    before = usage_snapshot([idle, busy])
+    busy.event_loop_metrics.accumulated_usage.update(
+        inputTokens=300, outputTokens=40, cacheReadInputTokens=120, totalTokens=340)
+    breakdown = agent_usage(before, [idle, busy])
+    assert breakdown == [{'name': 'Team Coordinator', 'input_tokens': 200, 'output_tokens': 30,
+                          'cached_tokens': 120, 'total_tokens': 230}]
+    payload = chat_payload('answer', 'Team Coordinator', agents=breakdown, tokens_saved=7)
+    assert payload['usage'] == {'input_tokens': 200, 'output_tokens': 30, 'cached_tokens': 120,
+                                'total_tokens': 230, 'tokens_saved': 7}
+
+
+def test_chat_payload_schema():
+    payload = chat_payload('answer', 'Research Analyst')
+    assert set(payload) == {'response', 'agent', 'cached', 'agents', 'usage', 'tokens_saved', 'timestamp'}
+    cached = chat_payload('answer', 'Research Analyst', cached=True, cache_match='exact', timings={'total_ms': 3})
+    assert (cached['cache_match'], cached['timings']) == ('exact', {'total_ms': 3})
+
+
+def test_json_is_compact_utf8_and_round_trips():
+    payload = chat_payload('Café ☕ ready', 'Project Planner', agents=[], tokens_saved=0)
+    body = dumps(payload)
+    assert isinstance(body, bytes) and b', ' not in body and 'Café ☕'.encode('utf-8') in body
+    assert json.loads(body) == payload
+    assert json_text({'a': 1}) == '{"a":1}'
+    assert encode(payload) == (body, 'application/json')
+
+
+def test_msgpack_is_negotiated_from_accept():
+    if serialization.msgpack is None:
+        # Without the msgpack package every client gets JSON
+        assert not serialization.wants_msgpack('application/msgpack')
+        assert encode({'a': 1}, 'application/msgpack')[1] == 'application/json'
+        return
+    assert serialization.wants_msgpack('application/msgpack')
+    assert serialization.wants_msgpack('application/json;q=0.5, application/x-msgpack')
+    assert not serialization.wants_msgpack('application/json, application/msgpack;q=0.9')
+    assert not serialization.wants_msgpack('*/*')
+    body, content_type = encode({'response': 'hi'}, 'application/msgpack')
+    assert content_type == 'application/msgpack'
+    assert serialization.msgpack.unpackb(body, raw=False) == {'response': 'hi'}
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Leader/follower hand-off, scoping and abandoned flights of singleflight.py
+
+    python -m pytest -q test_singleflight.py
+"""
+import asyncio
+import threading
+from singleflight import SingleFlight
+
+
+def test_first_request_leads_and_identical_ones_follow():
+    flights = SingleFlight('global')
+    leader, leading = flights.join(flights.key('Plan a launch'))
+    follower, following_leads = flights.join(flights.key('  plan a LAUNCH! '))
+    assert leading and not following_leads
+    assert follower is leader
+    assert flights.stats()['followers'] == 1
+
+
+def test_followers_get_the_leaders_reply():
+    flights = SingleFlight('global')
+    flight, _ = flights.join(flights.key('Plan a launch'))
+    replies = []
+    waiters = [threading.Thread(target=lambda: replies.append(flight.wait(5))) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    flights.finish(flight, {'response': 'the plan', 'agent': 'Project Planner'})
+    for waiter in waiters:
+        waiter.join()
+    assert replies == [{'response': 'the plan', 'agent': 'Project Planner'}] * 3
+    # A landed flight is gone: the next identical prompt leads a new one
+    assert flights.join(flights.key('Plan a launch'))[1]
+
+
+def test_streaming_followers_replay_frames_published_before_and_after_joining():
+    flights = SingleFlight('global')
+    flight, _ = flights.join(flights.key('Plan a launch'))
+    flight.publish('frame 1')
+    frames = []
+    follower = threading.Thread(target=lambda: frames.extend(flight.follow(5)))
+    follower.start()
+    flight.publish('frame 2')
+    flights.finish(flight, {'response': 'the plan', 'agent': 'Project Planner'})
+    follower.join()
+    assert frames == ['frame 1', 'frame 2']
+    assert flight.streamed
+
+
+def test_async_followers():
+    async def run():
+        flights = SingleFlight('global')
+        flight, _ = flights.join(flights.key('Plan a launch'))
+        waiter = asyncio.ensure_future(flight.await_result(5))
+        await asyncio.sleep(0.01)
+        flight.publish('frame')
+        flights.finish(flight, {'response': 'the plan', 'agent': 'Project Planner'})
+        return await waiter
+
+    assert asyncio.run(run()) == {'response': 'the plan', 'agent': 'Project Planner'}
+
+
+def test_leader_error_is_raised_in_followers():
+    flights = SingleFlight('global')
+    flight, _ = flights.join(flights.key('Plan a launch'))
+    flights.finish(flight, error=RuntimeError('model down'))
+    try:
+        flight.wait(1)
+    except RuntimeError as e:
+        assert str(e) == 'model down'
+    else:
+        raise AssertionError("the leader's error was not raised")
+    assert flights.stats()['errors'] == 1
+
+
+def test_abandoned_flight_leaves_followers_to_run_it_themselves():
+    flights = SingleFlight('global')
+    flight, _ = flights.join(flights.key('Plan a launch'))
+    flights.finish(flight)
+    assert flight.wait(1) is None and flight.abandoned
+    # Frames and results after landing are ignored
+    flight.publish('late frame')
+    flights.finish(flight, {'response': 'late', 'agent': 'Project Planner'})
+    assert flight.frames == [] and flight.result is None
+    assert flights.stats()['abandoned'] == 1 and flights.stats()['completed'] == 0
+
+
+def test_wait_times_out_while_the_leader_runs():
+    flights = SingleFlight('global')
+    flight, _ = flights.join(flights.key('Plan a launch'))
+    assert flight.wait(0.01) is None and not flight.done
+
+
+def test_scopes_keep_tenants_and_sessions_apart():
+    tenant_flights = SingleFlight()
+    assert tenant_flights.scope == 'tenant'
+    assert tenant_flights.key('Plan', 'acme', 's1') == tenant_flights.key('Plan', 'acme', 's2')
+    assert tenant_flights.key('Plan', 'acme', 's1') != tenant_flights.key('Plan', 'globex', 's1')
+    session_flights = SingleFlight('session')
+    assert session_flights.key('Plan', 'acme', 's1') != session_flights.key('Plan', 'acme', 's2')
+    global_flights = SingleFlight('global')
+    assert global_flights.key('Plan', 'acme', 's1') == global_flights.key('Plan', 'globex', 's2')
+
+
+def test_unknown_scope_is_refused():
+    try:
+        SingleFlight('planet')
+    except ValueError:
+        return
+    raise AssertionError('an unknown scope was accepted')
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Prediction, budget and hit/miss accounting of speculation.py
+
+The coordinator and specialists are stubs: the coordinator "decides" by
+calling the hooks the way the strands hook events would, so no LLM is
+involved.
+
+    python -m pytest -q test_speculation.py
+"""
+import asyncio
+from router import DEFAULT_EXAMPLES, DEVELOPER, RESEARCH, FastPathRouter, TfidfClassifier
+from speculation import SpecialistPredictor, SpeculationController, SpeculationHooks
+
+
+class StubMetrics:
+    def __init__(self):
+        self.accumulated_usage = {}
+
+
+class StubResult:
+    stop_reason = 'end_turn'
+
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+
+class StubSpecialist:
+    system_prompt = 'You are a specialist.'
+
+    def __init__(self, agent, delay=0.05):
+        self.agent = agent
+        self.delay = delay
+        self.messages = []
+        self.cancelled = False
+        self.event_loop_metrics = StubMetrics()
+
+    async def invoke_async(self, prompt):
+        self.messages.append({'role': 'user', 'content': [{'text': prompt}]})
+        await asyncio.sleep(self.delay)
+        self.event_loop_metrics.accumulated_usage['totalTokens'] = 300
+        return StubResult(f'{self.agent} answer')
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class StubCoordinator:
+    """Picks its tools after think seconds and calls the one it picked"""
+
+    name = 'Team Coordinator'
+
+    def __init__(self, hooks, tools, think=0.1):
+        self.hooks = hooks
+        self.tools = tools
+        self.think = think
+        self.messages = []
+
+    async def invoke_async(self, prompt):
+        await asyncio.sleep(self.think)
+        self.hooks.active.decided(self.tools)
+        answers = []
+        for name in self.tools:
+            run = self.hooks.active.take(name)
+            answers.append(str(await run.task) if run else f'{name} called afresh')
+        return answers
+
+
+class StubTeam:
+    def __init__(self, tools):
+        self.hooks = [SpeculationHooks()]
+        self.coordinator_agent = StubCoordinator(self.hooks[0], tools)
+        self.tool_names = {RESEARCH: 'research_agent', DEVELOPER: 'developer_agent'}
+        self.spares = []
+
+    def spare_specialist(self, agent):
+        spare = StubSpecialist(agent)
+        self.spares.append(spare)
+        return spare
+
+
+def run(controller, message, tools):
+    team = StubTeam(tools)
+    coordinator = controller.speculate(team, message)
+    if coordinator is None:
+        return None, team
+    return asyncio.run(coordinator.invoke_async(message)), team
+
+
+def test_predictor_ranks_rule_and_classifier_matches():
+    router = FastPathRouter(classifier=TfidfClassifier(DEFAULT_EXAMPLES))
+    predictor = SpecialistPredictor(router, min_confidence=0.3)
+    assert predictor.predict('Research the latest trends in AI') == [(RESEARCH, 1.0)]
+    assert predictor.predict('hello there') == []
+    likely = SpecialistPredictor(router, min_confidence=0.0, max_agents=3).likelihoods(
+        'Research this code: def f(x): return x')
+    assert set(likely) >= {RESEARCH, DEVELOPER}
+
+
+def test_matching_run_stands_in_for_the_tool_call():
+    controller = SpeculationController(SpecialistPredictor(FastPathRouter()), tokens_per_minute=0)
+    answers, team = run(controller, 'Research the latest trends in AI', ['research_agent'])
+    assert answers == [f'{RESEARCH} answer']
+    stats = controller.stats.stats()
+    assert (stats['requests'], stats['launched'], stats['hits'], stats['misses']) == (1, 1, 1, 0)
+    assert stats['tokens_used'] == 300 and stats['tokens_wasted'] == 0
+    # The run started with the coordinator, so its head start is the think time
+    assert 0.04 <= stats['seconds_saved'] <= 0.2
+
+
+def test_wrong_or_unused_runs_are_cancelled_and_charged():
+    controller = SpeculationController(SpecialistPredictor(FastPathRouter()), tokens_per_minute=0)
+    answers, team = run(controller, 'Research the latest trends in AI', ['developer_agent'])
+    assert answers == ['developer_agent called afresh'] and team.spares[0].cancelled
+    run(controller, 'Research the latest trends in AI', [])
+    stats = controller.stats.stats()
+    assert (stats['hits'], stats['misses'], stats['unused']) == (0, 1, 1)
+    assert stats['tokens_wasted'] == stats['tokens_used'] > 0
+
+
+def test_nothing_starts_without_a_confident_prediction():
+    controller = SpeculationController(SpecialistPredictor(FastPathRouter()))
+    assert run(controller, 'hello there', [])[0] is None
+    assert controller.stats.stats()['requests'] == 1
+
+
+def test_budget_skips_speculation_once_spent():
+    controller = SpeculationController(SpecialistPredictor(FastPathRouter()), tokens_per_minute=1500,
+                                       default_run_tokens=1000)
+    assert controller.reserve() == 1000
+    assert controller.reserve() is None
+    # A hit wastes nothing, so its reservation is handed back
+    controller.settle(1000, 0)
+    assert controller.reserve() == 1000
+    controller.settle(1000, 0)
+    run(controller, 'Research the latest trends in AI', [])
+    # The unused run charged its 300 tokens, and later reservations use that measured cost
+    assert controller.stats.mean_run_tokens() == 300
+    assert [controller.reserve() for _ in range(5)] == [300, 300, 300, 300, None]
+    run(controller, 'Research the latest trends in AI', [])
+    assert controller.stats.stats()['skipped_budget'] == 1
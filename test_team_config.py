@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Validation and reloading of team.toml (team_config.py)
+
+Each test works on a copy of the shipped team.toml in a temporary directory.
+Compiling is stubbed with a callable, so no agents or LLM are built.
+
+    python -m pytest -q test_team_config.py
+"""
+import os
+import time
+import shutil
+import tempfile
+from contextlib import contextmanager
+from team_config import DEFAULT_PATH, TeamConfig, TeamConfigError, TeamSpec, load_team_spec
+
+with open(DEFAULT_PATH, encoding='utf-8') as shipped:
+    SHIPPED = shipped.read()
+
+
+@contextmanager
+def team_file(text=SHIPPED):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'team.toml')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(directory)
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def rewrite(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    # A new mtime even on filesystems with coarse timestamps
+    stamp = time.time() + 1
+    os.utime(path, (stamp, stamp))
+
+
+def rejected(text):
+    try:
+        TeamSpec.from_toml(text, 'test')
+    except TeamConfigError as e:
+        return str(e)
+    raise AssertionError('an invalid team definition was accepted')
+
+
+def test_shipped_definition_is_valid():
+    spec = load_team_spec()
+    assert spec.tool_names == {'research_agent': 'research_analyst', 'planning_agent': 'project_planner',
+                               'developer_agent': 'senior_developer'}
+    assert [profile['name'] for profile in spec.profiles] == [
+        'Research Analyst', 'Project Planner', 'Senior Developer', 'Team Coordinator']
+    assert spec.version == TeamSpec.from_toml(SHIPPED).version
+
+
+def test_version_follows_the_content():
+    changed = TeamSpec.from_toml(SHIPPED.replace('Research Analyst"', 'Market Analyst"', 1))
+    assert changed.version != load_team_spec().version
+
+
+def test_invalid_definitions_are_rejected():
+    assert 'Expected' in rejected('[agents')
+    assert 'missing: synthesis_agent' in rejected(SHIPPED.split('[agents.synthesis_agent]')[0])
+    assert 'unknown: extra_agent' in rejected(SHIPPED + '\n[agents.extra_agent]\nname = "X"\nprompt = "Y"\n')
+    assert 'names must be unique' in rejected(SHIPPED.replace('"Team Synthesizer"', '"Team Coordinator"'))
+    assert 'tool_name values must be unique' in rejected(
+        SHIPPED.replace('"project_planner"', '"research_analyst"'))
+    assert 'model setting' in rejected(SHIPPED.replace('# max_tokens = 500', 'max_tokens = "many"'))
+    assert 'only the coordinator_agent has delegates' in rejected(
+        SHIPPED.replace('tools = ["plan_project"]', 'tools = ["plan_project"]\ndelegates = ["research_agent"]'))
+
+
+def test_broken_file_keeps_the_running_spec():
+    with team_file() as path:
+        config = TeamConfig(path)
+        version = config.spec.version
+        rewrite(path, SHIPPED.replace('[agents.research_agent]', '[agents.research_agent'))
+        try:
+            config.reload()
+        except TeamConfigError:
+            pass
+        else:
+            raise AssertionError('a broken file was loaded')
+        assert config.spec.version == version
+        stats = config.stats()
+        assert stats['failures'] == 1 and stats['reloads'] == 0 and stats['last_error']
+
+
+def test_reload_swaps_in_a_changed_file_and_notifies_listeners():
+    with team_file() as path:
+        config = TeamConfig(path)
+        seen = []
+        config.on_change(seen.append)
+        assert not config.reload()['changed']
+        rewrite(path, SHIPPED.replace('# max_tokens = 500', 'max_tokens = 256'))
+        result = config.reload()
+        assert result['changed'] and result['version'] == config.spec.version
+        assert config.spec.model == {'max_tokens': 256}
+        assert seen == [config.spec]
+
+
+def test_failed_compile_rejects_the_spec_and_leaves_the_file_alone():
+    with team_file() as path:
+        def compile(spec):
+            raise RuntimeError('model refused')
+
+        config = TeamConfig(path, compile=compile)
+        version = config.spec.version
+        try:
+            config.apply(SHIPPED.replace('# temperature = 0.7', 'temperature = 0.1'))
+        except TeamConfigError as e:
+            assert 'model refused' in str(e)
+        else:
+            raise AssertionError('a spec that failed to compile was applied')
+        assert config.spec.version == version
+        assert read(path) == SHIPPED
+
+
+def test_apply_compiles_then_writes_the_file_atomically():
+    with team_file() as path:
+        compiled = []
+        config = TeamConfig(path, compile=compiled.append)
+        text = SHIPPED.replace('# temperature = 0.7', 'temperature = 0.1')
+        assert config.apply(text)['changed']
+        assert [spec.version for spec in compiled] == [config.spec.version]
+        assert read(path) == text
+        assert os.listdir(os.path.dirname(path)) == ['team.toml']
+        # Reading the written file back finds nothing new
+        assert not config.reload()['changed']
+
+
+def test_watch_picks_up_an_edit():
+    with team_file() as path:
+        config = TeamConfig(path)
+        version = config.spec.version
+        config.watch(interval=0.01)
+        rewrite(path, SHIPPED.replace('# max_tokens = 500', 'max_tokens = 300'))
+        deadline = time.monotonic() + 5
+        while config.spec.version == version and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert config.spec.model == {'max_tokens': 300}
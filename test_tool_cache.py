@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Cache keys, TTLs, size limits and settings of tool_cache.py
+
+    python -m pytest -q test_tool_cache.py
+"""
+import os
+import time
+import asyncio
+from tool_cache import configure, memoize_tool, normalize_argument, strip_argument, tool_cache_stats
+
+
+def counted(decorator, name='lookup_topic'):
+    """A memoized tool that records every call that reached its body"""
+    calls = []
+
+    def body(topic, depth=1):
+        calls.append((topic, depth))
+        return f'{topic}:{depth}:{len(calls)}'
+
+    body.__name__ = name
+    return decorator(body), calls
+
+
+def test_arguments_are_normalized_into_one_key():
+    tool, calls = counted(memoize_tool())
+    first = tool('Electric  Vehicles ')
+    assert tool('electric vehicles') == first
+    assert tool(topic='ELECTRIC VEHICLES', depth=1) == first
+    assert len(calls) == 1
+    tool('electric vehicles', depth=2)
+    assert len(calls) == 2
+    assert normalize_argument({'b': [' X '], 'a': 1}) == {'a': 1, 'b': ['x']}
+
+
+def test_strip_argument_keeps_case_and_inner_whitespace():
+    tool, calls = counted(memoize_tool(normalize=strip_argument), 'review_snippet')
+    tool('def f(x):\n    return X\n')
+    tool('  def f(x):\n    return X')
+    tool('def f(x):\n    return x')
+    assert len(calls) == 2
+
+
+def test_results_expire_after_the_ttl():
+    tool, calls = counted(memoize_tool(ttl_seconds=0.02), 'short_lived')
+    tool('ev')
+    tool('ev')
+    time.sleep(0.03)
+    tool('ev')
+    assert len(calls) == 2
+
+
+def test_least_recently_used_result_is_dropped():
+    tool, calls = counted(memoize_tool(max_entries=2), 'small_tool')
+    tool('a')
+    tool('b')
+    tool('a')
+    tool('c')
+    tool('a')
+    tool('b')
+    assert [topic for topic, _ in calls] == ['a', 'b', 'c', 'b']
+    assert tool.memo.stats()['entries'] == 2
+
+
+def test_async_tools_are_memoized():
+    calls = []
+
+    @memoize_tool()
+    async def fetch_page(url):
+        calls.append(url)
+        return url.upper()
+
+    async def run():
+        return [await fetch_page('https://example.com') for _ in range(3)]
+
+    assert asyncio.run(run()) == ['HTTPS://EXAMPLE.COM'] * 3
+    assert calls == ['https://example.com']
+
+
+def test_environment_overrides_per_tool():
+    saved = dict(os.environ)
+    os.environ.update(TOOL_CACHE_TTL_SECONDS='60', TOOL_CACHE_TTL_TUNED_TOOL='5', TOOL_CACHE_MAX_ENTRIES_TUNED_TOOL='3')
+    try:
+        tuned, _ = counted(memoize_tool(), 'tuned_tool')
+        other, _ = counted(memoize_tool(), 'other_tool')
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    assert (tuned.memo.ttl_seconds, tuned.memo.max_entries) == (5.0, 3)
+    assert (other.memo.ttl_seconds, other.memo.max_entries) == (60.0, 256)
+
+
+def test_configure_at_runtime_and_stats():
+    tool, calls = counted(memoize_tool(), 'configurable_tool')
+    tool('ev')
+    tool('ev')
+    assert tool_cache_stats()['configurable_tool'] == {
+        'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1, 'ttl_seconds': 300, 'max_entries': 256}
+    # A TTL of 0 turns caching off and drops what was kept
+    configure('configurable_tool', ttl_seconds=0)
+    assert tool.memo.stats()['entries'] == 0
+    tool('ev')
+    tool('ev')
+    assert len(calls) == 3
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Concurrency limit and result order of the tool calls in one turn (tool_executor.py)
+
+fake_llm_server.py makes the agent call four slow stub tools in one turn.
+The tools count how many of them run at once and finish in a different
+order than they were called.
+
+    python -m pytest -q test_tool_executor.py
+"""
+import os
+import asyncio
+from contextlib import contextmanager
+from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+from load_test import server_env
+
+PROMPT = 'Gather everything about the release'
+# (tool name, seconds): the first call finishes last
+STUB_TOOLS = [('lookup_docs', 0.12), ('search_issues', 0.04), ('query_metrics', 0.08), ('read_repo', 0.02)]
+
+
+@contextmanager
+def fake_server():
+    saved = dict(os.environ)
+    server, url = start_fake_llm_server(config=FakeLLMConfig(
+        latency=0.01, tool_script=[{'match': '^' + PROMPT, 'tools': [[name for name, _ in STUB_TOOLS]]}]))
+    os.environ.update(server_env(url))
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+        server.shutdown()
+
+
+def stub_tools(seen):
+    """Stub tools recording the most that ran at once (seen['peak']) and the order they finished"""
+    from strands import tool
+
+    def make(name, seconds):
+        async def body(query: str) -> str:
+            seen['running'] += 1
+            seen['peak'] = max(seen['peak'], seen['running'])
+            await asyncio.sleep(seconds)
+            seen['running'] -= 1
+            seen['finished'].append(name)
+            return f'{name}: {query}'
+        body.__name__ = name
+        body.__doc__ = f"""Stub tool that takes {seconds}s.
+
+        Args:
+            query: What to look up
+        """
+        return tool(body)
+
+    return [make(*spec) for spec in STUB_TOOLS]
+
+
+def run_turn(limit):
+    """(seen, [tool names in call order], [tool names in result order]) of one turn under the limit"""
+    from strands import Agent
+    from strands.tools.executors import ConcurrentToolExecutor
+    from model_factory import create_groq_model, run_sync
+    from tool_executor import ToolConcurrencyLimit
+
+    seen = {'running': 0, 'peak': 0, 'finished': []}
+    agent = Agent(model=create_groq_model(max_tokens=50), tools=stub_tools(seen), callback_handler=None,
+                  tool_executor=ConcurrentToolExecutor(), hooks=[ToolConcurrencyLimit(limit)])
+    run_sync(agent.invoke_async(PROMPT))
+    request, response = next((request, response) for request, response in zip(agent.messages, agent.messages[1:])
+                             if any('toolUse' in block for block in request['content']))
+    names = {block['toolUse']['toolUseId']: block['toolUse']['name'] for block in request['content']
+             if 'toolUse' in block}
+    calls = list(names.values())
+    results = [names[block['toolResult']['toolUseId']] for block in response['content'] if 'toolResult' in block]
+    return seen, calls, results
+
+
+def test_limit_holds_and_results_keep_call_order():
+    with fake_server():
+        seen, calls, results = run_turn(2)
+    assert sorted(calls) == sorted(name for name, _ in STUB_TOOLS)
+    assert seen['peak'] == 2
+    assert seen['finished'] != calls
+    assert results == calls
+
+
+def test_limit_of_one_runs_the_calls_in_order():
+    with fake_server():
+        seen, calls, results = run_turn(1)
+    assert seen['peak'] == 1
+    assert seen['finished'] == calls
+    assert results == calls
+
+
+def test_each_invocation_gets_its_own_slots():
+    from tool_executor import LimitedTool, ToolConcurrencyLimit
+
+    class Event:
+        def __init__(self, invocation_state):
+            self.selected_tool = object()
+            self.invocation_state = invocation_state
+
+    hooks = ToolConcurrencyLimit(3)
+    first, second, other = Event({}), Event({}), Event({})
+    second.invocation_state = first.invocation_state
+    for event in (first, second, other):
+        hooks._before_tool_call(event)
+    assert isinstance(first.selected_tool, LimitedTool)
+    assert first.selected_tool.limit is second.selected_tool.limit
+    assert first.selected_tool.limit is not other.selected_tool.limit
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Memoization for Strands @tool functions
+
+Stack @memoize_tool() under @tool to reuse results for repeated arguments:
+
+    @tool
+    @memoize_tool()
+    def research_topic(topic: str) -> str:
+        ...
+
+TTL and size come from the environment so they can be tuned per tool
+without touching tool bodies: TOOL_CACHE_TTL_SECONDS / TOOL_CACHE_MAX_ENTRIES
+set the defaults, TOOL_CACHE_TTL_<TOOL_NAME> / TOOL_CACHE_MAX_ENTRIES_<TOOL_NAME>
+override them for one tool. A TTL of 0 disables caching. configure() does
+the same at runtime.
+"""
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def normalize_argument(value):
+    """Canonical form of a tool argument for cache keys"""
+    if isinstance(value, str):
+        return re.sub(r'\s+', ' ', value).strip().casefold()
+    if isinstance(value, dict):
+        return {str(key): normalize_argument(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [normalize_argument(item) for item in value]
+    return value
+
+
+def strip_argument(value):
+    """Key form for case/whitespace-sensitive arguments such as code: trim the ends only"""
+    return value.strip() if isinstance(value, str) else normalize_argument(value)
+
+
+class ToolMemo:
+    """Result cache for one tool, safe to share across request threads"""
+
+    def __init__(self, name, ttl_seconds, max_entries):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def lookup(self, key):
+        """Return (True, value) on a fresh hit, else (False, None)"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, item[1]
+            if item is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'entries': len(self._entries),
+                'ttl_seconds': self.ttl_seconds,
+                'max_entries': self.max_entries,
+            }
+
+
+def _env_setting(name, setting, default_variable, default):
+    value = os.getenv(f'TOOL_CACHE_{setting}_{name.upper()}', os.getenv(default_variable))
+    return float(value) if value is not None else default
+
+
+def memoize_tool(ttl_seconds=300, max_entries=256, normalize=normalize_argument):
+    """Cache a tool function's results by its normalized arguments
+
+    Args:
+        ttl_seconds: Default lifetime of a cached result (environment overrides it)
+        max_entries: Default number of results kept per tool (environment overrides it)
+        normalize: Function mapping each argument value to its cache-key form
+    """
+    def decorator(func):
+        name = func.__name__
+        memo = ToolMemo(
+            name,
+            ttl_seconds=_env_setting(name, 'TTL', 'TOOL_CACHE_TTL_SECONDS', ttl_seconds),
+            max_entries=int(_env_setting(name, 'MAX_ENTRIES', 'TOOL_CACHE_MAX_ENTRIES', max_entries)),
+        )
+        with _registry_lock:
+            _registry[name] = memo
+        signature = inspect.signature(func)
+
+        def cache_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {key: normalize(value) for key, value in bound.arguments.items()}
+            return json.dumps(arguments, sort_keys=True, default=repr)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not memo.enabled:
+                    return await func(*args, **kwargs)
+                key = cache_key(args, kwargs)
+                hit, value = memo.lookup(key)
+                if hit:
+                    return value
+                value = await func(*args, **kwargs)
+                memo.store(key, value)
+                return value
+
+            async_wrapper.memo = memo
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not memo.enabled:
+                return func(*args, **kwargs)
+            key = cache_key(args, kwargs)
+            hit, value = memo.lookup(key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            memo.store(key, value)
+            return value
+
+        wrapper.memo = memo
+        return wrapper
+
+    return decorator
+
+
+def configure(name, ttl_seconds=None, max_entries=None):
+    """Change a memoized tool's TTL or size at runtime"""
+    with _registry_lock:
+        memo = _registry[name]
+    if ttl_seconds is not None:
+        memo.ttl_seconds = ttl_seconds
+    if max_entries is not None:
+        memo.max_entries = max_entries
+    if not memo.enabled:
+        memo.clear()
+
+
+def tool_cache_stats():
+    """Hit/miss counters for every memoized tool"""
+    with _registry_lock:
+        memos = dict(_registry)
+    return {name: memo.stats() for name, memo in memos.items()}
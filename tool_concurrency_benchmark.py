@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Latency of a model turn that calls several slow tools at once
+
+A fake LLM script makes the agent call every stub tool in one turn. Half of
+the tools are async (awaiting, like a specialist agent) and half are
+blocking (sleeping on the tool thread pool). The turn runs with strands'
+SequentialToolExecutor and with ConcurrentToolExecutor under a few
+ToolConcurrencyLimit limits. Sequential time tracks the sum of the tool
+delays and concurrent time tracks the slowest tool. Each run also checks
+that the tool results come back in the order the calls were made.
+
+    python tool_concurrency_benchmark.py --rounds 5 --concurrency 1 2 4
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from fake_llm_server import FakeLLMConfig, start_fake_llm_server
+from load_test import server_env
+
+# (tool name, seconds, blocking)
+STUB_TOOLS = [
+    ('lookup_docs', 0.4, False),
+    ('search_issues', 0.3, False),
+    ('query_metrics', 0.5, False),
+    ('read_repo', 0.2, True),
+    ('run_linter', 0.35, True),
+    ('fetch_calendar', 0.25, True),
+]
+PROMPT = 'Gather everything about the release'
+
+
+def stub_tools():
+    from strands import tool
+    from tool_executor import threaded_tool
+
+    def make(name, seconds, blocking):
+        if blocking:
+            def body(query: str) -> str:
+                time.sleep(seconds)
+                return f'{name}: {query}'
+            body = threaded_tool(body)
+        else:
+            async def body(query: str) -> str:
+                await asyncio.sleep(seconds)
+                return f'{name}: {query}'
+        body.__name__ = name
+        body.__doc__ = f"""Stub tool that takes {seconds}s.
+
+        Args:
+            query: What to look up
+        """
+        return tool(body)
+
+    return [make(*spec) for spec in STUB_TOOLS]
+
+
+def results_in_call_order(agent):
+    """Whether the tool results follow the order of the tool calls in every turn"""
+    for request, response in zip(agent.messages, agent.messages[1:]):
+        calls = [block['toolUse']['toolUseId'] for block in request.get('content', []) if 'toolUse' in block]
+        if calls:
+            results = [block['toolResult']['toolUseId'] for block in response.get('content', []) if 'toolResult' in block]
+            if results != calls:
+                return False
+    return True
+
+
+def run_mode(label, executor, rounds, hooks=()):
+    from strands import Agent
+    from model_factory import create_groq_model, run_sync
+
+    model = create_groq_model(max_tokens=100)
+    latencies, ordered = [], True
+    for _ in range(rounds):
+        agent = Agent(model=model, tools=stub_tools(), tool_executor=executor, hooks=list(hooks),
+                      callback_handler=None)
+        started = time.perf_counter()
+        run_sync(agent.invoke_async(PROMPT))
+        latencies.append(time.perf_counter() - started)
+        ordered = ordered and results_in_call_order(agent)
+    return {
+        'executor': label,
+        'p50_s': round(statistics.median(latencies), 3),
+        'mean_s': round(statistics.mean(latencies), 3),
+        'results_in_call_order': ordered,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Turn latency with sequential and bounded concurrent tool execution')
+    parser.add_argument('--rounds', type=int, default=5, help='Turns per executor')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8], help='ToolConcurrencyLimit limits')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake LLM seconds per model call')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    server, llm_base_url = start_fake_llm_server(config=FakeLLMConfig(
+        latency=args.latency, tool_script=[{'match': '^' + PROMPT, 'tools': [[name for name, _, _ in STUB_TOOLS]]}]
+    ))
+    os.environ.update(server_env(llm_base_url))
+    from strands.tools.executors import ConcurrentToolExecutor, SequentialToolExecutor
+    from tool_executor import ToolConcurrencyLimit
+
+    run_mode('warm-up', SequentialToolExecutor(), 1)
+    results = [run_mode('sequential', SequentialToolExecutor(), args.rounds)]
+    results += [run_mode(f'bounded({limit})', ConcurrentToolExecutor(), args.rounds, [ToolConcurrencyLimit(limit)])
+                for limit in args.concurrency]
+    server.shutdown()
+
+    tool_sum = sum(seconds for _, seconds, _ in STUB_TOOLS)
+    tool_max = max(seconds for _, seconds, _ in STUB_TOOLS)
+    if args.json:
+        print(json.dumps({'tool_seconds_sum': tool_sum, 'tool_seconds_max': tool_max, 'results': results}, indent=2))
+        return
+
+    print(f'{len(STUB_TOOLS)} tools in one turn: sum {tool_sum:.2f}s, slowest {tool_max:.2f}s '
+          f'(plus two fake LLM calls of {args.latency}s)\n')
+    print(f"{'executor':<13}{'p50 s':>8}{'mean s':>8}  results in call order")
+    for row in results:
+        print(f"{row['executor']:<13}{row['p50_s']:>8}{row['mean_s']:>8}  {row['results_in_call_order']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Bounded concurrent execution of the tool calls in one model turn
+
+When a model turn asks for several tools (say research_analyst and
+project_planner), strands' ConcurrentToolExecutor starts them together, so
+the turn takes as long as the slowest tool instead of the sum of all of
+them. ToolConcurrencyLimit, a hook registered on each agent, lets at most
+max_concurrency of them run at once. Results go back to the model in the
+order the calls were made, whichever finishes first, so the next request is
+the same on every run.
+
+Async tools (the specialists behind the coordinator) run on the event loop.
+Blocking @tool functions are stacked with @threaded_tool and run on a shared
+thread pool of TOOL_THREADS threads. That keeps them off the loop's default
+executor, which the web layer uses for session leases:
+
+    @tool
+    @threaded_tool
+    def research_topic(topic: str) -> str:
+        ...
+"""
+import os
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from strands.types.tools import AgentTool
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def tool_threads():
+    """The process's thread pool for blocking tools (TOOL_THREADS workers)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(int(os.getenv('TOOL_THREADS', '8')), thread_name_prefix='tool')
+        return _pool
+
+
+def threaded_tool(func):
+    """Run a blocking tool function on the tool thread pool (stack under @tool)"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            tool_threads(), functools.partial(context.run, func, *args, **kwargs))
+
+    return wrapper
+
+
+class LimitedTool(AgentTool):
+    """A tool whose runs wait for a slot of the turn's semaphore; everything else is the wrapped tool's"""
+
+    def __init__(self, tool, limit):
+        super().__init__()
+        self.tool = tool
+        self.limit = limit
+
+    @property
+    def tool_name(self):
+        return self.tool.tool_name
+
+    @property
+    def tool_spec(self):
+        return self.tool.tool_spec
+
+    @property
+    def tool_type(self):
+        return self.tool.tool_type
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        async with self.limit:
+            async for event in self.tool.stream(tool_use, invocation_state, **kwargs):
+                yield event
+
+
+class ToolConcurrencyLimit:
+    """Runs at most max_concurrency tools of one agent turn at once
+
+    A strands HookProvider (structural, like SpeculationHooks): before each
+    tool call the selected tool is swapped for a LimitedTool holding the
+    invocation's semaphore. strands' ConcurrentToolExecutor still starts a
+    turn's tools together and returns their results in call order. The
+    limit is per invocation, not shared, because a specialist's tools run
+    while the coordinator's tool call is still open; an agent's turns run
+    one after another, so that is also a per-turn limit.
+
+    Args:
+        max_concurrency: Tool calls from one turn in flight together (1 runs them in order)
+    """
+
+    STATE_KEY = 'tool_concurrency_limit'
+
+    def __init__(self, max_concurrency=4):
+        self.max_concurrency = max(1, max_concurrency)
+
+    def register_hooks(self, registry, **kwargs):
+        from strands.hooks import BeforeToolCallEvent
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+
+    def _before_tool_call(self, event):
+        if event.selected_tool is None:
+            return
+        limit = event.invocation_state.get(self.STATE_KEY)
+        if limit is None:
+            limit = event.invocation_state[self.STATE_KEY] = asyncio.Semaphore(self.max_concurrency)
+        event.selected_tool = LimitedTool(event.selected_tool, limit)
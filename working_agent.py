@@ -2,26 +2,16 @@
 """
 Working Strands Agent Team with Groq LLM
 """
-import os
 from dotenv import load_dotenv
 from strands import Agent, tool
 
 load_dotenv()
 
 # Import the correct model class
-from strands.models.litellm import LiteLLMModel
+from model_factory import create_groq_model
 
 # Configure Groq model via LiteLLM
-groq_model = LiteLLMModel(
-    model_id="groq/llama-3.1-8b-instant",
-    client_args={
-        "api_key": os.getenv("GROQ_API_KEY"),
-    },
-    params={
-        "temperature": 0.7,
-        "max_tokens": 500,
-    }
-)
+groq_model = create_groq_model(model_id="groq/llama-3.1-8b-instant", temperature=0.7, max_tokens=500)
 
 # Simple test agent
 test_agent = Agent(